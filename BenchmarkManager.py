@@ -13,10 +13,12 @@ Logger = loggingManager.logger.getLogger("Benchmark")
 
 class CompositeBenchmark():
 
-    def __init__(self, benchmarkDetails):
+    def __init__(self, benchmarkDetails, useCache = True, threads = 1):
         """
         benchmarkDetails: dictionary of below items:
         {"assets": [], "weights": [], pricePath: None}
+        useCache: serve the price files from the on disk data cache
+        threads: number of threads used to read and parse the price files
 
         """
 
@@ -31,23 +33,44 @@ class CompositeBenchmark():
 
 
         self.pricePath = benchmarkDetails["pricepath"]
-        self.__loadPriceData(priceInfo = {"listAssets": benchmarkDetails["assets"], "pricePath": benchmarkDetails["pricepath"]})
+        self.useCache = useCache
+        self.threads = threads
+
+        # price data is loaded on first use (loadBenchmarkData)
+        self.PriceData = None
+        self.__PriceDownloader = None
 
 
 
 
 
     def __loadPriceData(self, priceInfo = {"listAssets": None, "pricePath": None}):
-        __PriceDownloader = Datadownloader(listAssets=self.component_IDs, path = priceInfo["pricePath"])
-        __PriceDownloader.loadData(priceCol = "Close")
-        _PriceData = __PriceDownloader.allData_df
+        if self.__PriceDownloader is None:
+            self.__PriceDownloader = Datadownloader(listAssets=self.component_IDs, path = priceInfo["pricePath"], useCache = self.useCache, threads = self.threads)
+        self.__PriceDownloader.loadData(priceCol = "Close")
+        _PriceData = self.__PriceDownloader.allData_df
         self.PriceData = _PriceData.to_dict(orient = "series")
 
 
+    def refresh(self):
+        # picks up prices appended to the price files. Benchmark data is reloaded on the next loadBenchmarkData
+        if self.__PriceDownloader is None:
+            return None
+
+        affected = self.__PriceDownloader.refresh()
+        if affected is not None:
+            self.PriceData = None
+
+        return affected
+
+
 
     def loadBenchmarkData(self, startDate, endDate = None):
         # loads the benchmark individual assets' data and construct the benchmark value
 
+        if self.PriceData is None:
+            self.__loadPriceData(priceInfo = {"listAssets": self.component_IDs, "pricePath": self.pricePath})
+
         allIndexData = pd.DataFrame()
         dateRange = pd.Series(pd.date_range(start = startDate, end = endDate, freq = BDay())).dt.date
         dateRange = pd.DataFrame(dateRange, columns = ["Date"])
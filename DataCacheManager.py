@@ -0,0 +1,364 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import io
+import numpy as np
+import pandas as pd
+
+from Utilities import loggingManager
+
+
+Logger = loggingManager.logger.getLogger("DataCache")
+
+
+CACHE_FOLDER    = ".qtcache"
+CACHE_VERSION   = 2
+MAX_AGE_DAYS    = 30        # entries not used for these many days are evicted
+
+HEAD_BYTES      = 1 << 16   # bytes at the start of a file checked to detect rewrites (incremental ingestion)
+TAIL_BYTES      = 1 << 12   # bytes before the last ingested offset checked to detect rewrites
+
+
+
+def fileFingerprint(filepath, withHash = True):
+    # fingerprint of a source file: size, modification time and (optionally) content hash
+    stat = os.stat(filepath)
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    if withHash:
+        sha = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        fingerprint["sha256"] = sha.hexdigest()
+
+    return fingerprint
+
+
+
+def _sha(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def _lastLineEnd(f, size):
+    # offset just past the last newline of an open (binary) file of size bytes (0 if there is no complete line)
+    end = size
+    while end > 0:
+        start = max(end - TAIL_BYTES, 0)
+        f.seek(start)
+        _position = f.read(end - start).rfind(b"\n")
+        if _position >= 0:
+            return start + _position + 1
+        end = start
+
+    return 0
+
+
+def ingestState(filepath):
+    """
+    state of a file for incremental ingestion (complete lines only, a partially written last line is not ingested): 
+        offset --> bytes ingested (end of the last complete line), header --> first (header) line, 
+        headHash/ tailHash --> hash of the first HEAD_BYTES and of the TAIL_BYTES before offset
+    """
+    with open(filepath, "rb") as f:
+        content = f.read(HEAD_BYTES)
+        header  = content.split(b"\n", 1)[0]
+
+        offset  = _lastLineEnd(f, f.seek(0, os.SEEK_END))
+        f.seek(max(offset - TAIL_BYTES, 0))
+        tail    = f.read(offset - max(offset - TAIL_BYTES, 0))
+
+    return {"offset": offset, "header": header.decode("utf-8"), "headHash": _sha(content[:offset]), "tailHash": _sha(tail)}
+
+
+def readAppendedRows(filepath, state, parser):
+    """
+    parses only the rows appended to filepath since state was taken (complete lines only)
+    filepath: source csv file
+    state: ingestState of the file when it was last ingested
+    parser: function (file path or buffer) --> DataFrame
+    returns (rows, new state). (None, None) if the file was changed otherwise than appending --> full re-read required
+    """
+
+    offset = state["offset"]
+
+    with open(filepath, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size < offset:
+            return None, None
+
+        # head and the bytes just before the offset must be unchanged
+        f.seek(0)
+        head = f.read(min(HEAD_BYTES, offset))
+        if _sha(head) != state["headHash"]:
+            return None, None
+
+        f.seek(max(offset - TAIL_BYTES, 0))
+        tail = f.read(offset - max(offset - TAIL_BYTES, 0))
+        if _sha(tail) != state["tailHash"] or not tail.endswith(b"\n"):
+            return None, None
+
+        appended = f.read(size - offset)
+
+    # only complete lines are ingested (a partially written line is picked up next time)
+    appended = appended[:appended.rfind(b"\n") + 1]
+    header   = state["header"].encode("utf-8")
+
+    rows = parser(io.BytesIO(header + b"\n" + appended))
+
+    newState = {"offset":   offset + len(appended), 
+                "header":   state["header"], 
+                "headHash": _sha((head + appended)[:HEAD_BYTES]), 
+                "tailHash": _sha((tail + appended)[-TAIL_BYTES:])}
+
+    return rows, newState
+
+
+
+class DataCache():
+    """
+    On disk cache of parsed csv files
+    Each entry holds the parsed columns of one source file as a columnar .npz (one array per column)
+    next to the fingerprint of the source file (size, mtime, sha256).
+    Entries are served as long as the source file is unchanged and rebuilt automatically when it changes
+    (or extended with only the appended rows, when the file has grown).
+    """
+
+    def __init__(self, cacheDir, maxAgeDays = MAX_AGE_DAYS):
+
+        self.cacheDir   = cacheDir
+        self.maxAgeDays = maxAgeDays
+
+        os.makedirs(self.cacheDir, exist_ok = True)
+
+
+    def read(self, filepath, parser, append = None):
+        """
+        returns the parsed data of filepath. Served from cache if available and still valid
+        filepath: source csv file
+        parser: function (filepath) --> DataFrame, used to (re)build the entry
+        append: optional function (cached data, filepath, ingest state) --> (data, new ingest state) 
+                extending the cached data with rows appended to the file. Returns (None, None) if not possible
+        """
+
+        entryPath   = self.__entryPath(filepath)
+        meta        = self.__readMeta(entryPath)
+        fingerprint = fileFingerprint(filepath, withHash = False)
+
+        if meta is not None:
+            _cached = meta["fingerprint"]
+
+            if _cached["size"] == fingerprint["size"] and _cached["mtime_ns"] == fingerprint["mtime_ns"]:
+                return self.__load(entryPath, meta)
+
+            if _cached["size"] == fingerprint["size"] and _cached["sha256"] is not None and \
+                _cached["sha256"] == fileFingerprint(filepath)["sha256"]:
+                # file touched, but content unchanged
+                meta["fingerprint"]["mtime_ns"] = fingerprint["mtime_ns"]
+                self.__writeMeta(entryPath, meta)
+                return self.__load(entryPath, meta)
+
+            if append is not None and _cached["size"] < fingerprint["size"]:
+                # file grown --> ingest only the appended rows
+                data, state = append(self.__load(entryPath, meta), filepath, meta["ingest"])
+                if data is not None:
+                    self.write(filepath, data, fingerprint = {**fingerprint, "size": state["offset"], "sha256": None}, ingest = state)
+                    return data
+
+            Logger.info(f"{filepath} changed. Rebuilding cache entry")
+
+        # fingerprint taken before parsing: rows appended meanwhile are picked up by the next read
+        fingerprint = fileFingerprint(filepath)
+        state       = ingestState(filepath)
+
+        data = parser(filepath)
+        self.write(filepath, data, fingerprint = fingerprint, ingest = state)
+
+        return data
+
+
+    def write(self, filepath, data, fingerprint = None, ingest = None):
+        """
+        stores the parsed data of filepath (silently skipped if the data cannot be stored column wise)
+        fingerprint, ingest: fingerprint and ingestState of the file the data was parsed from (default: current file)
+        """
+        entryPath   = self.__entryPath(filepath)
+
+        try:
+            arrays, columns = self.__encode(data)
+        except TypeError as e:
+            Logger.warning(f"{filepath} not cached. {e}")
+            return
+
+        try:
+            os.makedirs(entryPath, exist_ok = True)
+
+            # meta is removed first and written last --> an interrupted write never looks valid
+            _metaFile = os.path.join(entryPath, "meta.json")
+            if os.path.exists(_metaFile):
+                os.remove(_metaFile)
+
+            _tmpFile = os.path.join(entryPath, "data.tmp.npz")
+            np.savez(_tmpFile, **arrays)
+            os.replace(_tmpFile, os.path.join(entryPath, "data.npz"))
+
+            meta = {"version": CACHE_VERSION, "source": os.path.abspath(filepath), \
+                    "fingerprint": fileFingerprint(filepath) if fingerprint is None else fingerprint, \
+                    "ingest": ingestState(filepath) if ingest is None else ingest, \
+                    "columns": columns}
+            self.__writeMeta(entryPath, meta)
+
+        except OSError as e:
+            Logger.warning(f"Cache entry for {filepath} could not be written. {e}")
+
+
+    def evict(self, maxAgeDays = None):
+        """
+        removes stale entries:
+            1. source file no longer available
+            2. entry not used in the last maxAgeDays (defaults to the cache's maxAgeDays)
+            3. entry written by a different cache version (or incomplete)
+        entries of changed source files are kept: read revalidates (content hash), extends (appended rows) or rebuilds them
+        """
+
+        maxAgeDays  = self.maxAgeDays if maxAgeDays is None else maxAgeDays
+        now         = time.time()
+
+        evicted = 0
+        for entry in os.listdir(self.cacheDir):
+            entryPath = os.path.join(self.cacheDir, entry)
+            if not os.path.isdir(entryPath):
+                continue
+
+            meta = self.__readMeta(entryPath)
+
+            stale = meta is None
+            if not stale:
+                stale = not os.path.exists(meta["source"])
+
+            if not stale and maxAgeDays is not None:
+                lastUsed = os.path.getmtime(os.path.join(entryPath, "meta.json"))
+                stale = (now - lastUsed) > maxAgeDays * 86400
+
+            if stale:
+                shutil.rmtree(entryPath, ignore_errors = True)
+                evicted += 1
+
+        if evicted > 0:
+            Logger.info(f"{evicted} stale cache entries evicted from {self.cacheDir}")
+
+        return evicted
+
+
+
+    def __entryPath(self, filepath):
+        filepath    = os.path.abspath(filepath)
+        _key        = hashlib.sha1(filepath.encode("utf-8")).hexdigest()[:12]
+        _name       = os.path.splitext(os.path.basename(filepath))[0]
+
+        return os.path.join(self.cacheDir, f"{_name}-{_key}")
+
+
+    def __readMeta(self, entryPath):
+        _metaFile = os.path.join(entryPath, "meta.json")
+        if not os.path.exists(_metaFile):
+            return None
+
+        try:
+            with open(_metaFile, "r") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if meta.get("version") != CACHE_VERSION:
+            return None
+
+        return meta
+
+
+    def __writeMeta(self, entryPath, meta):
+        _tmpFile = os.path.join(entryPath, "meta.tmp.json")
+        with open(_tmpFile, "w") as f:
+            json.dump(meta, f)
+        os.replace(_tmpFile, os.path.join(entryPath, "meta.json"))
+
+
+    def __load(self, entryPath, meta):
+
+        # mark the entry as used (drives age based eviction)
+        os.utime(os.path.join(entryPath, "meta.json"))
+
+        data = {}
+        with np.load(os.path.join(entryPath, "data.npz"), allow_pickle = False) as arrays:
+            for index, (column, kind) in enumerate(meta["columns"]):
+                values = arrays[f"c{index}"]
+
+                if kind == "M":
+                    values = values.view("datetime64[ns]")
+                elif kind == "O":
+                    values = values.astype(object)
+                    values[arrays[f"n{index}"]] = np.nan
+
+                data[column] = values
+
+        return pd.DataFrame(data, columns = [column for column, kind in meta["columns"]])
+
+
+    def __encode(self, data):
+        # one array per column. strings are stored as fixed width unicode with a null mask
+        arrays  = {}
+        columns = []
+
+        for index, column in enumerate(data.columns):
+            values = data[column].values
+
+            if np.issubdtype(values.dtype, np.datetime64):
+                kind = "M"
+                values = values.astype("datetime64[ns]").view(np.int64)
+
+            elif values.dtype == object:
+                kind = "O"
+                nulls = pd.isna(values)
+                if not all(isinstance(item, str) for item in values[~nulls]):
+                    raise TypeError(f"Column {column} has mixed types")
+
+                arrays[f"n{index}"] = nulls
+                values = np.where(nulls, "", values).astype(str)
+
+            else:
+                kind = values.dtype.kind
+
+            arrays[f"c{index}"] = values
+            columns.append((column, kind))
+
+        return arrays, columns
+
+
+
+_caches = {}
+_cachesLock = threading.Lock()
+
+def getCache(directory, maxAgeDays = MAX_AGE_DAYS):
+    """
+    returns the cache used for data files in directory (stored in <directory>/.qtcache)
+    stale entries are evicted when the cache is first opened in this process
+    returns None if the cache folder cannot be created
+    """
+
+    cacheDir = os.path.join(os.path.abspath(directory), CACHE_FOLDER)
+
+    with _cachesLock:
+        if cacheDir not in _caches:
+            try:
+                cache = DataCache(cacheDir = cacheDir, maxAgeDays = maxAgeDays)
+                cache.evict()
+            except OSError as e:
+                Logger.warning(f"Data cache not available for {directory}. {e}")
+                cache = None
+
+            _caches[cacheDir] = cache
+
+        return _caches[cacheDir]
@@ -0,0 +1,210 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from Utilities import loggingManager
+
+
+Logger = loggingManager.logger.getLogger("DataCatalog")
+
+
+MEMORY_BUDGET   = 1 << 30   # bytes of unreferenced series kept in memory (referenced series are never evicted)
+
+
+
+def fingerprint(source):
+    # (size, modification time) of a source file. None if not available
+    if source is None or not os.path.exists(source):
+        return None
+
+    stat = os.stat(source)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+
+class DataCatalog():
+    """
+    Process wide catalog of parsed data series, keyed by (path, asset, column)
+    Each series is parsed and held once, and handed out as a shared read only array to all loaders
+    (strategies, benchmarks) using it. Series are reference counted: unreferenced series are kept
+    (least recently used first out) as long as the catalog stays within its memory budget
+    """
+
+    def __init__(self, memoryBudget = MEMORY_BUDGET):
+
+        self.memoryBudget   = memoryBudget
+        self.nbytes         = 0
+
+        self.__series       = OrderedDict()     # (path, asset, column) --> read only array (least recently used first)
+        self.__refs         = {}                # (path, asset, column) --> reference count
+        self.__columns      = {}                # (path, asset) --> all columns of the source file
+        self.__states       = {}                # (path, asset) --> ingest state of the source file (DataCacheManager.ingestState)
+        self.__fingerprints = {}                # (path, asset) --> fingerprint of the source file when loaded
+        self.__held         = {}                # (path, asset) --> columns held in __series (file info dropped once empty)
+
+        self.__lock         = threading.RLock()
+        self.__fileLocks    = {}                # (path, asset) --> lock held while the file is loaded
+
+
+    def acquire(self, path, asset, columns, load, source = None):
+        """
+        references the columns of <path>/<asset> ("Date" always included). The file is loaded only if
+        any of the columns is not held yet, or the source file changed since they were loaded
+        columns: list of columns (None --> all columns of the file)
+        load: function () --> (DataFrame, ingest state)
+        source: source file of the series (checked for changes: size, modification time)
+        returns {column: read only array}. Columns not available in the file are not returned
+        """
+        path = os.path.abspath(path)
+
+        with self.__fileLock(path, asset):
+            _fingerprint = fingerprint(source)
+
+            series = self.__reference(path, asset, columns, _fingerprint)
+            if series is None:
+                data, state = load()
+
+                with self.__lock:
+                    # columns held for other loaders are reloaded as well (source file may have changed)
+                    _held = [column for column in self.__held.get((path, asset), []) if column != "Date"]
+                    self.__columns[(path, asset)] = list(data.columns)
+                    self.__store(path, asset, data, state, None if columns is None else list(columns) + _held, _fingerprint)
+                    series = self.__reference(path, asset, columns, _fingerprint)
+                    self.__evict()
+
+        return series
+
+
+    def release(self, path, asset, columns):
+        # drops one reference of each column (as returned by acquire)
+        path = os.path.abspath(path)
+
+        with self.__lock:
+            for column in columns:
+                key = (path, asset, column)
+                if self.__refs.get(key, 0) > 0:
+                    self.__refs[key] -= 1
+
+            self.__evict()
+
+
+    def replace(self, path, asset, data, state, fingerprint = None):
+        """
+        replaces the held columns of <path>/<asset> with data (Eg: after rows were appended to the file)
+        arrays handed out before stay valid (unchanged) for their holders
+        fingerprint: fingerprint of the source file (see fingerprint) taken before data was read
+        """
+        path = os.path.abspath(path)
+
+        with self.__lock:
+            _held = [column for column in self.__held.get((path, asset), []) if column != "Date"]
+            self.__store(path, asset, data, state, _held, fingerprint)
+            self.__evict()
+
+
+    def state(self, path, asset):
+        # ingest state of the source file when its held series were parsed
+        return self.__states.get((os.path.abspath(path), asset))
+
+
+    def evict(self, memoryBudget = None):
+        # evicts unreferenced series until the catalog is within memoryBudget (defaults to the catalog's budget)
+        with self.__lock:
+            return self.__evict(self.memoryBudget if memoryBudget is None else memoryBudget)
+
+
+
+    def __fileLock(self, path, asset):
+        with self.__lock:
+            return self.__fileLocks.setdefault((path, asset), threading.Lock())
+
+
+    def __reference(self, path, asset, columns, fingerprint = None):
+        # references the held columns. None if any of them is not held (or the source file changed)
+        with self.__lock:
+            _fileColumns = self.__columns.get((path, asset))
+            if _fileColumns is None:
+                return None
+
+            if fingerprint is not None and self.__fingerprints.get((path, asset)) != fingerprint:
+                return None
+
+            columns = _fileColumns if columns is None else ["Date"] + [column for column in columns if column != "Date"]
+            columns = [column for column in columns if column in _fileColumns]
+
+            keys = [(path, asset, column) for column in columns]
+            if any(key not in self.__series for key in keys):
+                return None
+
+            series = {}
+            for key in keys:
+                self.__series.move_to_end(key)
+                self.__refs[key] = self.__refs.get(key, 0) + 1
+                series[key[2]] = self.__series[key]
+
+            return series
+
+
+    def __store(self, path, asset, data, state, columns, fingerprint):
+        with self.__lock:
+            self.__states[(path, asset)] = state
+            self.__fingerprints[(path, asset)] = fingerprint
+
+            columns = data.columns if columns is None else ["Date"] + [column for column in columns if column in data.columns]
+            for column in columns:
+                key = (path, asset, column)
+                values = np.array(data[column].values)
+                values.flags.writeable = False
+
+                if key in self.__series:
+                    self.nbytes -= self.__series[key].nbytes
+                else:
+                    self.__held.setdefault((path, asset), []).append(column)
+                self.__series[key] = values
+                self.__series.move_to_end(key)
+                self.nbytes += values.nbytes
+
+
+    def __evict(self, memoryBudget = None):
+        memoryBudget = self.memoryBudget if memoryBudget is None else memoryBudget
+
+        evicted = 0
+        for key in list(self.__series.keys()):
+            if self.nbytes <= memoryBudget:
+                break
+            if self.__refs.get(key, 0) > 0:
+                continue
+
+            self.nbytes -= self.__series.pop(key).nbytes
+            self.__refs.pop(key, None)
+            evicted += 1
+
+            # file columns/ state kept only while any of its series is held
+            _held = self.__held[key[:2]]
+            _held.remove(key[2])
+            if len(_held) == 0:
+                self.__held.pop(key[:2])
+                self.__columns.pop(key[:2], None)
+                self.__states.pop(key[:2], None)
+                self.__fingerprints.pop(key[:2], None)
+
+        if self.nbytes > memoryBudget:
+            Logger.warning(f"Data catalog holds {self.nbytes} bytes of referenced series. Memory budget: {memoryBudget} bytes")
+
+        return evicted
+
+
+
+_catalog = None
+_catalogLock = threading.Lock()
+
+def getCatalog():
+    # process wide data catalog
+    global _catalog
+
+    with _catalogLock:
+        if _catalog is None:
+            _catalog = DataCatalog()
+
+        return _catalog
@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 
 import datetime
+import warnings
 from scipy.stats import norm
 
 
@@ -27,6 +28,11 @@ def DailyRetunstoAnnualized(dailyret):
 def AnnualReturnstoDaily(annualizedReturns):
     return (1 + annualizedReturns)**(1/ANNUALPERIOD) - 1
 
+def CumulativeReturnstoAnnualized(cumRet, periodDays):
+    # cumulative returns over periods of more than a year are annualized (years rounded to 2 decimals)
+    years = np.round(np.divide(periodDays, ACTUALDAYS_YEAR), 2)
+    return np.where(np.divide(periodDays, ACTUALDAYS_YEAR) > 1, (1 + cumRet)**(1/ np.where(years > 0, years, 1)) - 1, cumRet)[()]
+
 
 
 def Returns(data, cumulativePeriod = False, rollingWindow = None, priceCol = None):
@@ -46,12 +52,7 @@ def Returns(data, cumulativePeriod = False, rollingWindow = None, priceCol = Non
 
         periodDays  = getDaysInPeriod(from_date, to_date)
 
-        if periodDays/ACTUALDAYS_YEAR > 1:
-            years = np.round(periodDays/ ACTUALDAYS_YEAR, 2)
-            return (1 + cumRet)**(1/years) - 1
-
-        else:
-            return cumRet
+        return CumulativeReturnstoAnnualized(cumRet, periodDays)
 
 
     else:
@@ -81,6 +82,230 @@ def var_gaussian(ret, confidenceLevel = 0.95):
     return -z
     
 
+def _subtractBenchmark(values, benchmarkValues):
+    # values - benchmark values (row wise for many series)
+    if isinstance(values, pd.DataFrame):
+        return values.sub(benchmarkValues, axis = 0)
+    return values - benchmarkValues
+
+
+class RollingMetrics():
+    """
+    Rolling performance metrics of one return series or many (dates x series) for any number of windows
+    The intermediate arrays are built once: prefix sums of log growth (rolling compounded returns), downside returns
+    and active returns. Rolling (co)variances use pandas' online add/ remove kernels. Each metric is O(n) per window
+    Definitions are the same as the rolling mode of Ratios and Risk
+    """
+
+    METRICS = ["Annualized Return", "Volatility", "Downside Risk", "Sharpe Ratio", "Sortino Ratio", "Information Ratio", "Beta"]
+
+    def __init__(self, returns, benchmarkReturns = None, riskfreerate = 0.0):
+        """
+        returns: Series (one series) or DataFrame (dates x series) of daily returns without missing values
+        benchmarkReturns: Series of daily benchmark returns on the same index (required for Information Ratio and Beta)
+        riskfreerate: annual risk free rate
+        """
+
+        self.returns            = returns
+        self.benchmarkReturns   = benchmarkReturns
+        self.dailyRiskFreeRate  = AnnualReturnstoDaily(riskfreerate)
+
+        _values = np.asarray(returns, dtype = np.float64)
+
+        # log growth prefix sums (a window with a loss of 100% or more is compounded directly)
+        self.__growth       = _values + 1
+        self.__logGrowth    = np.concatenate((np.zeros((1,) + _values.shape[1:]), np.cumsum(np.log(np.where(self.__growth > 0, self.__growth, 1.0)), axis = 0)))
+        self.__nonPositive  = np.concatenate((np.zeros((1,) + _values.shape[1:]), np.cumsum(self.__growth <= 0, axis = 0)))
+
+        # downside returns vs the risk free rate
+        self.__downside     = np.minimum(returns - self.dailyRiskFreeRate, 0)
+
+        self.__benchmark    = None if benchmarkReturns is None else RollingMetrics(benchmarkReturns)
+
+
+    def __frame(self, values):
+        # values (dates x ...) in the shape of the returns
+        if isinstance(self.returns, pd.DataFrame):
+            return pd.DataFrame(values, index = self.returns.index, columns = self.returns.columns)
+        return pd.Series(values, index = self.returns.index)
+
+
+    def growth(self, window):
+        # compounded growth (1 + return) over each window
+        growth = np.full(self.__growth.shape, np.nan)
+        if window > len(growth):
+            return self.__frame(growth)
+
+        growth[window - 1:] = np.exp(self.__logGrowth[window:] - self.__logGrowth[:-window])
+
+        _direct = (self.__nonPositive[window:] - self.__nonPositive[:-window]) > 0
+        for index in zip(*np.nonzero(_direct)):
+            _end = index[0] + window
+            growth[(_end - 1,) + index[1:]] = np.prod(self.__growth[(slice(_end - window, _end),) + index[1:]], axis = 0)
+
+        return self.__frame(growth)
+
+
+    def annualizedGrowth(self, window):
+        return self.growth(window)**(ANNUALPERIOD/ window)
+
+
+    def annualizedReturn(self, window):
+        return self.annualizedGrowth(window) - 1
+
+
+    def volatility(self, window):
+        return self.returns.rolling(window).std() * np.sqrt(ANNUALPERIOD)
+
+
+    def downsideRisk(self, window):
+        # standard deviation of the returns below the risk free rate (0 above it)
+        return self.__downside.rolling(window).std(ddof = 0)
+
+
+    def sharpe(self, window):
+        return (self.annualizedReturn(window) - self.dailyRiskFreeRate)/ self.volatility(window)
+
+
+    def sortino(self, window):
+        sortino = (self.annualizedGrowth(window) - self.dailyRiskFreeRate)/ (self.downsideRisk(window) * np.sqrt(ANNUALPERIOD))
+        return sortino.replace([np.inf, -np.inf], np.nan)
+
+
+    def information(self, window):
+        _benchmark          = self.__requireBenchmark()
+        ann_outperformance  = _subtractBenchmark(self.annualizedGrowth(window), _benchmark.annualizedGrowth(window))
+        _active             = _subtractBenchmark(self.returns, self.benchmarkReturns)
+
+        return ann_outperformance/ (_active.rolling(window).std() * np.sqrt(ANNUALPERIOD))
+
+
+    def beta(self, window):
+        self.__requireBenchmark()
+        _bmVariance         = self.benchmarkReturns.rolling(window).var()
+
+        if isinstance(self.returns, pd.DataFrame):
+            jointCovar = self.returns.apply(lambda column: column.rolling(window).cov(self.benchmarkReturns))
+            return jointCovar.div(_bmVariance, axis = 0)
+
+        return self.returns.rolling(window).cov(self.benchmarkReturns)/ _bmVariance
+
+
+    def compute(self, windows, metrics = None):
+        """
+        all metrics for all windows
+        returns DataFrame with columns (metric, window) for a return series, (metric, window, series) for many series
+        """
+        metrics = [metric for metric in self.METRICS if self.benchmarkReturns is not None or metric not in ("Information Ratio", "Beta")] \
+                    if metrics is None else metrics
+
+        functions = {"Annualized Return": self.annualizedReturn, "Volatility": self.volatility, "Downside Risk": self.downsideRisk, \
+                     "Sharpe Ratio": self.sharpe, "Sortino Ratio": self.sortino, "Information Ratio": self.information, "Beta": self.beta}
+
+        results = {}
+        for metric in metrics:
+            for window in windows:
+                _values = functions[metric](window)
+                if isinstance(_values, pd.DataFrame):
+                    for column in _values.columns:
+                        results[(metric, window, column)] = _values[column]
+                else:
+                    results[(metric, window)] = _values
+
+        return pd.DataFrame(results)
+
+
+    def __requireBenchmark(self):
+        if self.__benchmark is None:
+            raise Exception("Benchmark Returns not provided")
+        return self.__benchmark
+
+
+
+class AlignedReturns():
+    """
+    Daily returns of a strategy and of its benchmark aligned on the strategy dates, built once per report
+    The benchmark return of a date is taken from the benchmark history (as merged on Date), dates where either
+    return is missing are left out (valid). Risk.Beta, Risk.Correlation, Risk.TrackingError and Ratios.Information
+    accept it in place of data/ benchmarkData: the covariance matrix, the active returns, the rolling metrics and
+    the annualized returns are then computed at most once
+    """
+
+    def __init__(self, data, benchmarkData, returnCol = None):
+        """
+        data, benchmarkData: histories with a Date column and the returnCol column (Eg: Strategy.portfolioHistory, benchmarkHistory)
+        """
+        if returnCol is None:
+            raise Exception("Returns Column not provided")
+
+        self.data           = data
+        self.benchmarkData  = benchmarkData
+        self.returnCol      = returnCol
+
+        # row of each strategy date in the benchmark history (-1 --> not available, picks the NaN appended)
+        _rows       = pd.Index(benchmarkData["Date"]).get_indexer(data["Date"])
+        _bmReturns  = np.append(benchmarkData[returnCol].values.astype(np.float64), np.nan)
+
+        self.returns            = data[returnCol].values.astype(np.float64)
+        self.benchmarkReturns   = _bmReturns[_rows]
+        self.valid              = ~np.isnan(self.returns) & ~np.isnan(self.benchmarkReturns)
+
+        # returns of the valid dates, indexed by their row in data (as the merged data after dropna)
+        _index                      = np.flatnonzero(self.valid)
+        self.validReturns           = pd.Series(self.returns[self.valid], index = _index)
+        self.validBenchmarkReturns  = pd.Series(self.benchmarkReturns[self.valid], index = _index)
+
+        self.__covariance   = None
+        self.__active       = None
+        self.__rolling      = None
+        self.__annualized   = {}
+
+
+    @property
+    def covariance(self):
+        # covariance matrix of the strategy and benchmark returns
+        if self.__covariance is None:
+            self.__covariance = np.cov(self.validReturns, self.validBenchmarkReturns)
+        return self.__covariance
+
+
+    @property
+    def activeReturns(self):
+        # strategy returns over the benchmark returns
+        if self.__active is None:
+            self.__active = self.validReturns - self.validBenchmarkReturns
+        return self.__active
+
+
+    @property
+    def rolling(self):
+        # RollingMetrics of the strategy returns against the benchmark returns
+        if self.__rolling is None:
+            self.__rolling = RollingMetrics(self.validReturns, benchmarkReturns = self.validBenchmarkReturns)
+        return self.__rolling
+
+
+    def annualizedReturns(self, priceCol):
+        # cumulative (annualized) returns of the strategy and the benchmark over their histories
+        if priceCol not in self.__annualized:
+            self.__annualized[priceCol] = (Returns(self.data, cumulativePeriod = True, rollingWindow = None, priceCol = priceCol), \
+                                           Returns(self.benchmarkData, cumulativePeriod = True, rollingWindow = None, priceCol = priceCol))
+        return self.__annualized[priceCol]
+
+
+
+def _alignedReturns(data, benchmarkData, returnCol):
+    # data as AlignedReturns (data may already be one)
+    if isinstance(data, AlignedReturns):
+        return data
+
+    if benchmarkData is None:
+        raise Exception("Benchmark Data not provided")
+
+    return AlignedReturns(data, benchmarkData, returnCol = returnCol)
+
+
+
 class Risk():
 
     def __init__(self):
@@ -171,54 +396,98 @@ class Risk():
 
 
     @staticmethod
-    def Beta(data, benchmarkData, rollingWindow = None, returnCol = None):
-        if returnCol is None:
-            raise Exception("Returns Column not provided")
+    def RollingMaxDrawdown(data, rollingWindow, priceCol = None):
+        """
+        maximum drawdown within each rolling window (peak taken within the window, as MaxDrawdown on the window)
+        data: Series of prices, or DataFrame of prices (dates x strategies. Eg: all equity curves of a sweep)
+        priceCol: price column of data (None --> data holds the prices)
+        returns the drawdowns (<= 0) in the shape of the prices. NaN for the first rollingWindow - 1 dates
 
-        columns_merge = ["Date"] + [returnCol]
+        O(n) for any window length: the dates are split into blocks of rollingWindow dates, so each window is the end
+        of one block followed by the start of the next. Running peaks/ troughs are accumulated once forward and once
+        backward through each block; a window's drawdown is the worst of the drawdown within its first part, within
+        its second part and from the peak of the first part to the trough of the second
+        """
+        prices  = data if priceCol is None else data[priceCol]
+        values  = np.asarray(prices, dtype = np.float64)
+        _is2D   = values.ndim == 2
+        values  = values if _is2D else values[:, None]
 
-        mergedData = data[columns_merge].merge(benchmarkData[columns_merge], on = "Date", how = "left")
-        mergedData.rename(columns = {f'{returnCol}_x': returnCol, f'{returnCol}_y': f'{returnCol}_BM'}, inplace = True)
-        mergedData.dropna(inplace = True)
+        window  = int(rollingWindow)
+        if window < 1:
+            raise Exception("rollingWindow should be atleast 1")
 
-        if rollingWindow is None:
-            covarMatrix = np.cov(mergedData[returnCol], mergedData[f'{returnCol}_BM'])
-            beta        = covarMatrix[0][1]/ covarMatrix[1][1]
+        nDates, nSeries = values.shape
+        drawdown = np.full((nDates, nSeries), np.nan)
 
-        else:
-            jointCovar = mergedData[returnCol].rolling(rollingWindow).cov(mergedData[f'{returnCol}_BM'])
+        if nDates >= window:
+            nBlocks = -(-nDates // window)
+            blocks  = np.full((nBlocks * window, nSeries), np.nan)
+            blocks[:nDates] = values
+            blocks  = blocks.reshape(nBlocks, window, nSeries)
 
-            # benchmark variance
-            bmVaR = mergedData[f'{returnCol}_BM'].rolling(rollingWindow).cov()
+            # forward through each block: running peak/ trough and worst drawdown since the block start
+            prefixMin   = np.minimum.accumulate(blocks, axis = 1)
+            prefixDD    = np.minimum.accumulate(blocks/ np.maximum.accumulate(blocks, axis = 1), axis = 1)
 
-            beta = np.divide(jointCovar, bmVaR)
+            # backward through each block: peak/ trough and worst drawdown until the block end
+            _reversed   = blocks[:, ::-1]
+            suffixMax   = np.maximum.accumulate(_reversed, axis = 1)[:, ::-1]
+            suffixMin   = np.minimum.accumulate(_reversed, axis = 1)[:, ::-1]
+            suffixDD    = np.minimum.accumulate((suffixMin/ blocks)[:, ::-1], axis = 1)[:, ::-1]
 
-        return beta
+            prefixMin, prefixDD, suffixMax, suffixDD = [item.reshape(nBlocks * window, nSeries) for item in (prefixMin, prefixDD, suffixMax, suffixDD)]
+
+            end     = np.arange(window - 1, nDates)
+            start   = end - window + 1
+
+            # windows starting on a block start are a whole block
+            _crossing = np.minimum(prefixDD[end], prefixMin[end]/ suffixMax[start])
+            _crossing[start % window == 0] = np.inf
 
+            drawdown[window - 1:] = np.minimum(suffixDD[start], _crossing) - 1.0
 
+        if isinstance(prices, pd.DataFrame):
+            return pd.DataFrame(drawdown, index = prices.index, columns = prices.columns)
+        if isinstance(prices, pd.Series):
+            return pd.Series(drawdown[:, 0], index = prices.index)
+
+        return drawdown if _is2D else drawdown[:, 0]
 
 
     @staticmethod
-    def Correlation(data, benchmarkData, rollingWindow = None, returnCol = None):
-        if returnCol is None:
-            raise Exception("Returns Column not provided")
+    def Beta(data, benchmarkData = None, rollingWindow = None, returnCol = None):
+        # data: history (with benchmarkData) or AlignedReturns
+        aligned = _alignedReturns(data, benchmarkData, returnCol)
 
-        columns_merge = ["Date"] + [returnCol]
+        if rollingWindow is None:
+            covarMatrix = aligned.covariance
+            beta        = covarMatrix[0][1]/ covarMatrix[1][1]
 
-        mergedData = data[columns_merge].merge(benchmarkData[columns_merge], on = "Date", how = "left")
-        mergedData.rename(columns = {f'{returnCol}_x': returnCol, f'{returnCol}_y': f'{returnCol}_BM'}, inplace = True)
-        mergedData.dropna(inplace = True)
+        else:
+            # rolling covariance with the benchmark over rolling benchmark variance
+            beta = aligned.rolling.beta(rollingWindow)
+
+        return beta
+
+
+
+
+    @staticmethod
+    def Correlation(data, benchmarkData = None, rollingWindow = None, returnCol = None):
+        # data: history (with benchmarkData) or AlignedReturns
+        aligned = _alignedReturns(data, benchmarkData, returnCol)
 
         if rollingWindow is None:
-            covarMatrix = np.cov(mergedData[returnCol], mergedData[f'{returnCol}_BM'])
+            covarMatrix = aligned.covariance
             corr        = covarMatrix[0][1]/ (np.sqrt(covarMatrix[1][1]) * np.sqrt(covarMatrix[0][0]))
 
         else:
-            jointCovar = mergedData[returnCol].rolling(rollingWindow).cov(mergedData[f'{returnCol}_BM'])
+            jointCovar = aligned.validReturns.rolling(rollingWindow).cov(aligned.validBenchmarkReturns)
 
             # portoflio & benchmark volatility
-            portVol = mergedData[f'{returnCol}'].rolling(rollingWindow).std()
-            bmVol   = mergedData[f'{returnCol}_BM'].rolling(rollingWindow).std()
+            portVol = aligned.validReturns.rolling(rollingWindow).std()
+            bmVol   = aligned.validBenchmarkReturns.rolling(rollingWindow).std()
 
             _denominator = np.multiply(portVol, bmVol)
             corr = np.divide(jointCovar, _denominator)
@@ -228,18 +497,11 @@ class Risk():
 
 
     @staticmethod
-    def TrackingError(data, benchmarkData,  returnCol = None):
-        if returnCol is None:
-            raise Exception("Returns Column not provided")
-
-        columns_merge = ["Date"] + [returnCol]
+    def TrackingError(data, benchmarkData = None,  returnCol = None):
+        # data: history (with benchmarkData) or AlignedReturns
+        aligned = _alignedReturns(data, benchmarkData, returnCol)
 
-        mergedData = data[columns_merge].merge(benchmarkData[columns_merge], on = "Date", how = "left")
-        mergedData.rename(columns = {f'{returnCol}_x': returnCol, f'{returnCol}_y': f'{returnCol}_BM'}, inplace = True)
-        mergedData.dropna(inplace = True)
-
-        diff            = mergedData[f'{returnCol}'] - mergedData[f'{returnCol}_BM']
-        trackingerror   = np.std(diff) * np.sqrt(ANNUALPERIOD)
+        trackingerror   = np.std(aligned.activeReturns) * np.sqrt(ANNUALPERIOD)
 
 
         return trackingerror
@@ -275,48 +537,29 @@ class Ratios():
 
         else:
 
-            rollingData         = data[returnCol].dropna().rolling(rollingWindow)
-            annualizedReturn    = rollingData.apply(lambda x: np.prod(x + 1)**(ANNUALPERIOD/rollingWindow) - 1)
-            excessReturn        = annualizedReturn - dailyRiskFreeRatee
-
-            annualized_vol      = rollingData.std() * np.sqrt(ANNUALPERIOD)
-            sharpe              = excessReturn/ annualized_vol
+            sharpe              = RollingMetrics(data[returnCol].dropna(), riskfreerate = riskfreerate).sharpe(rollingWindow)
 
         return sharpe
 
 
     @staticmethod
-    def Information(data, benchmarkData, rollingWindow = None, priceCol = None, returnCol = None):
-
-
-        if returnCol is None:
-            raise Exception("Returns Column not provided")
-
-        columns_merge = ["Date"] + [returnCol]
-
-        mergedData = data[columns_merge].merge(benchmarkData[columns_merge], on = "Date", how = "left")
-        mergedData.rename(columns = {f'{returnCol}_x': returnCol, f'{returnCol}_y': f'{returnCol}_BM'}, inplace = True)
-        mergedData.dropna(inplace = True)
+    def Information(data, benchmarkData = None, rollingWindow = None, priceCol = None, returnCol = None):
+        # data: history (with benchmarkData) or AlignedReturns
+        aligned = _alignedReturns(data, benchmarkData, returnCol)
 
         if rollingWindow is None:
             if priceCol is None:
                 raise Exception("Price Column not provided")
 
-            annualizedRet       = Returns(data, cumulativePeriod=True, rollingWindow=None, priceCol=priceCol)
-            annualizedRet_BM    = Returns(benchmarkData, cumulativePeriod=True, rollingWindow=None, priceCol=priceCol)
+            annualizedRet, annualizedRet_BM = aligned.annualizedReturns(priceCol)
 
-            diff                = mergedData[returnCol] - mergedData[f'{returnCol}_BM']
+            diff                = aligned.activeReturns
             ann_outperformance  = annualizedRet - annualizedRet_BM
             ratio               = ann_outperformance/ (diff.std() * np.sqrt(ANNUALPERIOD))
 
 
         else:
-            dataRet             = mergedData[returnCol].rolling(rollingWindow)
-            dataRetBM           = mergedData[f'{returnCol}_BM'].rolling(rollingWindow)
-            ann_outperformance  = dataRet.apply(lambda x: np.prod(1+x)**(ANNUALPERIOD/rollingWindow)) - dataRetBM.apply(lambda x: np.prod(1+x)**(ANNUALPERIOD/rollingWindow))
-
-            diff                = (mergedData[returnCol] - mergedData[f'{returnCol}_BM']).rolling(rollingWindow)
-            ratio               = ann_outperformance/ (diff.std() * np.sqrt(ANNUALPERIOD))
+            ratio               = aligned.rolling.information(rollingWindow)
 
 
         return ratio
@@ -347,12 +590,7 @@ class Ratios():
                 sortino = np.nan
 
         else:
-            retData             = data[returnCol].dropna().rolling(rollingWindow)
-            downsideRisk        = retData.apply(lambda x: fnDownsideRisk(x - dailyRiskFreeRatee))
-            annualized_return   = retData.apply(lambda x: np.prod(1+x)**(ANNUALPERIOD/rollingWindow))
-
-            sortino             = (annualized_return - dailyRiskFreeRatee)/ (downsideRisk* np.sqrt(ANNUALPERIOD))
-            sortino.replace([np.inf, -np.inf], np.nan, inplace = True)
+            sortino             = RollingMetrics(data[returnCol].dropna(), riskfreerate = riskfreerate).sortino(rollingWindow)
 
 
         return sortino
@@ -379,11 +617,10 @@ class Ratios():
             calmar              = (annualized_return - dailyRiskFreeRatee)/ np.absolute(maxDD)
 
         else:
-            retData             = data[returnCol].dropna().rolling(rollingWindow)
-            annualized_return   = retData.apply(lambda x: np.prod(1+x)**(ANNUALPERIOD/rollingWindow))
+            annualized_return   = RollingMetrics(data[returnCol].dropna()).annualizedGrowth(rollingWindow)
 
-            cumRets             = ((excessReturn + 1).cumprod()).rolling(rollingWindow)
-            maxDD               = cumRets.apply(lambda x: np.absolute(min((x/ x.cummax() - 1.0).cummin()) ))
+            cumRets             = (excessReturn + 1).cumprod()
+            maxDD               = np.absolute(Risk.RollingMaxDrawdown(data = cumRets, rollingWindow = rollingWindow))
 
             calmar              = (annualized_return - dailyRiskFreeRatee)/ maxDD
 
@@ -392,182 +629,196 @@ class Ratios():
 
             
 
-def computeAnnualPerformance(strategydata, riskfreerate = 0.0, priceCol = None, returnsCol = None,  **portfolio):
-
-    data = strategydata
-
-    if "Date" not in data.columns:
-        data = data.reset_index(drop = False)
-        data = data.rename(columns = {"index": "Date"})
-
-
-    data["Year"] = pd.to_datetime(data["Date"]).dt.year
-
-    allPortfolios = portfolio
-    allPortfolios["strategy"] = data
-
-    unique_year = data.Year.unique()
-
-    performance = {"Returns (%)": {}, \
-                   "Volatility (%)": {}, \
-                   "Sharpe": {}}
-
-    
-    for port, portData in allPortfolios.items():
-
-        tempData = portData.copy()
-        tempData["Year"] = pd.to_datetime(tempData["Date"]).dt.year
-
-        performance["Returns (%)"][port] = {}
-        performance["Volatility (%)"][port] = {}
-        performance["Sharpe"][port] = {}
-
-        for year in unique_year:
-
-            temp        = tempData[tempData.Year == year]
-            prevYear    = tempData[tempData.Year == year - 1].tail(1)
-            temp        = pd.concat([prevYear, temp])
-
-            # compute stats
-            temp["Returns"] = Returns(data = temp, cumulativePeriod=False, rollingWindow=None, priceCol=priceCol)
+CUMULATIVE_METRICS = ["Returns", "Volatility", "Max Drawdown", "Sharpe Ratio", "Sortino Ratio", "Beta", "Tracking Error", "Information Ratio"]
+
+
+def batch_metrics(values_matrix, dates, benchmark = None, riskfreerate = 0.0, distribution = "HIST", confidenceLevel = 0.95):
+    """
+    cumulative performance metrics of many equity curves at once (Eg: all runs of a parameter sweep)
+    values_matrix: (dates x curves) values without missing values (DataFrame --> its columns name the curves)
+    dates: dates of the rows (in order)
+    benchmark: Series of benchmark prices indexed by date (on its own dates, as merged on Date by Risk/ Ratios),
+               or array of prices aligned with dates. None --> no Beta, Tracking Error and Information Ratio
+    returns DataFrame (metrics x curves), same definitions as the cumulative mode of Returns, Risk and Ratios
+    The daily returns, their moments, drawdowns and active returns are computed once for all metrics and curves
+    """
+
+    values  = np.asarray(values_matrix, dtype = np.float64)
+    values  = values if values.ndim == 2 else values[:, None]
+    curves  = list(values_matrix.columns) if isinstance(values_matrix, pd.DataFrame) else list(range(values.shape[1]))
+    dates   = pd.to_datetime(pd.Index(dates))
+
+    if len(dates) != len(values):
+        raise Exception("values_matrix and dates should have the same length")
+    if len(values) < 2:
+        raise Exception("Atleast 2 dates required")
+
+    dailyRiskFreeRate = AnnualReturnstoDaily(riskfreerate)
+    sqrtPeriod = np.sqrt(ANNUALPERIOD)
+    metrics = {}
+
+    # shared intermediates: daily returns (first date has none), their deviation and downside vs the risk free rate
+    returns     = values[1:]/ values[:-1] - 1
+    annualized  = CumulativeReturnstoAnnualized(values[-1]/ values[0] - 1, (dates[-1] - dates[0]).days)
+    excess      = annualized - dailyRiskFreeRate
+
+    volatility  = returns.std(axis = 0, ddof = 1) * sqrtPeriod
+    downside    = np.minimum(returns - dailyRiskFreeRate, 0).std(axis = 0) * sqrtPeriod
+    maxDD       = (values/ np.maximum.accumulate(values, axis = 0)).min(axis = 0) - 1.0
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        metrics["Returns"]          = annualized
+        metrics["Volatility"]       = volatility
+        metrics["Max Drawdown"]     = maxDD
+        metrics["Sharpe Ratio"]     = np.where(volatility > 0, excess/ volatility, np.nan)
+        sortino                     = np.where(downside > 0, excess/ downside, np.nan)
+        metrics["Sortino Ratio"]    = np.where(np.isinf(sortino), np.nan, sortino)
+
+        if benchmark is not None:
+            # benchmark returns on its own dates, taken on the dates of the curves where available
+            if isinstance(benchmark, pd.Series):
+                _bmPrices   = benchmark.sort_index()
+                _bmDates    = pd.to_datetime(pd.Index(_bmPrices.index))
+                _bmValues   = _bmPrices.values.astype(np.float64)
+                bmReturns   = pd.Series(np.r_[np.nan, _bmValues[1:]/ _bmValues[:-1] - 1], index = _bmDates).reindex(dates[1:]).values
+            else:
+                _bmDates    = dates
+                _bmValues   = np.asarray(benchmark, dtype = np.float64)
+                bmReturns   = _bmValues[1:]/ _bmValues[:-1] - 1
 
-            periodReturns   = Returns(data = temp, cumulativePeriod=True, rollingWindow=None, priceCol=priceCol)
-            sharpe          = Ratios.Sharpe(data = temp, riskfreerate=riskfreerate, rollingWindow=None, priceCol=priceCol, returnCol=returnsCol)
-            vol             = Risk.Volatility(data = temp, rollingWindow=None, returnCol= returnsCol)
+            valid       = ~np.isnan(bmReturns)
+            _returns    = returns[valid]
+            _bmReturns  = bmReturns[valid]
 
-            performance["Returns (%)"][port][year]      = periodReturns
-            performance["Volatility (%)"][port][year]   = vol
-            performance["Sharpe"][port][year]           = sharpe
+            _deviation  = _returns - _returns.mean(axis = 0)
+            _bmDeviation = _bmReturns - _bmReturns.mean()
+            metrics["Beta"] = (_deviation.T @ _bmDeviation)/ (_bmDeviation @ _bmDeviation)
 
-        
-    combinedPerformance = {}
+            active      = _returns - _bmReturns[:, None]
+            bmAnnualized = CumulativeReturnstoAnnualized(_bmValues[-1]/ _bmValues[0] - 1, (_bmDates[-1] - _bmDates[0]).days)
 
-    for outer, innerDict in performance.items():
+            activeVol   = active.std(axis = 0, ddof = 1) * sqrtPeriod
 
-        for inner, values in innerDict.items():
-            combinedPerformance[(outer, inner)] = values
+            metrics["Tracking Error"]       = active.std(axis = 0) * sqrtPeriod
+            metrics["Information Ratio"]    = np.where(activeVol > 0, (annualized - bmAnnualized)/ activeVol, np.nan)
 
-    # multiindex dataframe
-    df_performance = pd.DataFrame(combinedPerformance)
+        metrics["Calmar Ratio"]     = excess/ np.absolute(maxDD)
 
-    return df_performance
+        # value at risk (loss not exceeded at confidenceLevel) and expected loss beyond it
+        if distribution == "HIST":
+            var = -np.percentile(returns, (1 - confidenceLevel) * 100, axis = 0)
+        elif distribution == "NORM":
+            var = -norm.ppf(1 - confidenceLevel, returns.mean(axis = 0), returns.std(axis = 0))
+        else:
+            raise Exception(f"Distribution {distribution} not supported")
 
+        _beyond = returns <= -var
+        metrics[f"{confidenceLevel:.0%} VaR"]   = var
+        metrics[f"{confidenceLevel:.0%} CVaR"]  = -(returns * _beyond).sum(axis = 0)/ _beyond.sum(axis = 0)
 
+    return pd.DataFrame(metrics, index = curves).T
 
-def computeMonthlyPerformance(strategydata, riskfreerate = 0.0, priceCol = None, returnCol = None, **portfolio):
 
-    data = strategydata
 
-    if "Date" not in data.columns:
-        data = data.reset_index(drop = False)
-        data = data.rename(columns = {"index": "Date"})
+def _periodPerformance(strategydata, riskfreerate, priceCol, monthly, portfolio):
+    """
+    returns, volatility and sharpe of each year/ month for the strategy and each portfolio, in one pass per portfolio
+    the returns of a period start from the last price of the previous period (if the data has it)
+    periods are numbered with integer codes: year, or year * 12 + month - 1 (--> the previous period is code - 1)
+    """
 
+    allPortfolios = {**portfolio, "strategy": strategydata}
+    dailyRiskFreeRate = AnnualReturnstoDaily(riskfreerate)
 
-    data["Year"] = pd.to_datetime(data["Date"]).dt.year
-    data["Month"] = pd.to_datetime(data["Date"]).dt.month
+    def _prepare(data):
+        if "Date" not in data.columns:
+            data = data.reset_index(drop = False)
+            data = data.rename(columns = {"index": "Date"})
 
-    data["Month-Year"] = data.apply(lambda row: str(row["Year"]) + "-" + str(row["Month"]), axis = 1)
+        data    = data.sort_values(by = "Date", kind = "stable")
+        dates   = pd.to_datetime(data["Date"])
+        codes   = dates.dt.year.values * 12 + dates.dt.month.values - 1 if monthly else dates.dt.year.values
 
-    allPortfolios = portfolio
-    allPortfolios["strategy"] = data
+        return dates.values.astype("datetime64[D]"), data[priceCol].values.astype(np.float64), codes
 
-    unique_month = data["Month-Year"].unique()
+    def _label(code):
+        return f"{code // 12}-{code % 12 + 1}" if monthly else code
 
+    # periods (in order) as per the strategy data
+    _, _, strategyCodes = _prepare(strategydata)
+    periods = pd.unique(strategyCodes)
 
-    performance = {"Returns (%)": {}, \
-                   "Volatility (%)": {}, \
-                   "Sharpe": {}}
+    performance = {"Returns (%)": {}, "Volatility (%)": {}, "Sharpe": {}}
 
-    
     for port, portData in allPortfolios.items():
+        dates, prices, codes = _prepare(portData)
+        if len(codes) == 0:
+            for metric in performance:
+                performance[metric][port] = np.full(len(periods), np.nan)
+            continue
 
-        tempData = portData.copy()
-        tempData["Year"] = pd.to_datetime(tempData["Date"]).dt.year
-        tempData["Month"] = pd.to_datetime(tempData["Date"]).dt.month
+        _first  = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        _last   = np.r_[_first[1:], len(codes)] - 1
 
-        tempData["Month-Year"] = tempData.apply(lambda row: str(row["Year"]) + "-" + str(row["Month"]), axis = 1)
+        # anchor of each period: last price of the previous period (shifted last value), if that period is in the data
+        _anchored   = np.r_[False, codes[_first[1:] - 1] == codes[_first[1:]] - 1]
+        _base       = np.where(_anchored, _first - 1, _first)
 
+        cumRet      = prices[_last]/ prices[_base] - 1
+        periodDays  = (dates[_last] - dates[_base]).astype(np.int64)
 
-        performance["Returns (%)"][port] = {}
-        performance["Volatility (%)"][port] = {}
-        performance["Sharpe"][port] = {}
-
-        for period in unique_month:
-
-            temp        = tempData[tempData["Month-Year"] == period]
-
-            # get previous month
-            current_month   = int(period.split("-")[1])
-            current_year    = int(period.split("-")[0])
-
-            if current_month == 1:
-                previous_month  = 12
-                previous_year   = current_year - 1
-                previous        = str(previous_year) + "-" + str(previous_month)
-            else:
-                previous_month  = current_month - 1
-                previous_year   = current_year
-                previous        = str(previous_year) + "-" + str(previous_month)
+        # returns over more than a year are annualized (as Returns)
+        periodRet   = CumulativeReturnstoAnnualized(cumRet, periodDays)
 
+        # daily returns within each period (first day against the anchor)
+        dailyRet    = np.r_[np.nan, prices[1:]/ prices[:-1] - 1]
+        _periodStart = np.zeros(len(codes), dtype = bool)
+        _periodStart[_first[~_anchored]] = True
+        dailyRet[_periodStart] = np.nan
 
-            prevYear    = tempData[tempData.Year == previous].tail(1)
-            temp        = pd.concat([prevYear, temp])
+        vol     = pd.Series(dailyRet).groupby(codes).std().reindex(codes[_first]).values * np.sqrt(ANNUALPERIOD)
+        with np.errstate(invalid = "ignore"):
+            sharpe  = np.where(vol > 0, (periodRet - dailyRiskFreeRate)/ np.where(vol > 0, vol, 1), np.nan)
 
-            # compute stats
-            temp["Returns"] = Returns(data = temp, cumulativePeriod=False, rollingWindow=None, priceCol=priceCol)
+        _byCode = {"Returns (%)": pd.Series(periodRet, index = codes[_first]), \
+                   "Volatility (%)": pd.Series(vol, index = codes[_first]), \
+                   "Sharpe": pd.Series(sharpe, index = codes[_first])}
 
-            periodReturns   = Returns(data = temp, cumulativePeriod=True, rollingWindow=None, priceCol=priceCol)
-            sharpe          = Ratios.Sharpe(data = temp, riskfreerate=riskfreerate, rollingWindow=None, priceCol=priceCol, returnCol=returnCol)
-            vol             = Risk.Volatility(data = temp, rollingWindow=None, returnCol= returnCol)
+        for metric, values in _byCode.items():
+            performance[metric][port] = values.reindex(periods).values
 
-            performance["Returns (%)"][port][period]      = periodReturns
-            performance["Volatility (%)"][port][period]   = vol
-            performance["Sharpe"][port][period]           = sharpe
 
-        
     combinedPerformance = {}
-
     for outer, innerDict in performance.items():
-
         for inner, values in innerDict.items():
             combinedPerformance[(outer, inner)] = values
 
     # multiindex dataframe
-    df_performance = pd.DataFrame(combinedPerformance)
+    df_performance = pd.DataFrame(combinedPerformance, index = [_label(code) for code in periods])
 
     return df_performance
 
 
 
+def _deprecatedReturnsColumn(name, value):
+    if value is not None:
+        warnings.warn(f"{name} is deprecated and ignored: daily returns are derived from priceCol", DeprecationWarning, stacklevel = 3)
 
 
+def computeAnnualPerformance(strategydata, riskfreerate = 0.0, priceCol = None, returnsCol = None,  **portfolio):
+    # performance of each year (strategy and each of the portfolios). returnsCol: deprecated, daily returns are derived from priceCol
+    if priceCol is None:
+        raise Exception("Price Column not provided")
+    _deprecatedReturnsColumn("returnsCol", returnsCol)
 
+    return _periodPerformance(strategydata, riskfreerate = riskfreerate, priceCol = priceCol, monthly = False, portfolio = portfolio)
 
 
 
+def computeMonthlyPerformance(strategydata, riskfreerate = 0.0, priceCol = None, returnCol = None, **portfolio):
+    # performance of each month ("YYYY-M", strategy and each of the portfolios). returnCol: deprecated, daily returns are derived from priceCol
+    if priceCol is None:
+        raise Exception("Price Column not provided")
+    _deprecatedReturnsColumn("returnCol", returnCol)
 
-
-
-
-
-
-
-
-
-
-
-        
-
-
-
-
-
-
-            
-
-
-
-
-
-
-
+    return _periodPerformance(strategydata, riskfreerate = riskfreerate, priceCol = priceCol, monthly = True, portfolio = portfolio)
@@ -0,0 +1,103 @@
+import numpy as np
+
+import SignalManager
+
+
+
+class PolicyProgram():
+    """
+    ENTRY/ EXIT policies compiled into index based boolean kernels (built once per policy)
+
+    A policy is an AND over clauses (outer conditions of all condition types), each clause an OR over signals.
+    The signals used by any policy are numbered once (signals); the policies are held as two 0/1 matrices:
+        clauses     --> (clauses x signals): signals OR'ed in each clause
+        policies    --> (policies x clauses): clauses AND'ed in each policy
+    Given the signal checks of all assets as a (signals x assets) boolean matrix, all policies of all assets
+    are evaluated with two matrix products (no Python loop over assets, policies or conditions)
+    A clause without any signal is False, a policy without any clause is True (as Policy.checkPerAssetEntryExitPolicy)
+    """
+
+    def __init__(self, allPolicies, listAssets):
+        """
+        allPolicies: {policyName: {typeCondition: [[(signalName, objSignal), ..], ..]}} (see Policy.registerEntryExitPolicies)
+        listAssets: assets in the order of the asset axis
+        """
+
+        self.listAssets     = list(listAssets)
+        self.assetIndex     = {asset: index for index, asset in enumerate(self.listAssets)}     # asset --> row on the asset axis
+        self.policyNames    = list(allPolicies.keys())
+
+        self.signals        = []        # signal objects used by the policies (ordered by first use)
+        _signalIndex        = {}        # id(signal object) --> index in signals
+
+        _clauses = []
+        _policyClauses = []
+        for policyName, conditions in allPolicies.items():
+
+            _thisPolicy = []
+            for typeCondition, outerConditions in conditions.items():
+                for innerConditions in outerConditions:
+
+                    _clause = []
+                    for signalName, objSignal in innerConditions:
+                        if id(objSignal) not in _signalIndex:
+                            _signalIndex[id(objSignal)] = len(self.signals)
+                            self.signals.append(objSignal)
+                        _clause.append(_signalIndex[id(objSignal)])
+
+                    _thisPolicy.append(len(_clauses))
+                    _clauses.append(_clause)
+
+            _policyClauses.append(_thisPolicy)
+
+        self.clauses = np.zeros((len(_clauses), len(self.signals)), dtype = np.int64)
+        for index, _clause in enumerate(_clauses):
+            self.clauses[index, _clause] = 1
+
+        self.policies = np.zeros((len(self.policyNames), len(_clauses)), dtype = np.int64)
+        for index, _thisPolicy in enumerate(_policyClauses):
+            self.policies[index, _thisPolicy] = 1
+
+        # assets each signal applies to (market signals only apply to their assetstoConsider)
+        self.assetMask = np.ones((len(self.signals), len(self.listAssets)), dtype = bool)
+        for index, objSignal in enumerate(self.signals):
+            if isinstance(objSignal, SignalManager.MarketSignal):
+                self.assetMask[index] = [asset in objSignal.assetstoConsider for asset in self.listAssets]
+
+        # kind of each signal: asset --> one check per asset, portfolio/ market --> one check for all assets
+        self.assetSignals       = [index for index, objSignal in enumerate(self.signals) if isinstance(objSignal, SignalManager.AssetSignal)]
+        self.portfolioSignals   = [index for index, objSignal in enumerate(self.signals) if isinstance(objSignal, SignalManager.PortfolioSignal)]
+        self.marketSignals      = [index for index, objSignal in enumerate(self.signals) if isinstance(objSignal, SignalManager.MarketSignal)]
+
+
+    def signalMatrix(self, assetSignalCheck, portSignalCheck, marketSignalCheck):
+        """
+        signal checks of all assets as a (signals x assets) boolean matrix
+        assetSignalCheck: {asset: {signalName: bool}}, portSignalCheck/ marketSignalCheck: {signalName: bool}
+        """
+        checks = np.zeros((len(self.signals), len(self.listAssets)), dtype = bool)
+
+        for index in self.assetSignals:
+            _name = self.signals[index].name
+            checks[index] = [assetSignalCheck[asset][_name] for asset in self.listAssets]
+
+        for index in self.portfolioSignals:
+            checks[index] = portSignalCheck[self.signals[index].name]
+
+        for index in self.marketSignals:
+            checks[index] = marketSignalCheck[self.signals[index].name]
+
+        return checks & self.assetMask
+
+
+    def evaluate(self, signalMatrix):
+        """
+        signalMatrix: (..., signals x assets) boolean signal checks (Eg: one matrix per day stacked along the first axis)
+        returns (..., policies x assets) boolean matrix: whether each policy holds for each asset
+        """
+        _signals        = np.asarray(signalMatrix, dtype = np.int64)
+
+        _clauseHolds    = (self.clauses @ _signals) > 0
+        _failedClauses  = self.policies @ (~_clauseHolds).astype(np.int64)
+
+        return _failedClauses == 0
@@ -21,6 +21,10 @@ class YieldCurveRegimePolicy(Policy):
 
         super().__init__(name = name, configFile=configFile)
 
+        # policies generating an exit/ entry action (rows of the policy matrix)
+        self.__isExit   = np.array(["EXIT" in policy for policy in self.Program.policyNames], dtype = bool)
+        self.__isEntry  = np.array(["ENTRY" in policy for policy in self.Program.policyNames], dtype = bool)
+
 
     def checkAssetLevelSignals(self, assetList,  currentAssetLevelInfo):
         # currentAssetLevelInfo = self.__convertFeaturesDict(providedFeaturesSet=currentAssetLevelInfo, assetLevel=True)
@@ -30,21 +34,21 @@ class YieldCurveRegimePolicy(Policy):
         # currentPortfolioInfo = self.__convertFeaturesDict(providedFeaturesSet=currentPortfolioInfo, assetLevel=False)
         return super().checkPortfolioLevelSignals(currentPortfolioInfo)
 
-    def checkMarketLevelSignals(self, currentMarketInfo):
+    def checkMarketLevelSignals(self, currentMarketInfo, date = None):
         # currentMarketInfo = self.__convertFeaturesDict(providedFeaturesSet=currentMarketInfo, assetLevel=False)
-        return super().checkMarketLevelSignals(currentMarketInfo)
+        return super().checkMarketLevelSignals(currentMarketInfo, date = date)
 
 
     def checkPerAssetEntryExitPolicy(self, assetName, policyName):
         return super().checkPerAssetEntryExitPolicy(assetName, policyName)
 
 
-    def checkEntryExitPolicy(self, currentAssetLevelInfo, currentPortfolioInfo, currentMarketInfo):
+    def checkEntryExitPolicy(self, currentAssetLevelInfo, currentPortfolioInfo, currentMarketInfo, date = None):
         listAssets = self.listAllAssets
-        return super().checkEntryExitPolicy(listAssets, currentAssetLevelInfo, currentPortfolioInfo, currentMarketInfo)
+        return super().checkEntryExitPolicy(listAssets, currentAssetLevelInfo, currentPortfolioInfo, currentMarketInfo, date = date)
 
 
-    def getAction(self, assetLevelState, portfolioLevelState, marketLevelState):
+    def getAction(self, assetLevelState, portfolioLevelState, marketLevelState, date = None):
         """
         based on current portfolio, and varying conditions --> perform action
 
@@ -65,6 +69,7 @@ class YieldCurveRegimePolicy(Policy):
                         "regime_next2M": "RiskOn", 
                         "probRiskOn_nextMonth": "0.4", 
                 }
+            date: date of marketLevelState (precomputed market signal checks are used if available)
 
         Output: 
             list of holdings to be bought/ sold for each asset
@@ -97,26 +102,24 @@ class YieldCurveRegimePolicy(Policy):
 
 
         # based on signals, validate any of the entry or exit policy is holding true
-        policyCheck = self.checkEntryExitPolicy(currentAssetLevelInfo=assetLevelState, 
-                                                currentPortfolioInfo=portfolioLevelState, 
-                                                currentMarketInfo=marketLevelState)
+        self.checkEntryExitPolicy(currentAssetLevelInfo=assetLevelState, 
+                                  currentPortfolioInfo=portfolioLevelState, 
+                                  currentMarketInfo=marketLevelState, 
+                                  date=date)
+        policyMatrix = self.policyMatrix
 
-                                                
 
+        # combine the entry and exit criterias to get the final action (entry wins over exit)
+        _exit       = (policyMatrix & self.__isExit[:, None]).any(axis = 0)
+        _entry      = (policyMatrix & self.__isEntry[:, None]).any(axis = 0)
+        _action     = np.where(_entry, 1, np.where(_exit, -1, 0)).tolist()
 
-        # combine the entry and exit criterias to get the final action
-        action      = {asset: 0 for asset in self.listAllAssets}
-        conditions  = {asset: [] for asset in self.listAllAssets}
+        _met        = (policyMatrix & (self.__isExit | self.__isEntry)[:, None]).T
+        _policies   = self.Program.policyNames
 
-        for asset in policyCheck.keys():
-            for policy in policyCheck[asset]:
-                if "EXIT" in policy and policyCheck[asset][policy]:
-                    action[asset] = -1
-                    conditions[asset].append(policy)
-                
-                if "ENTRY" in policy and policyCheck[asset][policy]:
-                    action[asset] = 1
-                    conditions[asset].append(policy)
+        action      = dict(zip(self.listAllAssets, _action))
+        conditions  = {asset: [_policies[index] for index in np.flatnonzero(_met[assetIndex])] \
+                            for assetIndex, asset in enumerate(self.listAllAssets)}
 
         return action, conditions
 
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 import numpy as np
+import pandas as pd
 
 from importlib import reload
 import configparser
@@ -11,6 +12,8 @@ from Utilities import loggingManager, ExceptionManager, helper
 
 reload(SignalManager)
 
+from PolicyManager.CompiledPolicy import PolicyProgram
+
 
 
 Logger = loggingManager.logger.getLogger("Policies")
@@ -28,6 +31,24 @@ class Dummy():
 
 
 
+class MarketSignalChecks():
+    """
+    Market signal checks over the dates of market data, one boolean column per signal definition (field, operator, threshold)
+    Policies checking the same market data (Eg: all parameter sets and windows of a sweep) reuse the columns of
+    signals defined the same way, instead of checking the market data again (see Policy.precomputeMarketSignals)
+    """
+
+    def __init__(self, dates, columns = None):
+        self.dates      = list(dates)
+        self.columns    = {} if columns is None else dict(columns)
+
+    @staticmethod
+    def key(entry):
+        # definition of a market signal (SignalManager.SignalEntry), independent of its name
+        return (entry.field, entry.signal.operator, entry.threshold, entry.isComparisonRelative)
+
+
+
 class Policy(ABC):
 
     @abstractmethod
@@ -41,11 +62,25 @@ class Policy(ABC):
         self.listAllAssets  = helper.ConfigHelper.getList(self.configparser.get(section="StrategyConfig", option="Assets"))
 
 
+        # market signal checks precomputed over the market data of a run (see precomputeMarketSignals)
+        self.MarketSignalMatrix     = None
+        self.MarketSignalChecks     = None
+        self.__marketSignalRows     = {}
+
+        # incremental asset signal checks (see markDirty): last checks per asset and the fields changed since
+        self.__assetSignalCache     = {}
+        self.__dirtyFields          = None
+        self.__assetIndex           = {asset: index for index, asset in enumerate(self.listAllAssets)}
+        self.SignalCounters         = {"evaluated": 0, "skipped": 0}
+
         self.registerRequiredSignals()
         self.EntryPolicies  = self.registerEntryExitPolicies(entry = True)
         self.ExitPolicies   = self.registerEntryExitPolicies(entry = False)
 
         self.AllPolicies = {**self.ExitPolicies, **self.EntryPolicies} 
+
+        # policies compiled once into boolean kernels over all assets
+        self.Program = PolicyProgram(allPolicies = self.AllPolicies, listAssets = self.listAllAssets)
         
 
     
@@ -102,6 +137,12 @@ class Policy(ABC):
             
                 setattr(getattr(self.Signals, sectionName),signalName,objSignal)
 
+        # immutable signal tables per signal type (Asset, Portfolio, Market), used by the signal checks
+        # (empty table for a type without signals)
+        _sections = ["Asset", "Portfolio", "Market"] + [sectionName for sectionName in vars(self.Signals) if sectionName not in ("Asset", "Portfolio", "Market")]
+        self.SignalTables = {sectionName: SignalManager.SignalTable(signals = vars(getattr(self.Signals, sectionName, Dummy())).values(), \
+                                                                    listAssets = self.listAllAssets) for sectionName in _sections}
+
     
     def registerEntryExitPolicies(self, entry = True):
         if "TradePolicyConfig" not in self.configparser.sections():
@@ -200,113 +241,176 @@ class Policy(ABC):
         all asset signals to be checked against all assets
         """
 
-        assetSignals        = getattr(self.Signals, "Asset")
-        listassetSignals    = [signal for signal in dir(assetSignals) if "__" not in signal]
-        
-        signalChecks = {}
-        for asset in assetList:
-            signalChecks[asset] = {}
-    
-            for signalName in listassetSignals:
-                
-                objSignal = getattr(assetSignals, signalName)
-
-                blnCheck = False
-                if asset in currentAssetLevelInfo.keys():
-                    thisAsset_currentValue = currentAssetLevelInfo[asset]
-                    fieldName           = objSignal.field
-                    thisassetfieldValue = thisAsset_currentValue[fieldName]
-                    blnCheck            = objSignal.check(currentvalue = thisassetfieldValue)
-                
-                signalChecks[asset][signalName] = blnCheck
-    
+        assetSignals    = self.SignalTables["Asset"]
+        _assets         = [asset for asset in assetList if asset in currentAssetLevelInfo]
+
+        # fields changed since the last checks (None --> all signals of all assets are checked)
+        dirtyFields, self.__dirtyFields = self.__dirtyFields, None
+        _cache = self.__assetSignalCache
+
+        # one pass per signal over all assets (assets without info --> signal not met)
+        _checks = {}
+        for entry in assetSignals:
+            if entry.isComparisonRelative:
+                _checks[entry.name] = [False] * len(_assets)
+                continue
+
+            _compare, _threshold = entry.operator, entry.threshold
+            _dirty = None if dirtyFields is None else dirtyFields.get(entry.field)
+            if _dirty is None:
+                _checks[entry.name] = [_compare(currentAssetLevelInfo[asset][entry.field], _threshold) for asset in _assets]
+                self.SignalCounters["evaluated"] += len(_assets)
+                continue
+
+            # signals of unchanged fields keep their last check
+            _values, _skipped = [], 0
+            for asset in _assets:
+                if asset in _cache and not _dirty[self.__assetIndex[asset]]:
+                    _values.append(_cache[asset][entry.name])
+                    _skipped += 1
+                else:
+                    _values.append(_compare(currentAssetLevelInfo[asset][entry.field], _threshold))
+            _checks[entry.name] = _values
+
+            self.SignalCounters["skipped"] += _skipped
+            self.SignalCounters["evaluated"] += len(_assets) - _skipped
+
+        signalChecks = {asset: {name: False for name in assetSignals.names} for asset in assetList}
+        for index, asset in enumerate(_assets):
+            signalChecks[asset] = {name: _checks[name][index] for name in assetSignals.names}
+
+        # cached checks are only valid for assets checked against their info
+        self.__assetSignalCache = {asset: signalChecks[asset] for asset in _assets}
+
         return signalChecks
 
 
-    @abstractmethod
-    def checkPortfolioLevelSignals(self, currentPortfolioInfo):
+    def markDirty(self, dirtyFields):
         """
-        all portfolio signals to be checked against portfolio level information
+        incremental mode: fields changed since the last asset signal checks, used by the next checkAssetLevelSignals only
+        dirtyFields: {field: boolean vector (ordered as listAllAssets)}. Signals reading an unchanged field of an asset
+                     keep their last check, fields not provided are checked again
         """
-        portfolioSignals    = getattr(self.Signals, "Portfolio")
-        listportSignals     = [signal for signal in dir(portfolioSignals) if "__" not in signal]
+        self.__dirtyFields = dirtyFields
 
-        signalChecks = {}
-        for signalName in listportSignals:
 
-            objSignal = getattr(portfolioSignals, signalName)
-
-            fieldName           = objSignal.field
+    def __checkLevelSignals(self, signals, currentInfo):
+        # checks each signal of the table against a dictionary of current values (field not available --> signal not met)
+        currentInfo = {} if currentInfo is None else currentInfo
 
+        signalChecks = {}
+        for entry in signals:
             blnCheck = False
-            if fieldName in currentPortfolioInfo.keys():
-                thisfieldValue      = currentPortfolioInfo[fieldName]
-                blnCheck            = objSignal.check(currentvalue = thisfieldValue)
+            if entry.field in currentInfo and not entry.isComparisonRelative:
+                blnCheck = entry.operator(currentInfo[entry.field], entry.threshold)
 
-            signalChecks[signalName] = blnCheck
+            signalChecks[entry.name] = blnCheck
 
         return signalChecks
 
 
     @abstractmethod
-    def checkMarketLevelSignals(self, currentMarketInfo):
+    def checkPortfolioLevelSignals(self, currentPortfolioInfo):
         """
-        all market signals to be checked against provided market information
+        all portfolio signals to be checked against portfolio level information
         """
-        marketSignals       = getattr(self.Signals, "Market")
-        listmarketSignals   = [signal for signal in dir(marketSignals) if "__" not in signal]
-        signalChecks = {}
-        for signalName in listmarketSignals:
+        return self.__checkLevelSignals(signals = self.SignalTables["Portfolio"], currentInfo = currentPortfolioInfo)
+
+
+    def precomputeMarketSignals(self, macroData, shared = None):
+        """
+        checks all market signals once over the market data of a run, column wise
+        macroData: {date: {field: value}} (Eg: Strategy.MacroData). None --> drops the precomputed checks
+        shared: MarketSignalChecks of the same market data (Eg: computed once for a sweep). Signals defined the same way
+                reuse its columns, the others are checked. Ignored if it was computed on other dates
+        The checks are kept as a (dates x signals) boolean DataFrame (MarketSignalMatrix), and by signal definition
+        (MarketSignalChecks). checkMarketLevelSignals looks up the row of a precomputed date instead of checking the signals again
+        """
+        self.MarketSignalMatrix     = None
+        self.MarketSignalChecks     = None
+        self.__marketSignalRows     = {}
+        if macroData is None:
+            return
 
-            objSignal = getattr(marketSignals, signalName)
+        marketSignals       = self.SignalTables["Market"]
+        listmarketSignals   = list(marketSignals.names)
 
-            fieldName           = objSignal.field
+        dates   = list(macroData.keys())
+        _infos  = list(macroData.values())
 
-            blnCheck = False
-            if fieldName in currentMarketInfo.keys():
-                thisfieldValue      = currentMarketInfo[fieldName]
-                blnCheck            = objSignal.check(currentvalue = thisfieldValue)
+        checks  = MarketSignalChecks(dates, columns = shared.columns if shared is not None and shared.dates == dates else None)
 
-            signalChecks[signalName] = blnCheck
+        matrix  = np.zeros((len(dates), len(listmarketSignals)), dtype = bool)
+        _fields = {}
+        for index, entry in enumerate(marketSignals):
 
-        return signalChecks
+            _key = MarketSignalChecks.key(entry)
+            if _key not in checks.columns:
+
+                # one column per field (days without the field --> signal not met)
+                if entry.field not in _fields:
+                    _hasField   = np.array([entry.field in info for info in _infos], dtype = bool)
+                    _values     = np.array([info.get(entry.field, np.nan) for info in _infos], dtype = object)
+                    try:
+                        _values = _values.astype(np.float64)
+                    except (TypeError, ValueError):
+                        pass
+                    _fields[entry.field] = (_hasField, _values)
+
+                _hasField, _values = _fields[entry.field]
+                checks.columns[_key] = _hasField & entry.signal.checkValues(_values)
+
+            matrix[:, index] = checks.columns[_key]
+
+        self.MarketSignalChecks = checks
+        self.MarketSignalMatrix = pd.DataFrame(matrix, index = pd.Index(dates, name = "Date"), columns = listmarketSignals)
+        self.__marketSignalRows = {date: dict(zip(listmarketSignals, row)) for date, row in zip(dates, matrix.tolist())}
 
 
     @abstractmethod
-    def checkEntryExitPolicy(self, listAssets, currentAssetLevelInfo, currentPortfolioInfo, currentMarketInfo):
+    def checkMarketLevelSignals(self, currentMarketInfo, date = None):
+        """
+        all market signals to be checked against provided market information
+        date: date of the market information. Checks precomputed for the date are returned as is
+        """
+        if date is not None and date in self.__marketSignalRows:
+            return self.__marketSignalRows[date]
+
+        return self.__checkLevelSignals(signals = self.SignalTables["Market"], currentInfo = currentMarketInfo)
+
+
+    @abstractmethod
+    def checkEntryExitPolicy(self, listAssets, currentAssetLevelInfo, currentPortfolioInfo, currentMarketInfo, date = None):
         # checks all the policies for all assets based on current level information
         # Inputs:
         #   listAssets --> list of all assets
         #   currentAssetLevelInfo --> current asset level data (dict of dicts)
         #   currentPortfolioInfo --> current portfolio level data (dict)
         #   currentMarketInfo --> current market level data (dict)
+        #   date --> date of the market data (precomputed market signal checks are used if available)
 
 
         # run Signal checks
         assetSignalCheck    = self.checkAssetLevelSignals(assetList=listAssets, currentAssetLevelInfo=currentAssetLevelInfo)
         portSignalCheck     = self.checkPortfolioLevelSignals(currentPortfolioInfo=currentPortfolioInfo)
-        marketSignalCheck   = self.checkMarketLevelSignals(currentMarketInfo=currentMarketInfo)
+        marketSignalCheck   = self.checkMarketLevelSignals(currentMarketInfo=currentMarketInfo, date=date)
 
 
         self.assetSignalCheck   = assetSignalCheck
         self.portSignalCheck    = portSignalCheck
         self.marketSignalCheck  = marketSignalCheck
 
-        # print(self.assetSignalCheck, self.portSignalCheck, self.marketSignalCheck)
+        # all policies of all assets at once: (policies x assets)
+        self.policyMatrix = self.Program.evaluate(self.Program.signalMatrix(assetSignalCheck = assetSignalCheck, \
+                                                                            portSignalCheck = portSignalCheck, \
+                                                                            marketSignalCheck = marketSignalCheck))
 
+        _policyMatrix = self.policyMatrix.T.tolist()
         policyCheck = {}
         for asset in listAssets:
-            policyCheck[asset] = {}
-
-            # Check for Entry level policies
-            for policy in self.AllPolicies:
-                policyCheck[asset][policy] = self.checkPerAssetEntryExitPolicy(assetName=asset, policyName=policy)
-
-        # self.assetSignalCheck   = None
-        # self.portSignalCheck    = None
-        # self.marketSignalCheck  = None
+            _checks = _policyMatrix[self.Program.assetIndex[asset]]
+            policyCheck[asset] = dict(zip(self.Program.policyNames, _checks))
 
-       
         return policyCheck
 
 
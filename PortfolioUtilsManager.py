@@ -2,8 +2,15 @@ import numpy as np
 import pandas as pd
 import os
 from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Mapping
+import bisect
 
 from Utilities import loggingManager, ExceptionManager
+import DataCacheManager
+import DataCatalogManager
+import PerformanceManager
 
 
 Logger = loggingManager.logger.getLogger("Portfolio Utilities")
@@ -13,129 +20,441 @@ class Dummy():
         pass
 
 
+def _readDatedCSV(datapath):
+    # reads a csv file with a "Date" column, parsed (vectorized) into datetime64 and sorted ascending
+    _thisData = pd.read_csv(datapath)
+    _thisData["Date"] = pd.to_datetime(_thisData["Date"])
+    _thisData = _thisData.sort_values("Date", ascending=True).reset_index(drop = True)
+
+    return _thisData
+
+
+def _appendDatedCSV(data, datapath, state):
+    """
+    extends parsed data with only the rows appended to datapath since state (DataCacheManager.ingestState) was taken
+    returns (data, new state). (None, None) if the file was not only appended to or the new rows are not 
+    later than the parsed data --> full re-read required
+    """
+    rows, newState = DataCacheManager.readAppendedRows(datapath, state, parser = _readDatedCSV)
+    if rows is None:
+        return None, None
+
+    if len(rows) == 0:
+        return data, newState
+
+    # data may hold only some of the file's columns (data catalog)
+    if not set(data.columns).issubset(rows.columns) or (len(data) > 0 and rows["Date"].iloc[0] <= data["Date"].iloc[-1]):
+        return None, None
+
+    rows = rows[list(data.columns)].astype(data.dtypes.to_dict(), errors = "ignore")
+
+    return pd.concat([data, rows], ignore_index = True), newState
+
+
+def _loadDatedCSV(datapath, cache = None, previous = None):
+    """
+    parsed csv file, served from the on disk data cache when provided
+    previous: (data, ingest state) of an earlier read without cache --> only the appended rows are parsed
+    returns (data, ingest state). state is None when the cache is used (kept by the cache)
+    """
+    if cache is not None:
+        return cache.read(datapath, parser = _readDatedCSV, append = _appendDatedCSV), None
+
+    if previous is not None and previous[1] is not None:
+        data, state = _appendDatedCSV(previous[0], datapath, previous[1])
+        if data is not None:
+            return data, state
+
+    state = DataCacheManager.ingestState(datapath)
+    return _readDatedCSV(datapath), state
+
+
+def _mapConcurrent(function, items, threads = 1):
+    # applies function to all items, on a thread pool if threads > 1 (results in the order of items)
+    if threads is None or threads <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers = threads) as pool:
+        return list(pool.map(function, items))
+
+
+def _frame(series):
+    # DataFrame over the (shared, read only) arrays of a parsed file, without copying them
+    return pd.DataFrame(series, copy = False)
+
+
+def _acquireFiles(path, names, columns = None, useCache = True, threads = 1):
+    """
+    parsed columns of <path>/<name>.csv for all names, shared through the process wide data catalog 
+    (each file is parsed only if its columns are not held yet)
+    columns: list of columns ("Date" always included. None --> all columns)
+    returns {name: {column: read only array}}. To be released with _releaseFiles
+    """
+    cache   = DataCacheManager.getCache(path) if useCache else None
+    catalog = DataCatalogManager.getCatalog()
+
+    def _acquire(name):
+        datapath = os.path.join(path, f'{name}.csv')
+        if not os.path.exists(datapath):
+            Logger.error(f'{name} data not available in {datapath}')
+
+        return catalog.acquire(path, name, columns = columns, load = lambda: _loadDatedCSV(datapath, cache = cache), source = datapath)
+
+    return dict(zip(names, _mapConcurrent(_acquire, names, threads = threads)))
+
+
+def _releaseFiles(path, series):
+    # releases the columns acquired with _acquireFiles
+    catalog = DataCatalogManager.getCatalog()
+    for name, _series in series.items():
+        catalog.release(path, name, columns = list(_series.keys()))
+
+
+def _refreshFiles(path, series, useCache = True, threads = 1):
+    """
+    picks up rows appended to the files of the acquired series (only the new rows are parsed, files changed
+    otherwise are re-read) and updates them in the data catalog
+    returns ({name: {column: read only array}} --> series re-acquired, earliest date affected by the changes or None)
+    """
+    cache   = DataCacheManager.getCache(path) if useCache else None
+    catalog = DataCatalogManager.getCatalog()
+
+    def _refresh(name):
+        datapath = os.path.join(path, f'{name}.csv')
+
+        # current catalog series of the file (may be newer than the ones held, if refreshed by another loader)
+        _current = catalog.acquire(path, name, columns = list(series[name].keys()), load = lambda: _loadDatedCSV(datapath, cache = cache))
+        _previous = _frame(_current)
+
+        _fingerprint = DataCatalogManager.fingerprint(datapath)
+        data, state = _loadDatedCSV(datapath, cache = cache, previous = (_previous, catalog.state(path, name)))
+        if not data[list(_previous.columns)].equals(_previous):
+            catalog.replace(path, name, data, state, fingerprint = _fingerprint)
+
+            catalog.release(path, name, columns = list(_current.keys()))
+            _current = catalog.acquire(path, name, columns = list(series[name].keys()), load = lambda: _loadDatedCSV(datapath, cache = cache), source = datapath)
+
+        return _current
+
+    names   = list(series.keys())
+    current = dict(zip(names, _mapConcurrent(_refresh, names, threads = threads)))
+
+    affected = _firstChangedDate(series, current)
+    _releaseFiles(path, series)
+
+    return current, affected
+
+
+def _firstChangedDate(previous, current):
+    # earliest date from which the parsed series changed (None --> unchanged)
+    _affected = []
+    for name, _current in current.items():
+        _previous = previous[name]
+        if all(_current[column] is _previous[column] for column in _previous):
+            continue
+
+        _current, _previous = _frame(_current), _frame(_previous)
+        if len(_current) >= len(_previous) and _current.iloc[:len(_previous)].equals(_previous):
+            if len(_current) > len(_previous):
+                _affected.append(_current["Date"].iloc[len(_previous)])
+        else:
+            _affected.append(min(_current["Date"].iloc[0], _previous["Date"].iloc[0]))
+
+    return min(_affected).date() if len(_affected) > 0 else None
+
+
+def _rowDates(series, startDate = None, endDate = None):
+    # dates (datetime.date) with a row in any of the parsed files, restricted to [startDate, endDate] if provided
+    dates = pd.DatetimeIndex(np.unique(np.concatenate([_series["Date"] for _series in series.values()])))
+
+    if startDate is not None:
+        dates = dates[dates >= pd.Timestamp(startDate)]
+    if endDate is not None:
+        dates = dates[dates <= pd.Timestamp(endDate)]
+
+    return dates.date
+
+
+def _alignToCalendar(data, calendar, fillValue):
+    # aligns parsed data onto the calendar: forward filled (also from dates before the calendar starts), 
+    # fillValue where no older data is available
+    _thisData = data.drop_duplicates("Date", keep = "last").set_index("Date", drop = True)
+    _thisData = _thisData.fillna(method = "ffill")
+
+    _thisData = _thisData.reindex(calendar, method = "ffill")
+    _thisData = _thisData.fillna(fillValue)
+
+    return _thisData
+
+
+def _calendar(loader, startDate = None, endDate = None):
+    # daily calendar of the loader's available data, restricted to [startDate, endDate] if provided
+    startDate   = loader.startDate if startDate is None else max(startDate, loader.startDate)
+    endDate     = loader.endDate if endDate is None else min(endDate, loader.endDate)
+
+    return pd.date_range(start = startDate, end = endDate, freq = "D")
+
+
+
+class PriceMatrix(Mapping):
+    """
+    Dense price matrix (dates x assets) with a date --> row ordinal index
+    Rows are returned as zero-copy (read only) views. 
+    Behaves as a read only dictionary {date: {asset: price}} for existing callers
+    """
+
+    def __init__(self, dates, assets, values):
+
+        self.dates      = list(dates)
+        self.assets     = list(assets)
+
+        # read only view (no copy if values already is a C ordered float64 array. Eg: shared memory)
+        self.values     = np.asarray(values, dtype = np.float64, order = "C").view()
+        self.values.flags.writeable = False
+
+        self.rowIndex   = {date: row for row, date in enumerate(self.dates)}
+        self.assetIndex = {asset: column for column, asset in enumerate(self.assets)}
+
+
+    @classmethod
+    def fromFrame(cls, data):
+        # data: DataFrame indexed by date, one column per asset
+        return cls(dates = data.index, assets = data.columns, values = np.array(data.values, dtype = np.float64, order = "C"))
+
+
+    def rowOrdinal(self, date):
+        return self.rowIndex.get(date)
+
+
+    def row(self, date):
+        # prices of all assets for date (view of the matrix row). None if date not available
+        ordinal = self.rowIndex.get(date)
+        if ordinal is None:
+            return None
+
+        return PriceRow(matrix = self, ordinal = ordinal)
+
+
+    def window(self, startDate, endDate):
+        # prices between startDate and endDate (both included) as a view of the matrix
+        startRow    = bisect.bisect_left(self.dates, startDate)
+        endRow      = bisect.bisect_right(self.dates, endDate)
+
+        return self.values[startRow:endRow]
+
+
+    # dictionary interface {date: {asset: price}}
+    def __getitem__(self, date):
+        _row = self.row(date)
+        if _row is None:
+            raise KeyError(date)
+
+        return _row
+
+    def __contains__(self, date):
+        return date in self.rowIndex
+
+    def __iter__(self):
+        return iter(self.dates)
+
+    def __len__(self):
+        return len(self.dates)
+
+
+
+class PriceRow(Mapping):
+    """
+    Prices of all assets on one date. Read only dictionary {asset: price} over a row of PriceMatrix
+    values --> zero-copy view of the matrix row (ordered as PriceMatrix.assets)
+    """
+
+    __slots__ = ("matrix", "ordinal")
+
+    def __init__(self, matrix, ordinal):
+        self.matrix     = matrix
+        self.ordinal    = ordinal
+
+    @property
+    def assets(self):
+        return self.matrix.assets
+
+    @property
+    def values(self):
+        return self.matrix.values[self.ordinal]
+
+    def __getitem__(self, asset):
+        return self.matrix.values[self.ordinal, self.matrix.assetIndex[asset]]
+
+    def __iter__(self):
+        return iter(self.matrix.assets)
+
+    def __len__(self):
+        return len(self.matrix.assets)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+
 class Datadownloader():
 
-    def __init__(self, listAssets, path):
+    def __init__(self, listAssets, path, useCache = True, threads = 1):
+        """
+        listAssets: list of assets (<path>/<asset>.csv)
+        useCache: serve parsed files from the on disk data cache
+        threads: number of threads used to read and parse the files
+        """
 
         self.assets = listAssets
         self.filepath = path
+        self.useCache = useCache
+        self.threads = threads
+
+        # parsed prices (default price column) shared through the data catalog. Start date and end date from available data
+        self.__series = {}      # set first: released in __del__ even if the files cannot be loaded
+        self.__series = _acquireFiles(path = path, names = self.assets, columns = ["Close"], useCache = useCache, threads = threads)
+        self.__setDateRange()
 
-        # get the start date and end date from available data
-        _allStartDates = []
-        _allEndDates = []
-        for asset in self.assets:
 
+    def __setDateRange(self):
+        self.startDate = pd.Timestamp(min(_series["Date"][0] for _series in self.__series.values())).date()
+        self.endDate = pd.Timestamp(max(_series["Date"][-1] for _series in self.__series.values())).date()
 
-            datapath = os.path.join(path, f'{asset}.csv')
-            if not os.path.exists(datapath):
-                Logger.error(f'{asset} data not available in {datapath}')
 
-            _thisData = pd.read_csv(os.path.join(path, f'{asset}.csv'))
-            _thisData["Date"] = pd.to_datetime(_thisData["Date"]).dt.date
-            _thisData = _thisData.sort_values("Date", ascending=True)
-            _thisStartDate = _thisData["Date"].iloc[0]
-            _thisEndDate = _thisData["Date"].iloc[-1]
+    def tradingDates(self, startDate = None, endDate = None):
+        # dates on which any of the assets has a price (before alignment) between startDate and endDate
+        return _rowDates(self.__series, startDate = startDate, endDate = endDate)
 
-            _allStartDates.append(_thisStartDate)
-            _allEndDates.append(_thisEndDate)
 
-        self.startDate = min(_allStartDates)
-        self.endDate = max(_allEndDates)
+    def close(self):
+        # releases the parsed prices held in the data catalog
+        _releaseFiles(self.filepath, self.__series)
+        self.__series = {}
 
 
+    def __del__(self):
+        self.close()
+
+
+    def refresh(self):
+        """
+        picks up rows appended to the price files since they were parsed (only the new rows are parsed,
+        files changed otherwise are re-read). loadData has to be called again to align the new data
+        returns the earliest date affected by the changes (None --> no changes)
+        """
+        self.__series, affected = _refreshFiles(path = self.filepath, series = self.__series, useCache = self.useCache, threads = self.threads)
+        self.__setDateRange()
+
+        return affected
 
-    def loadData(self, priceCol = "Close"):
+
+    def loadData(self, priceCol = "Close", startDate = None, endDate = None):
+        """
+        aligns the price of all assets on a daily calendar
+        startDate, endDate: optional window (datetime.date) to restrict the loaded data to
+        """
 
         requiredPriceCol = priceCol
-        data_close = pd.DataFrame()
 
-        dateRange = pd.Series(pd.bdate_range(start = self.startDate, end = self.endDate, freq = "D")).dt.date
-        dateRange = pd.DataFrame(dateRange, columns = ["Date"])
+        calendar = _calendar(self, startDate = startDate, endDate = endDate)
 
+        if any(requiredPriceCol not in _series for _series in self.__series.values()):
+            _acquired = _acquireFiles(path = self.filepath, names = self.assets, columns = [requiredPriceCol], useCache = self.useCache, threads = self.threads)
+            _releaseFiles(self.filepath, self.__series)
+            self.__series = {asset: {**self.__series[asset], **_acquired[asset]} for asset in self.assets}
+
+        alignedData = []
         for asset in self.assets:
-            _thisData = pd.read_csv(os.path.join(self.filepath, f'{asset}.csv'))
-            _thisData["Date"] = pd.to_datetime(_thisData["Date"]).dt.date
-            _thisData = _thisData.sort_values("Date", ascending=True)
-            # _thisData.set_index("Date", drop = True, inplace = True)
-            # print(_thisData.columns)
+            _thisData = _frame(self.__series[asset])
 
 
             if requiredPriceCol not in _thisData.columns:
                 Logger.error(f"Price Column not available for {asset}")
                 raise ExceptionManager.MissingColumnException("Close")
 
-            _thisData = dateRange.merge(_thisData[["Date", requiredPriceCol]], how = "left", left_on = "Date", right_on = "Date")
-            _thisData.set_index("Date", drop = True, inplace = True)
-
-            # fillNa
-            _thisData = _thisData.fillna(method = "ffill")
-            _thisData = _thisData.fillna(-1)   # in case no price available for older dates --> -1
-
-            data_close = data_close.merge(_thisData[[requiredPriceCol]], how = "outer", left_index=True, right_index=True)
-
-            data_close.rename(columns = {requiredPriceCol: f'{asset}'}, inplace = True)
-
+            # fillNa: -1 in case no price available for older dates
+            _thisData = _alignToCalendar(_thisData[["Date", requiredPriceCol]], calendar = calendar, fillValue = -1)
+            alignedData.append(_thisData[requiredPriceCol].rename(f'{asset}'))
 
+        data_close = pd.concat(alignedData, axis = 1)
 
+        # dates are kept as datetime.date in the loaded data
+        data_close.index = pd.Index(data_close.index.date, name = "Date")
         
         self.allData_df = data_close
-        self.allData_dict = data_close.to_dict(orient = "index")
+        self.allData_matrix = PriceMatrix.fromFrame(data_close)
+        self.allData_dict = self.allData_matrix      # dictionary compatible {date: {asset: price}}
 
 
 
 class MacroMarketDataLoader():
 
-    def __init__(self, listMarketInfoFiles, path):
+    def __init__(self, listMarketInfoFiles, path, useCache = True, threads = 1):
+        """
+        listMarketInfoFiles: list of market info files (<path>/<file>.csv)
+        useCache: serve parsed files from the on disk data cache
+        threads: number of threads used to read and parse the files
+        """
 
         self.marketFactors = listMarketInfoFiles
         self.filepath = path
+        self.useCache = useCache
+        self.threads = threads
+
 
+        # parsed market info shared through the data catalog. Start date and end date from available data
+        self.__series = {}      # set first: released in __del__ even if the files cannot be loaded
+        self.__series = _acquireFiles(path = path, names = self.marketFactors, useCache = useCache, threads = threads)
+        self.__setDateRange()
 
-        # get the start date and end date from available data
-        _allStartDates = []
-        _allEndDates = []
-        for factor in self.marketFactors:
 
-            datapath = os.path.join(path, f'{factor}.csv')
-            if not os.path.exists(datapath):
-                Logger.error(f'{factor} data not available in {datapath}')
+    def __setDateRange(self):
+        self.startDate = pd.Timestamp(min(_series["Date"][0] for _series in self.__series.values())).date()
+        self.endDate = pd.Timestamp(max(_series["Date"][-1] for _series in self.__series.values())).date()
 
-            _thisData = pd.read_csv(os.path.join(path, f'{factor}.csv'))
-            _thisData["Date"] = pd.to_datetime(_thisData["Date"]).dt.date
-            _thisData = _thisData.sort_values("Date", ascending=True)
-            _thisStartDate = _thisData["Date"].iloc[0]
-            _thisEndDate = _thisData["Date"].iloc[-1]
 
-            _allStartDates.append(_thisStartDate)
-            _allEndDates.append(_thisEndDate)
+    def tradingDates(self, startDate = None, endDate = None):
+        # dates on which any of the market info files has a value (before alignment) between startDate and endDate
+        return _rowDates(self.__series, startDate = startDate, endDate = endDate)
 
-        self.startDate = min(_allStartDates)
-        self.endDate = max(_allEndDates)        
 
+    def close(self):
+        # releases the parsed market info held in the data catalog
+        _releaseFiles(self.filepath, self.__series)
+        self.__series = {}
 
-    def loadData(self):
 
-        data_close = pd.DataFrame()
+    def __del__(self):
+        self.close()
 
-        dateRange = pd.Series(pd.bdate_range(start = self.startDate, end = self.endDate, freq = "D")).dt.date
-        dateRange = pd.DataFrame(dateRange, columns = ["Date"])
 
-        for factor in self.marketFactors:
-            _thisData = pd.read_csv(os.path.join(self.filepath, f'{factor}.csv'))
-            _thisData["Date"] = pd.to_datetime(_thisData["Date"]).dt.date
-            _thisData = _thisData.sort_values("Date", ascending=True)
-            # _thisData.set_index("Date", drop = True, inplace = True)
+    def refresh(self):
+        """
+        picks up rows appended to the market info files since they were parsed (only the new rows are parsed,
+        files changed otherwise are re-read). loadData has to be called again to align the new data
+        returns the earliest date affected by the changes (None --> no changes)
+        """
+        self.__series, affected = _refreshFiles(path = self.filepath, series = self.__series, useCache = self.useCache, threads = self.threads)
+        self.__setDateRange()
 
+        return affected
 
-            _thisData = dateRange.merge(_thisData, how = "left", left_on = "Date", right_on = "Date")
-            _thisData.set_index("Date", drop = True, inplace = True)
 
-            # fillNa
-            _thisData = _thisData.fillna(method = "ffill")
-            _thisData = _thisData.fillna("NA")   # in case no price available for older dates --> -1
+    def loadData(self, startDate = None, endDate = None):
+        """
+        aligns all market info on a daily calendar
+        startDate, endDate: optional window (datetime.date) to restrict the loaded data to
+        """
 
-            data_close = data_close.merge(_thisData, how = "outer", left_index=True, right_index=True)
+        calendar = _calendar(self, startDate = startDate, endDate = endDate)
 
+        # fillNa: "NA" in case no value available for older dates
+        alignedData = [_alignToCalendar(_frame(self.__series[factor]), calendar = calendar, fillValue = "NA") for factor in self.marketFactors]
+
+        data_close = pd.concat(alignedData, axis = 1)
+
+        # dates are kept as datetime.date in the loaded data
+        data_close.index = pd.Index(data_close.index.date, name = "Date")
         
         self.allData_df = data_close
         self.allData_dict = data_close.to_dict(orient = "index")
@@ -143,9 +462,477 @@ class MacroMarketDataLoader():
 
 
 
+class WindowedDataHandle():
+    """
+    Lazy handle over a data loader (Datadownloader/ MacroMarketDataLoader)
+    Nothing is loaded until get() is called. Only the requested window (plus warm-up days) is aligned,
+    and loaded windows are kept so that overlapping requests reuse (or extend) them
+    """
+
+    def __init__(self, createLoader, warmupDays = 0, **loadOptions):
+        """
+        createLoader: function () --> loader object (with startDate, endDate, loadData(startDate, endDate, **loadOptions), allData_df)
+        warmupDays: calendar days loaded before the requested start date
+        loadOptions: additional arguments for loadData (Eg: priceCol)
+        """
+
+        self.createLoader   = createLoader
+        self.warmupDays     = warmupDays
+        self.loadOptions    = loadOptions
+
+        self.loader         = None
+        self.windows        = []        # loaded windows: [(startDate, endDate, data)]
+
+
+    def get(self, startDate = None, endDate = None):
+        """
+        data (DataFrame indexed by date) between startDate - warmupDays and endDate
+        startDate, endDate: datetime.date (None --> all available data)
+        """
+
+        if self.loader is None:
+            self.loader = self.createLoader()
+
+        startDate   = self.loader.startDate if startDate is None else max(startDate - relativedelta(days = self.warmupDays), self.loader.startDate)
+        endDate     = self.loader.endDate if endDate is None else min(endDate, self.loader.endDate)
+
+        for _start, _end, _data in self.windows:
+            if _start <= startDate and endDate <= _end:
+                return _data.loc[startDate:endDate]
+
+        # load one window covering the request and all overlapping (or adjacent) loaded windows
+        _oneDay     = relativedelta(days = 1)
+        overlapping = [index for index, (_start, _end, _) in enumerate(self.windows) if _start <= endDate + _oneDay and startDate - _oneDay <= _end]
+
+        _loadStart  = min([startDate] + [self.windows[index][0] for index in overlapping])
+        _loadEnd    = max([endDate] + [self.windows[index][1] for index in overlapping])
+
+        self.loader.loadData(startDate = _loadStart, endDate = _loadEnd, **self.loadOptions)
+        _data = self.loader.allData_df
+
+        self.windows = [window for index, window in enumerate(self.windows) if index not in overlapping]
+        self.windows.append((_loadStart, _loadEnd, _data))
+
+        return _data.loc[startDate:endDate]
+
+
+    def tradingDates(self, startDate = None, endDate = None):
+        # dates with a row in the source files (see loader.tradingDates)
+        if self.loader is None:
+            self.loader = self.createLoader()
+
+        return self.loader.tradingDates(startDate = startDate, endDate = endDate)
+
+
+    def refresh(self):
+        """
+        picks up data appended to the source files (see loader.refresh). Loaded windows reaching
+        the earliest changed date are dropped and reloaded on the next get()
+        returns the earliest date affected by the changes (None --> no changes)
+        """
+        if self.loader is None:
+            return None
+
+        affected = self.loader.refresh()
+        if affected is not None:
+            self.windows = [(_start, _end, _data) for _start, _end, _data in self.windows if _end < affected]
+
+        return affected
+
+
+
+
+def _sequentialSum(start, values):
+    # start + values[0] + values[1] + ... accumulated left to right (same rounding as a python loop)
+    return np.add.accumulate(np.concatenate(([start], values)))[-1]
+
+
+class DailyLedger():
+    """
+    Columnar store for the daily snapshots recorded by PortfolioManager
+    Each block is a preallocated 2-D numpy array (days x columns) sharing one Date column.
+    Capacity grows geometrically, so appending a day is amortized O(1)
+    DataFrames are only materialized when requested, and cached until the next append
+    """
+
+    def __init__(self, capacity = 256):
+
+        self.capacity   = max(int(capacity), 1)
+        self.size       = 0
+
+        self.dates      = np.empty(self.capacity, dtype = object)
+        self.blocks     = {}
+        self.__frames   = {}
+
+
+    def addBlock(self, name, columns, dtype = np.float64):
+        self.blocks[name] = {"columns": list(columns), \
+                             "values": np.zeros((self.capacity, len(columns)), dtype = dtype)}
+
+
+    def reserve(self, capacity):
+        # grow the storage so that atleast "capacity" rows can be held without reallocation
+        if capacity <= self.capacity:
+            return
+
+        _dates = np.empty(capacity, dtype = object)
+        _dates[:self.size] = self.dates[:self.size]
+        self.dates = _dates
+
+        for block in self.blocks.values():
+            _values = np.zeros((capacity, block["values"].shape[1]), dtype = block["values"].dtype)
+            _values[:self.size] = block["values"][:self.size]
+            block["values"] = _values
+
+        self.capacity = capacity
+
+
+    def append(self, date, **rows):
+        """
+        date: date of the snapshot
+        rows: one row per block. Eg: append(date, Portfolio = [..], Holdings = [..])
+        """
+        if self.size == self.capacity:
+            self.reserve(2 * self.capacity)
+
+        self.dates[self.size] = date
+        for name, row in rows.items():
+            self.blocks[name]["values"][self.size] = row
+
+        self.size += 1
+
+
+    def extend(self, dates, **rows):
+        """
+        appends several days at once
+        dates: dates of the snapshots
+        rows: 2-D array (days x columns) per block
+        """
+        _days = len(dates)
+        if self.size + _days > self.capacity:
+            self.reserve(max(2 * self.capacity, self.size + _days))
+
+        self.dates[self.size:self.size + _days] = dates
+        for name, values in rows.items():
+            self.blocks[name]["values"][self.size:self.size + _days] = values
+
+        self.size += _days
+
+
+    def toFrame(self, name):
+        # materialize the block as a DataFrame (with Date as the first column)
+        cached = self.__frames.get(name)
+        if cached is not None and cached[0] == self.size:
+            return cached[1]
+
+        block = self.blocks[name]
+        frame = pd.DataFrame(block["values"][:self.size], columns = block["columns"])
+        frame.insert(0, "Date", self.dates[:self.size])
+
+        self.__frames[name] = (self.size, frame)
+
+        return frame
+
+
+
+
+class TradeBlotter():
+    """
+    Array backed store of all executed trades (Date, Asset, Quantity, Price, Cost)
+    Fills of a day are appended in one go. Trades DataFrame is materialized lazily and cached until the next append
+    """
+
+    def __init__(self, listAssets, capacity = 256):
+
+        self.listAssets = list(listAssets)
+        self.capacity   = max(int(capacity), 1)
+        self.size       = 0
+
+        self.dates      = np.empty(self.capacity, dtype = object)
+        self.assets     = np.zeros(self.capacity, dtype = np.int64)          # asset ordinal
+        self.values     = np.zeros((self.capacity, 3), dtype = np.float64)   # Quantity, Price, Cost
+        self.__frame    = None
+
+
+    def reserve(self, capacity):
+        if capacity <= self.capacity:
+            return
+
+        _dates = np.empty(capacity, dtype = object)
+        _dates[:self.size] = self.dates[:self.size]
+        _assets = np.zeros(capacity, dtype = np.int64)
+        _assets[:self.size] = self.assets[:self.size]
+        _values = np.zeros((capacity, 3), dtype = np.float64)
+        _values[:self.size] = self.values[:self.size]
+
+        self.dates, self.assets, self.values = _dates, _assets, _values
+        self.capacity = capacity
+
+
+    def append(self, date, ordinals, quantities, prices, costs):
+        # append all fills of a day (aligned arrays)
+        nFills = len(ordinals)
+        if self.size + nFills > self.capacity:
+            self.reserve(max(2 * self.capacity, self.size + nFills))
+
+        _slice = slice(self.size, self.size + nFills)
+        self.dates[_slice]      = date
+        self.assets[_slice]     = ordinals
+        self.values[_slice, 0]  = quantities
+        self.values[_slice, 1]  = prices
+        self.values[_slice, 2]  = costs
+
+        self.size += nFills
+
+
+    def toFrame(self):
+        if self.__frame is not None and self.__frame[0] == self.size:
+            return self.__frame[1]
+
+        frame = pd.DataFrame({"Date":       self.dates[:self.size],
+                              "Asset":      np.array(self.listAssets, dtype = object)[self.assets[:self.size]],
+                              "Quantity":   self.values[:self.size, 0],
+                              "Price":      self.values[:self.size, 1],
+                              "Cost":       self.values[:self.size, 2]},
+                             columns = ["Date", "Asset", "Quantity", "Price", "Cost"])
+
+        self.__frame = (self.size, frame)
+
+        return frame
+
+
+
+
+class OnlineMetrics():
+    """
+    Performance metrics of a portfolio accumulated as days are recorded, O(1) per day (readable at any point of a run)
+    Daily returns: running mean/ variance (Welford) and downside variance vs the risk free rate
+    Portfolio value: running peak, max drawdown, current and longest drawdown duration (days recorded below the peak)
+    Trades: turnover (traded notional) and transaction cost totals
+    Same definitions as the cumulative metrics of PerformanceManager (annualized return over the dates recorded,
+    volatility with ddof 1, downside risk with ddof 0)
+    """
+
+    def __init__(self, riskfreerate = 0.0):
+
+        self.dailyRiskFreeRate  = PerformanceManager.AnnualReturnstoDaily(riskfreerate)
+
+        self.days           = 0         # days recorded
+        self.firstDate      = None
+        self.lastDate       = None
+        self.firstValue     = None
+        self.lastValue      = None
+
+        # daily returns: count, mean, sum of squared deviations (same for the downside returns)
+        self.count          = 0
+        self.mean           = 0.0
+        self.m2             = 0.0
+        self.downsideMean   = 0.0
+        self.downsideM2     = 0.0
+
+        self.peak           = -np.inf
+        self.maxDrawdown    = 0.0
+        self.drawdownDays   = 0
+        self.maxDrawdownDays = 0
+
+        self.turnover       = 0.0
+        self.cost           = 0.0
+
+
+    def update(self, date, value):
+        # records the portfolio value of a day
+        if self.days == 0:
+            self.firstDate, self.firstValue = date, value
+        else:
+            self.__addReturn(value/ self.lastValue - 1)
+
+        self.days       += 1
+        self.lastDate   = date
+        self.lastValue  = value
+
+        if value >= self.peak:
+            self.peak           = value
+            self.drawdownDays   = 0
+        else:
+            self.drawdownDays   += 1
+            self.maxDrawdownDays = max(self.maxDrawdownDays, self.drawdownDays)
+
+        self.maxDrawdown = min(self.maxDrawdown, value/ self.peak - 1.0)
+
+
+    def extend(self, dates, values):
+        # records several days at once (Eg: days recorded in bulk by PortfolioManager.applyProjection)
+        values = np.asarray(values, dtype = np.float64)
+        if len(values) == 0:
+            return
+
+        if self.days == 0:
+            self.update(dates[0], values[0])
+            dates, values = dates[1:], values[1:]
+            if len(values) == 0:
+                return
+
+        # returns of the days merged into the running moments (Chan et al. pairwise update)
+        returns = values/ np.concatenate(([self.lastValue], values[:-1])) - 1
+        _downside = np.minimum(returns - self.dailyRiskFreeRate, 0)
+
+        _count  = self.count + len(returns)
+        _delta  = returns.mean() - self.mean
+        _dDelta = _downside.mean() - self.downsideMean
+
+        self.m2             += ((returns - returns.mean())**2).sum() + _delta**2 * self.count * len(returns)/ _count
+        self.downsideM2     += ((_downside - _downside.mean())**2).sum() + _dDelta**2 * self.count * len(returns)/ _count
+        self.mean           += _delta * len(returns)/ _count
+        self.downsideMean   += _dDelta * len(returns)/ _count
+        self.count          = _count
+
+        # running peak and drawdown durations (days since the last peak, carried over from the recorded days)
+        peaks   = np.maximum.accumulate(np.concatenate(([self.peak], values)))[1:]
+        _atPeak = values >= peaks
+        _index  = np.arange(len(values))
+        _lastPeak = np.maximum.accumulate(np.where(_atPeak, _index, -1))
+        _drawdownDays = np.where(_lastPeak >= 0, _index - _lastPeak, self.drawdownDays + _index + 1)
+
+        self.peak           = peaks[-1]
+        self.maxDrawdown    = min(self.maxDrawdown, (values/ peaks).min() - 1.0)
+        self.drawdownDays   = int(_drawdownDays[-1])
+        self.maxDrawdownDays = max(self.maxDrawdownDays, int(_drawdownDays.max()))
+
+        self.days       += len(values)
+        self.lastDate   = dates[-1]
+        self.lastValue  = values[-1]
+
+
+    def addTrades(self, notionals, costs):
+        # traded notionals and transaction costs of the fills of a day
+        self.turnover   += np.sum(np.abs(notionals))
+        self.cost       += np.sum(costs)
+
+
+    def __addReturn(self, ret):
+        self.count  += 1
+
+        _delta      = ret - self.mean
+        self.mean   += _delta/ self.count
+        self.m2     += _delta * (ret - self.mean)
+
+        _downside   = min(ret - self.dailyRiskFreeRate, 0)
+        _delta      = _downside - self.downsideMean
+        self.downsideMean += _delta/ self.count
+        self.downsideM2 += _delta * (_downside - self.downsideMean)
+
+
+    @property
+    def annualizedReturn(self):
+        if self.days < 2:
+            return np.nan
+        periodDays = (pd.Timestamp(self.lastDate) - pd.Timestamp(self.firstDate)).days
+        return PerformanceManager.CumulativeReturnstoAnnualized(self.lastValue/ self.firstValue - 1, periodDays)
+
+    @property
+    def volatility(self):
+        return np.sqrt(self.m2/ (self.count - 1) * PerformanceManager.ANNUALPERIOD) if self.count > 1 else np.nan
+
+    @property
+    def downsideRisk(self):
+        return np.sqrt(self.downsideM2/ self.count * PerformanceManager.ANNUALPERIOD) if self.count > 0 else np.nan
+
+    @property
+    def sharpe(self):
+        volatility = self.volatility
+        return (self.annualizedReturn - self.dailyRiskFreeRate)/ volatility if volatility > 0 else np.nan
+
+    @property
+    def sortino(self):
+        downsideRisk = self.downsideRisk
+        return (self.annualizedReturn - self.dailyRiskFreeRate)/ downsideRisk if downsideRisk > 0 else np.nan
+
+
+    def summary(self):
+        # current value of all metrics (names as the cumulative performance of Strategy.computePerformance)
+        return {"Returns": self.annualizedReturn, "Volatility": self.volatility, "Max Drawdown": self.maxDrawdown, \
+                "Sharpe Ratio": self.sharpe, "Sortino Ratio": self.sortino, "Drawdown Days": self.drawdownDays, \
+                "Max Drawdown Days": self.maxDrawdownDays, "Turnover": self.turnover, "Cost": self.cost}
+
+
+
+
+class AssetStateStore():
+    """
+    Array backed state of all assets held in the portfolio
+    Each field is a numpy vector indexed by the asset ordinal (position in listAssets)
+    """
+
+    FIELDS = {"Holding":            np.float64,
+              "Value":              np.float64,
+              "Pct_Holding":        np.float64,
+              "CurrentPrice":       np.float64,
+              "AvgPurchasePrice":   np.float64,
+              "LastTradeDate":      "datetime64[D]",    #when was the last purchase made (NaT if never)
+              "DaysSinceLastTrade": np.int64,
+              "DaysHolding":        np.int64,
+              "RunningPerformance": np.float64}
+
+
+    def __init__(self, listAssets):
+
+        self.listAssets = list(listAssets)
+        self.index      = {asset: ordinal for ordinal, asset in enumerate(self.listAssets)}
+
+        nAssets = len(self.listAssets)
+        for field, dtype in self.FIELDS.items():
+            setattr(self, field, np.zeros(nAssets, dtype = dtype))
+
+        self.LastTradeDate = np.full(nAssets, np.datetime64("NaT"), dtype = "datetime64[D]")
+
+
+
+def _assetStateField(field):
+    # property reading/ writing one field of the AssetStateStore for the accessor's asset
+    def getter(self):
+        return getattr(self._store, field)[self._ordinal]
+
+    def setter(self, value):
+        getattr(self._store, field)[self._ordinal] = value
+
+    return property(getter, setter)
+
+
+class AssetState():
+    """
+    Per asset accessor over AssetStateStore (kept for attribute style access. Eg: AssetLevelInfo.<asset>.Holding)
+    """
+
+    __slots__ = ("_store", "_ordinal")
+
+    def __init__(self, store, ordinal):
+        self._store     = store
+        self._ordinal   = ordinal
+
+    Holding             = _assetStateField("Holding")
+    Value               = _assetStateField("Value")
+    Pct_Holding         = _assetStateField("Pct_Holding")
+    CurrentPrice        = _assetStateField("CurrentPrice")
+    AvgPurchasePrice    = _assetStateField("AvgPurchasePrice")
+    DaysSinceLastTrade  = _assetStateField("DaysSinceLastTrade")
+    DaysHolding         = _assetStateField("DaysHolding")
+    RunningPerformance  = _assetStateField("RunningPerformance")
+
+    @property
+    def LastTradeDate(self):
+        lastTradeDate = self._store.LastTradeDate[self._ordinal]
+        return None if np.isnat(lastTradeDate) else lastTradeDate.astype(object)
+
+    @LastTradeDate.setter
+    def LastTradeDate(self, value):
+        self._store.LastTradeDate[self._ordinal] = np.datetime64("NaT") if value is None else np.datetime64(value, "D")
+
+
+
+
 class PortfolioManager():
 
-    def __init__(self, listAssets, initialCash, transaction_cost = 0):
+    def __init__(self, listAssets, initialCash, transaction_cost = 0, expectedDays = None):
 
         self.listAssets = listAssets
         self.transaction_cost = transaction_cost
@@ -158,45 +945,97 @@ class PortfolioManager():
         self.PortfolioLevelInfo.Cash_Pct = 1.0
         self.PortfolioLevelInfo.Cost = 0
 
-        self.AssetLevelInfo = Dummy()
-        for asset in self.listAssets:
-            
-            setattr(self.AssetLevelInfo, asset, Dummy())
-            _thisAssetObject = getattr(self.AssetLevelInfo, asset)
+        # asset level information: one vector per field, indexed by asset ordinal
+        self.AssetState = AssetStateStore(listAssets = self.listAssets)
 
+        self.AssetLevelInfo = Dummy()
+        for ordinal, asset in enumerate(self.listAssets):
+            setattr(self.AssetLevelInfo, asset, AssetState(store = self.AssetState, ordinal = ordinal))
 
-            setattr(_thisAssetObject, "Holding", 0)
-            setattr(_thisAssetObject, "Value", 0)
-            setattr(_thisAssetObject, "Pct_Holding", 0)
-            setattr(_thisAssetObject, "CurrentPrice", 0)
-            setattr(_thisAssetObject, "AvgPurchasePrice", 0)
-            setattr(_thisAssetObject, "LastTradeDate", None)   #when was the last purchase made
-            setattr(_thisAssetObject, "DaysSinceLastTrade", 0)   #when was the last purchase made
+        # asset state fields tracked for changes (see trackChanges): field --> values when last checked
+        self.__tracked = None
 
-            # note down the performance related Info
-            setattr(_thisAssetObject, "DaysHolding", 0)
-            setattr(_thisAssetObject, "RunningPerformance", 0)
+        # metrics accumulated day by day (see trackMetrics). None --> not tracked
+        self.OnlineMetrics = None
 
 
-        self.Trades = pd.DataFrame(columns = ["Date", "Asset", "Quantity", "Price", "Cost"])
+        self.TradeBlotter = TradeBlotter(listAssets = self.listAssets)
 
         # store daily level Information
-        col_port = ["Date", "Cash"] + self.listAssets + ["Cost", "PortfolioValue"]
-        col_runningPerform = ["Date"] + self.listAssets
+        col_port = ["Cash"] + self.listAssets + ["Cost", "PortfolioValue"]
+        col_runningPerform = self.listAssets
 
-        col_assetHoldings = ["Date", "Cash_weight"]
+        col_assetHoldings = ["Cash_weight"]
         for asset in self.listAssets:
             col_assetHoldings.append(asset)
             col_assetHoldings.append(f'{asset}_weight')
-        
-        self.DailyPortfolioDetails = pd.DataFrame(columns=col_port)        
-        self.DailyAssetHoldings = pd.DataFrame(columns=col_assetHoldings)
 
-        self.DailyRunningPerformance = pd.DataFrame(columns=col_runningPerform)
-        self.DailyHoldingPeriod = pd.DataFrame(columns=col_runningPerform)
-        self.DailyDaysSinceLastTrade = pd.DataFrame(columns=col_runningPerform)
+        self.DailyLedger = DailyLedger(capacity = expectedDays if expectedDays is not None else 256)
+        self.DailyLedger.addBlock("PortfolioDetails", col_port)
+        self.DailyLedger.addBlock("AssetHoldings", col_assetHoldings)
+        self.DailyLedger.addBlock("RunningPerformance", col_runningPerform)
+        self.DailyLedger.addBlock("HoldingPeriod", col_runningPerform, dtype = np.int64)
+        self.DailyLedger.addBlock("DaysSinceLastTrade", col_runningPerform, dtype = np.int64)
+
+
+    def reserve(self, expectedDays):
+        # presize the daily ledger for the next "expectedDays" updates (eg: the run's date range)
+        self.DailyLedger.reserve(self.DailyLedger.size + expectedDays)
+
+
+    def trackChanges(self, fields):
+        # starts tracking which assets had a change in the provided asset state fields (see changedAssets)
+        self.__tracked = {field: np.array(getattr(self.AssetState, field)) for field in fields}
+
+
+    def trackMetrics(self, riskfreerate = 0.0):
+        # starts accumulating performance metrics on every recorded day (see OnlineMetrics), from the current state
+        self.OnlineMetrics = OnlineMetrics(riskfreerate = riskfreerate)
+
+
+    def changedAssets(self):
+        """
+        assets whose tracked asset state fields changed since the last call (or since tracking started),
+        through any update (daily update, trades, bulk projections)
+        returns {field: boolean vector (ordered as listAssets)}. None if changes are not tracked
+        """
+        if self.__tracked is None:
+            return None
+
+        changed = {}
+        for field, previous in self.__tracked.items():
+            current = getattr(self.AssetState, field)
+            changed[field] = current != previous
+            np.copyto(previous, current)
+
+        return changed
+
+
+    @property
+    def Trades(self):
+        return self.TradeBlotter.toFrame()
+
+    # daily level information as DataFrames (materialized lazily from the ledger)
+    @property
+    def DailyPortfolioDetails(self):
+        return self.DailyLedger.toFrame("PortfolioDetails")
+
+    @property
+    def DailyAssetHoldings(self):
+        return self.DailyLedger.toFrame("AssetHoldings")
+
+    @property
+    def DailyRunningPerformance(self):
+        return self.DailyLedger.toFrame("RunningPerformance")
+
+    @property
+    def DailyHoldingPeriod(self):
+        return self.DailyLedger.toFrame("HoldingPeriod")
+
+    @property
+    def DailyDaysSinceLastTrade(self):
+        return self.DailyLedger.toFrame("DaysSinceLastTrade")
 
-        
 
 
     def update(self, date, newTrade, currentPrice):
@@ -209,33 +1048,19 @@ class PortfolioManager():
                         "B": {"Quantity": -50, "Price": 120}
                     }
 
-            currentPrice: dictionary of current price of each asset
+            currentPrice: dictionary of current price of each asset (or PriceRow)
         """
 
 
-        # check for Traded Notional on this day (including Cost)
-        totaltradedNotional = 0
-        totaltransactionCost = 0
-
-
-        # 1. check for available Cash
-        self.__checkCashPostTrades(trades = newTrade)
-
-
-        # execute the order and update the relevant information as needed
-        for asset in newTrade.keys():            
-            self.executeSingleOrder(date = date, assetName=asset, orderDetail=newTrade[asset])
+        # 1. check for available Cash and execute all orders of the day
+        quantities, prices = self.__ordersToArrays(orders = newTrade)
+        self.execute_batch(date = date, quantities = quantities, prices = prices)
         
         # 2. once all orders executed, update all asset level and portfolio level info
-        currentCash = getattr(self.PortfolioLevelInfo, "Cash")
-        portValue = currentCash
-        for asset in self.listAssets:
+        currentCash = self.PortfolioLevelInfo.Cash
+        assetNotionals = self.__updateDailyAssetLevelInfo(date = date, currentPrice=currentPrice)
 
-            # update the Position level Information
-            _thisAssetNotional = self.__updateDailyAssetLevelInfo(date = date, assetName=asset, currentPrice=currentPrice)
-            portValue += _thisAssetNotional
-
-        setattr(self.PortfolioLevelInfo, "Value", portValue)
+        self.PortfolioLevelInfo.Value = _sequentialSum(currentCash, assetNotionals)
 
 
         # 3. Update asset pct holdings and compute running performances
@@ -248,14 +1073,25 @@ class PortfolioManager():
 
 
 
-    def __checkCashPostTrades(self, trades):
+    def __ordersToArrays(self, orders):
+        # converts dictionary of orders into quantity and price arrays aligned with listAssets (NaN --> no order)
+        quantities  = np.full(len(self.listAssets), np.nan)
+        prices      = np.full(len(self.listAssets), np.nan)
+
+        for asset, orderDetail in orders.items():
+            ordinal = self.AssetState.index[asset]
+            quantities[ordinal] = orderDetail["Quantity"]
+            prices[ordinal]     = orderDetail["Price"]
 
-        totaltradedNotional = 0
-        totaltransactionCost = 0
-        for asset in trades.keys():
-            _thisNotional = trades[asset]["Quantity"] * trades[asset]["Price"]
-            totaltradedNotional += _thisNotional
-            totaltransactionCost += abs(_thisNotional) * self.transaction_cost
+        return quantities, prices
+
+
+    def __checkCashPostTrades(self, quantities, prices):
+
+        tradedNotional = quantities * prices
+
+        totaltradedNotional = np.sum(tradedNotional)
+        totaltransactionCost = np.sum(np.abs(tradedNotional)) * self.transaction_cost
 
 
         requiredCash = totaltradedNotional + totaltransactionCost
@@ -264,196 +1100,227 @@ class PortfolioManager():
         if requiredCash > availableCash:
             Logger.error(f"Portfolio doesnt have enough Cash. Current Cash: {availableCash}. Required: {requiredCash}")
             raise Exception(f"Portfolio doesnt have enough Cash. Current Cash: {availableCash}. Required: {requiredCash}")
-            
-
 
 
 
-    def executeSingleOrder(self, date, assetName, orderDetail):
-        """        
-        assetName: name of asset to be traded
-        orderDetail: {"Quantity": 100, "Price": 100 }
+    def execute_batch(self, date, quantities, prices, checkCash = True):
+        """
+        executes all orders of a day in one step
+        quantities: array of order quantity per asset (aligned with listAssets). NaN --> no order for that asset
+        prices: array of execution price per asset (aligned with listAssets)
+        checkCash: validate that the portfolio has enough cash for all the orders
         """
 
-        quantity = orderDetail["Quantity"]
-        price = orderDetail["Price"]
-
-        # get the current values for this asset
-        _thisAssetObject = getattr(self.AssetLevelInfo, assetName)
+        quantities  = np.asarray(quantities, dtype = np.float64)
+        prices      = np.asarray(prices, dtype = np.float64)
 
+        ordinals    = np.flatnonzero(~np.isnan(quantities))
+        if len(ordinals) == 0:
+            return
 
-        previousHolding = getattr(_thisAssetObject, "Holding")
-        previousNotional = getattr(_thisAssetObject, "Value")
-        lastavgPurchasePruce = getattr(_thisAssetObject, "AvgPurchasePrice")
+        state       = self.AssetState
+        quantity    = quantities[ordinals]
+        price       = prices[ordinals]
 
-        availableCash = getattr(self.PortfolioLevelInfo, "Cash")
+        if checkCash:
+            self.__checkCashPostTrades(quantities = quantity, prices = price)
 
 
-        # update Information with the transaction
+        # update Information with the transactions
 
         # 1. Holdings
+        previousHolding = state.Holding[ordinals]
         newHoldings = previousHolding + quantity
         transactedValue = quantity* price
         transactionCost = np.round(np.abs(transactedValue)*self.transaction_cost, 2)
 
-        if newHoldings < 0:
-            raise Exception(f"Holdings cannot be negative. {assetName} -- Previous: {previousHolding} OrderSize: {quantity}")
+        if np.any(newHoldings < 0):
+            _first = np.flatnonzero(newHoldings < 0)[0]
+            raise Exception(f"Holdings cannot be negative. {self.listAssets[ordinals[_first]]} -- Previous: {previousHolding[_first]} OrderSize: {quantity[_first]}")
 
-        Logger.info(f"Date: {date}  ---- Order {assetName}: {quantity} @ {price} Executed")
+        Logger.info(f"Date: {date}  ---- Orders " + ", ".join(f"{self.listAssets[_ordinal]}: {_quantity} @ {_price}" for _ordinal, _quantity, _price in zip(ordinals, quantity, price)) + " Executed")
 
-        setattr(_thisAssetObject, "Holding", newHoldings)
 
+        # 2. Average Purchase Price
+        _averageNewPurchaseNotional = state.AvgPurchasePrice[ordinals] * previousHolding + transactedValue
+        _newAvgPurchasePrice = np.divide(_averageNewPurchaseNotional, newHoldings, out = np.zeros(len(ordinals)), where = newHoldings > 0)
 
+        state.Holding[ordinals] = newHoldings
+        state.AvgPurchasePrice[ordinals] = np.round(_newAvgPurchasePrice, 2)
 
-        # 2. Average Purchase Price
-        __averagePreviousPurchaseNotional = lastavgPurchasePruce * previousHolding
-        __thisTradeNotional = transactedValue
-        __averageNewPurchaseNotional = __averagePreviousPurchaseNotional + __thisTradeNotional
-        
-        newAvgPurchasePrice = np.round(__averageNewPurchaseNotional/ newHoldings, 2) if newHoldings > 0 else 0.00
-        setattr(_thisAssetObject, "AvgPurchasePrice", newAvgPurchasePrice)
-        
-        # 3. Portfolio Available Cash
-        availableCash -= (__thisTradeNotional + transactionCost)
-        setattr(self.PortfolioLevelInfo, "Cash", availableCash)
+        # 3. Portfolio Available Cash (debited order by order)
+        self.PortfolioLevelInfo.Cash = np.subtract.reduce(np.concatenate(([self.PortfolioLevelInfo.Cash], transactedValue + transactionCost)))
 
         # 4. Total Cost
-        setattr(self.PortfolioLevelInfo, "Cost", transactionCost + getattr(self.PortfolioLevelInfo, "Cost"))
+        self.PortfolioLevelInfo.Cost = _sequentialSum(self.PortfolioLevelInfo.Cost, transactionCost)
 
         # 5. Last Trade how many days ago
-        setattr(_thisAssetObject, "LastTradeDate", date)
+        state.LastTradeDate[ordinals] = np.datetime64(date, "D")
 
 
         # update the Trade table
-        _thisTrade = [date, assetName, quantity,price, transactionCost]
-        self.Trades.loc[len(self.Trades)] = _thisTrade
+        self.TradeBlotter.append(date = date, ordinals = ordinals, quantities = quantity, prices = price, costs = transactionCost)
 
+        if self.OnlineMetrics is not None:
+            self.OnlineMetrics.addTrades(notionals = transactedValue, costs = transactionCost)
 
-    def __updateDailyAssetLevelInfo(self, date, assetName, currentPrice):
-        """
-        Updates the position on daliy basis of each asset based on current Holding and latest price
-        """
-
-
-        _thisAssetObject = getattr(self.AssetLevelInfo, assetName)
 
-        _assetPrice   = currentPrice[assetName]
-        _assetHolding = getattr(_thisAssetObject, "Holding")
-        _LastTradedate = getattr(_thisAssetObject, "LastTradeDate")
 
-        _newNotional = np.round(_assetHolding * _assetPrice,2)
-        setattr(_thisAssetObject, "Value", _newNotional)
-        setattr(_thisAssetObject, "CurrentPrice", _assetPrice)
-
-        if _LastTradedate is not None:
-            DaysSinceLastTrade = (date - _LastTradedate).days
-        else:
-            DaysSinceLastTrade =  0 
-        # print(assetName, date, _LastTradedate, DaysSinceLastTrade )
-        setattr(_thisAssetObject, "DaysSinceLastTrade", DaysSinceLastTrade)
+    def projectState(self, dates, prices):
+        """
+        asset and portfolio level state after each of dates if no trade is done (holdings and cash carried forward)
+        computed with the same arithmetic as update, for all days at once
+        dates: array of dates (datetime.date)
+        prices: 2-D array of prices (days x assets, ordered as listAssets)
+        returns Dummy with: dates, CurrentPrice, Value, Pct_Holding, DaysHolding, RunningPerformance, DaysSinceLastTrade (days x assets)
+                            and Value, Cash_Pct (days) at portfolio level (PortfolioValue, Cash_Pct)
+        """
 
-        return _newNotional
+        state       = self.AssetState
+        _days       = len(dates)
+        _cash       = self.PortfolioLevelInfo.Cash
 
+        projection              = Dummy()
+        projection.dates        = dates
+        projection.CurrentPrice = prices
+        projection.Value        = np.round(state.Holding * prices, 2)
 
-    def __updatePerformance_HoldingsInfo(self):
-        # method to compute the running Performance and holdings periods
-        # any more running Information can be added here
+        # portfolio value accumulated left to right per day (same as update)
+        projection.PortfolioValue = np.add.accumulate(np.column_stack((np.full(_days, _cash), projection.Value)), axis = 1)[:, -1]
+        projection.Cash_Pct     = _cash/ projection.PortfolioValue
+        projection.Pct_Holding  = projection.Value/ projection.PortfolioValue[:, None]
 
+        _isHeld = state.Holding != 0
+        projection.DaysHolding  = np.where(_isHeld, state.DaysHolding + np.arange(1, _days + 1)[:, None], 0)
+        projection.RunningPerformance = np.divide(prices - state.AvgPurchasePrice, state.AvgPurchasePrice, \
+                                                  out = np.zeros(prices.shape), where = np.broadcast_to(_isHeld, prices.shape))
 
-        currentCash = getattr(self.PortfolioLevelInfo, "Cash")
-        portValue = getattr(self.PortfolioLevelInfo, "Value")
-        
-        cash_pct = currentCash/ portValue
-        setattr(self.PortfolioLevelInfo, "Cash_Pct", cash_pct)
+        _daysSinceLastTrade = (np.array(dates, dtype = "datetime64[D]")[:, None] - state.LastTradeDate).astype(np.int64)
+        projection.DaysSinceLastTrade = np.where(np.isnat(state.LastTradeDate), 0, _daysSinceLastTrade)
 
+        return projection
 
-        for asset in self.listAssets:
 
-            # 1. update the percent Holdings 
-            _thisAssetObject = getattr(self.AssetLevelInfo, asset)
-            _assetValue = getattr(_thisAssetObject, "Value")
-            
-            _pctHolding = _assetValue/ portValue
-            setattr(_thisAssetObject, "Pct_Holding", _pctHolding)
+    def applyProjection(self, projection, days):
+        """
+        records the first "days" days of a projection (see projectState) as if update was called for each of them without orders
+        """
+        if days <= 0:
+            return
 
+        state   = self.AssetState
+        _last   = days - 1
 
+        _cash       = self.PortfolioLevelInfo.Cash
+        _cashPct    = projection.Cash_Pct[:days]
 
-            # 2. update holding period
-            _currentHolding = getattr(_thisAssetObject, "Holding")
-            _previousHoldingPeriod = getattr(_thisAssetObject, "DaysHolding")
+        _portfolioDetails   = np.column_stack((np.full(days, _cash), projection.Value[:days], \
+                                               np.full(days, self.PortfolioLevelInfo.Cost), projection.PortfolioValue[:days]))
 
-            _newHoldingPeriod = 0 if _currentHolding == 0 else _previousHoldingPeriod + 1
+        _holdings           = np.empty((days, 1 + 2 * len(self.listAssets)))
+        _holdings[:, 0]     = _cashPct
+        _holdings[:, 1::2]  = state.Holding
+        _holdings[:, 2::2]  = projection.Pct_Holding[:days]
 
-            setattr(_thisAssetObject, "DaysHolding" , _newHoldingPeriod)
-            
+        self.DailyLedger.extend(projection.dates[:days], \
+                                PortfolioDetails    = _portfolioDetails, \
+                                AssetHoldings       = _holdings, \
+                                RunningPerformance  = projection.RunningPerformance[:days], \
+                                HoldingPeriod       = projection.DaysHolding[:days], \
+                                DaysSinceLastTrade  = projection.DaysSinceLastTrade[:days])
 
-            # 3. compute running Performance
-            _currentPrice = getattr(_thisAssetObject, "CurrentPrice")
-            _avgPurchasePrice = getattr(_thisAssetObject, "AvgPurchasePrice")
+        if self.OnlineMetrics is not None:
+            self.OnlineMetrics.extend(projection.dates[:days], projection.PortfolioValue[:days])
 
-            _runningPerformance = 0 if _currentHolding == 0 else (_currentPrice - _avgPurchasePrice)/ _avgPurchasePrice
+        # current state --> last recorded day
+        state.Value                 = projection.Value[_last].copy()
+        np.copyto(state.CurrentPrice, projection.CurrentPrice[_last])
+        state.Pct_Holding           = projection.Pct_Holding[_last].copy()
+        state.DaysHolding           = projection.DaysHolding[_last].copy()
+        state.RunningPerformance    = projection.RunningPerformance[_last].copy()
+        state.DaysSinceLastTrade    = projection.DaysSinceLastTrade[_last].copy()
 
-            setattr(_thisAssetObject, "RunningPerformance" , _runningPerformance)
+        self.PortfolioLevelInfo.Value       = projection.PortfolioValue[_last]
+        self.PortfolioLevelInfo.Cash_Pct    = projection.Cash_Pct[_last]
 
 
+    def executeSingleOrder(self, date, assetName, orderDetail):
+        """        
+        assetName: name of asset to be traded
+        orderDetail: {"Quantity": 100, "Price": 100 }
+        """
 
-    def __computePortfolioSummary(self, date):
+        quantities, prices = self.__ordersToArrays(orders = {assetName: orderDetail})
+        self.execute_batch(date = date, quantities = quantities, prices = prices, checkCash = False)
 
-        # 1. add the latest info 
-        _currentCash = getattr(self.PortfolioLevelInfo, "Cash")
-        _currentCash_pct = getattr(self.PortfolioLevelInfo, "Cash_Pct")
-        _cost        = getattr(self.PortfolioLevelInfo, "Cost")
-        _portValue   = getattr(self.PortfolioLevelInfo, "Value")
- 
-        _assetValues = []
-        _Holdings = []
-        _performances = []
-        _holdingPeriods = []
-        _lastTrade = []
 
-        for asset in self.listAssets:
+    def __updateDailyAssetLevelInfo(self, date, currentPrice):
+        """
+        Updates the position on daliy basis of all assets based on current Holding and latest price
+        Returns the notional of each asset (vector ordered as listAssets)
+        """
 
-            _thisAssetObject    = getattr(self.AssetLevelInfo, asset)
+        state = self.AssetState
 
-            _assetValue         = getattr(_thisAssetObject, "Value")
-            _holding_absolute   = getattr(_thisAssetObject, "Holding")
-            _holding_percent    = getattr(_thisAssetObject, "Pct_Holding")
+        if isinstance(currentPrice, PriceRow) and currentPrice.assets == self.listAssets:
+            _assetPrice = currentPrice.values
+        else:
+            _assetPrice = np.array([currentPrice[asset] for asset in self.listAssets], dtype = np.float64)
 
-            _runningPerformance = getattr(_thisAssetObject, "RunningPerformance")
-            _holdingPeriod      = getattr(_thisAssetObject, "DaysHolding")
+        state.Value         = np.round(state.Holding * _assetPrice, 2)
+        np.copyto(state.CurrentPrice, _assetPrice)
 
-            _DaysSinceLastTrade = getattr(_thisAssetObject, "DaysSinceLastTrade")
+        # days since last trade (0 if never traded)
+        _daysSinceLastTrade = (np.datetime64(date, "D") - state.LastTradeDate).astype(np.int64)
+        state.DaysSinceLastTrade = np.where(np.isnat(state.LastTradeDate), 0, _daysSinceLastTrade)
 
+        return state.Value
 
-            _assetValues.append(_assetValue)
-            _Holdings.append(_holding_absolute)
-            _Holdings.append(_holding_percent)
 
-            _performances.append(_runningPerformance)
-            _holdingPeriods.append(_holdingPeriod)
-            _lastTrade.append(_DaysSinceLastTrade)
+    def __updatePerformance_HoldingsInfo(self):
+        # method to compute the running Performance and holdings periods
+        # any more running Information can be added here
 
+        state = self.AssetState
 
+        currentCash = self.PortfolioLevelInfo.Cash
+        portValue = self.PortfolioLevelInfo.Value
+        
+        self.PortfolioLevelInfo.Cash_Pct = currentCash/ portValue
 
+        # 1. update the percent Holdings 
+        state.Pct_Holding = state.Value/ portValue
 
-        # update Portfolio
-        _currentInfo = [date, _currentCash] + _assetValues + [_cost, _portValue]
-        self.DailyPortfolioDetails.loc[len(self.DailyPortfolioDetails)] = _currentInfo
+        # 2. update holding period
+        _isHeld = state.Holding != 0
+        state.DaysHolding = np.where(_isHeld, state.DaysHolding + 1, 0)
 
-        # update Asset Holdings
-        _currentInfo = [date, _currentCash_pct] + _Holdings
-        self.DailyAssetHoldings.loc[len(self.DailyAssetHoldings)] = _currentInfo
+        # 3. compute running Performance
+        state.RunningPerformance = np.divide(state.CurrentPrice - state.AvgPurchasePrice, state.AvgPurchasePrice, \
+                                             out = np.zeros(len(self.listAssets)), where = _isHeld)
 
-        # update Running Performance
-        _currentInfo = [date] + _performances
-        self.DailyRunningPerformance.loc[len(self.DailyRunningPerformance)] = _currentInfo
 
-        # update holding period
-        _currentInfo = [date] + _holdingPeriods
-        self.DailyHoldingPeriod.loc[len(self.DailyHoldingPeriod)] = _currentInfo
 
+    def __computePortfolioSummary(self, date):
 
-        # update last trade how many days
-        _currentInfo = [date] + _lastTrade
-        self.DailyDaysSinceLastTrade.loc[len(self.DailyDaysSinceLastTrade)] = _currentInfo
+        state = self.AssetState
 
+        # 1. add the latest info 
+        _currentCash = self.PortfolioLevelInfo.Cash
+        _currentCash_pct = self.PortfolioLevelInfo.Cash_Pct
+        _cost        = self.PortfolioLevelInfo.Cost
+        _portValue   = self.PortfolioLevelInfo.Value
+
+        # holdings are stored as (absolute, percent) pairs per asset
+        _Holdings = np.column_stack((state.Holding, state.Pct_Holding)).ravel()
+
+        # update the ledger (Portfolio, Asset Holdings, Running Performance, holding period, last trade how many days)
+        self.DailyLedger.append(date, \
+                                PortfolioDetails    = np.concatenate(([_currentCash], state.Value, [_cost, _portValue])), \
+                                AssetHoldings       = np.concatenate(([_currentCash_pct], _Holdings)), \
+                                RunningPerformance  = state.RunningPerformance, \
+                                HoldingPeriod       = state.DaysHolding, \
+                                DaysSinceLastTrade  = state.DaysSinceLastTrade)
+
+        if self.OnlineMetrics is not None:
+            self.OnlineMetrics.update(date, _portValue)
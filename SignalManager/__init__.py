@@ -1,16 +1,20 @@
 from abc import ABC, abstractmethod
 import operator
+from collections import namedtuple
+import numpy as np
 from Utilities import helper
 
 
+OPERATORS = {'>': operator.gt,
+             '<': operator.lt,
+             '>=': operator.ge,
+             '<=': operator.le,
+             '==': operator.eq}
+
+
 def get_truth(input, relate, compare_against):
     # compare 2 values based n the operator sign provided
-    ops = {'>': operator.gt,
-           '<': operator.lt,
-           '>=': operator.ge,
-           '<=': operator.le,
-           '==': operator.eq}
-    return ops[relate](input, compare_against)
+    return OPERATORS[relate](input, compare_against)
 
 
 class Signal(ABC):
@@ -53,6 +57,26 @@ class Signal(ABC):
         return blnCheck
 
 
+    def checkValues(self, values):
+        # check of an array of values at once (element wise, same comparison as check without a relative field value)
+        # values that cannot be compared with the threshold (Eg: "NA" filled for missing market info) --> signal not met
+        values = np.asarray(values)
+        if self.isComparisonRelative:
+            return np.zeros(values.shape, dtype = bool)
+
+        try:
+            return np.asarray(get_truth(input=values, relate=self.operator, compare_against=self.threshold), dtype = bool)
+        except TypeError:
+            return np.array([self.__checkValue(value) for value in values.ravel()], dtype = bool).reshape(values.shape)
+
+
+    def __checkValue(self, value):
+        try:
+            return bool(get_truth(input=value, relate=self.operator, compare_against=self.threshold))
+        except TypeError:
+            return False
+
+
 class AssetSignal(Signal):
     """
     abstract class for Trading signal generations based on individual assets 
@@ -101,3 +125,43 @@ class MarketSignal(Signal):
 
 
 
+# one registered signal: operator is the comparison function, assetMask the assets the signal applies to (tuple of bool)
+SignalEntry = namedtuple("SignalEntry", ["name", "field", "operator", "threshold", "isComparisonRelative", "assetMask", "signal"])
+
+
+class SignalTable():
+    """
+    Immutable table of the signals of one type (asset, portfolio or market), ordered by signal name
+    Built once when the signals are registered, so that checks iterate over plain tuples instead of
+    looking the signals up by reflection
+    """
+
+    __slots__ = ("entries", "names")
+
+    def __init__(self, signals, listAssets):
+        """
+        signals: signal objects of one type
+        listAssets: assets of the asset mask (market signals apply to their assetstoConsider, all other signals to all assets)
+        """
+        entries = []
+        for objSignal in sorted(signals, key = lambda objSignal: objSignal.name):
+            if isinstance(objSignal, MarketSignal):
+                assetMask = tuple(asset in objSignal.assetstoConsider for asset in listAssets)
+            else:
+                assetMask = tuple(True for asset in listAssets)
+
+            entries.append(SignalEntry(name = objSignal.name, field = objSignal.field, operator = OPERATORS[objSignal.operator], \
+                                       threshold = objSignal.threshold, isComparisonRelative = objSignal.isComparisonRelative, \
+                                       assetMask = assetMask, signal = objSignal))
+
+        object.__setattr__(self, "entries", tuple(entries))
+        object.__setattr__(self, "names", tuple(entry.name for entry in entries))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SignalTable is immutable")
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
@@ -65,15 +65,14 @@ class YieldCurveRegimeDrivenStrategy(StrategyManager.Strategy):
         orders = {}
 
         _availableCash = self.PortfolioManager.PortfolioLevelInfo.Cash * (1 - self.minCashRequired)
+        _assetState    = self.PortfolioManager.AssetState
 
         for index, asset in enumerate(self.listAssets):
             
 
             _thisAction = action[asset]
             _price      = currentPrice[asset]
-            _thisObj    = getattr(self.PortfolioManager.AssetLevelInfo, asset)
-            _holding    = getattr(_thisObj, "Holding")
-            _value      = getattr(_thisObj, "Value")
+            _holding    = _assetState.Holding[index]
 
 
             if _thisAction < 0:
@@ -3,7 +3,6 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from importlib import reload, import_module
-from dateutil import relativedelta
 import matplotlib.pyplot as plt
 import seaborn as sns
 import warnings
@@ -21,7 +20,8 @@ reload(SignalManager)
 reload(BenchmarkManager)
 
 
-from PortfolioUtilsManager import PortfolioManager, Datadownloader, MacroMarketDataLoader
+from PortfolioUtilsManager import PortfolioManager, Datadownloader, MacroMarketDataLoader, PriceMatrix, WindowedDataHandle
+from StrategyManager.VectorizedEngine import VectorizedEngine
 from Utilities import loggingManager, helper
 
 warnings.filterwarnings("ignore")
@@ -38,6 +38,11 @@ class Dummy():
 
 class Strategy(ABC):
 
+    # policy (signal) fields --> PortfolioManager state they are read from
+    ASSET_STATE_FIELDS      = {"currentPosition": "Value", "runningDays": "DaysHolding", \
+                               "runningPerformance": "RunningPerformance", "DaysSinceLastTrade": "DaysSinceLastTrade"}
+    PORTFOLIO_STATE_FIELDS  = {"runningCash": "Cash", "runningCash_pct": "Cash_Pct"}
+
     def __init__(self, configFile = None):
 
         """
@@ -56,10 +61,14 @@ class Strategy(ABC):
         self.__readConfig()
 
         # load the required Data
-        self.Benchmark = BenchmarkManager.CompositeBenchmark(benchmarkDetails=self.benchmarkDetails)
+        self.Benchmark = BenchmarkManager.CompositeBenchmark(benchmarkDetails=self.benchmarkDetails, useCache=self.useDataCache, threads=self.loaderThreads)
 
 
-        # load the price and macro market info data
+        # setup the price and macro market info data (loaded lazily, for the window of each run)
+        self.__priceData = None
+        self.__macroData = None
+        self.__sharedData = None
+        self.__sharedMarketChecks = None
         self.__loadPriceData()
         self.__loadMacroMarketData()
 
@@ -71,6 +80,10 @@ class Strategy(ABC):
 
         # setup the Portfolio and Holdings Manager
         self.PortfolioManager = PortfolioManager(listAssets=self.listAssets, initialCash=self.initialCapital, transaction_cost=self.transaction_cost)
+        if self.incrementalSignals:
+            self.PortfolioManager.trackChanges(fields = self.ASSET_STATE_FIELDS.values())
+        if self.onlineMetrics:
+            self.PortfolioManager.trackMetrics(riskfreerate = 0.0)
 
 
 
@@ -91,6 +104,28 @@ class Strategy(ABC):
 
         self.initialCapital     = helper.ConfigHelper.getFloat(self.configparser.get(section=section, option="initialCapital"))
 
+        # serve price/ macro files from the on disk data cache (optional, default: True)
+        self.useDataCache       = self.configparser.getboolean(section=section, option="useDataCache", fallback=True)
+
+        # number of threads used to read and parse the price/ macro files (optional, default: 1 --> serial)
+        self.loaderThreads      = self.configparser.getint(section=section, option="loaderThreads", fallback=1)
+
+        # calendar days of data loaded before the start of a run (optional, default: 0)
+        self.warmupDays         = self.configparser.getint(section=section, option="warmupDays", fallback=0)
+
+        # days the strategy is run on (optional, default: calendar):
+        #   calendar --> every calendar day, intersection --> days with both prices and market info, union --> days with either
+        self.tradingCalendar    = self.configparser.get(section=section, option="tradingCalendar", fallback="calendar").lower()
+        if self.tradingCalendar not in ("calendar", "intersection", "union"):
+            Logger.error(f"tradingCalendar {self.tradingCalendar} not supported")
+            raise Exception(f"tradingCalendar {self.tradingCalendar} not supported. Use: calendar/ intersection/ union")
+
+        # re-check asset signals only for assets whose state fields changed since the last day (optional, default: False)
+        self.incrementalSignals = self.configparser.getboolean(section=section, option="incrementalSignals", fallback=False)
+
+        # accumulate performance metrics day by day, readable mid run from PortfolioManager.OnlineMetrics (optional, default: False)
+        self.onlineMetrics      = self.configparser.getboolean(section=section, option="onlineMetrics", fallback=False)
+
 
 
 
@@ -154,9 +189,8 @@ class Strategy(ABC):
             Logger.error("Asset Price Path not provided in Config file.")
             raise Exception("Asset Price Path not provided in Config file.")
 
-        __PriceDownloader = Datadownloader(listAssets=listAssets, path = pricePath)
-        __PriceDownloader.loadData()
-        self.PriceData = __PriceDownloader.allData_dict
+        createLoader = lambda: Datadownloader(listAssets=listAssets, path = pricePath, useCache = self.useDataCache, threads = self.loaderThreads)
+        self.PriceDataHandle = WindowedDataHandle(createLoader = createLoader, warmupDays = self.warmupDays)
 
 
     def __loadMacroMarketData(self):
@@ -166,10 +200,89 @@ class Strategy(ABC):
             Logger.error("marketDataPath not provided in Config file.")
             raise Exception("marketDataPath not provided in Config file.")
 
-        __MacroDataInfo = MacroMarketDataLoader(listMarketInfoFiles= listMarketInfoFiles, \
-                                                   path = marketDataPath)
-        __MacroDataInfo.loadData()
-        self.MacroData = __MacroDataInfo.allData_dict
+        createLoader = lambda: MacroMarketDataLoader(listMarketInfoFiles= listMarketInfoFiles, \
+                                                   path = marketDataPath, useCache = self.useDataCache, \
+                                                   threads = self.loaderThreads)
+        self.MacroDataHandle = WindowedDataHandle(createLoader = createLoader, warmupDays = self.warmupDays)
+
+
+    def __loadDataWindow(self, startDate, endDate):
+        # load the price and macro market info data for the window (None --> all available data)
+        self.__priceData = PriceMatrix.fromFrame(self.PriceDataHandle.get(startDate = startDate, endDate = endDate))
+        self.__macroData = self.MacroDataHandle.get(startDate = startDate, endDate = endDate).to_dict(orient = "index")
+
+
+    def useData(self, priceData, macroData, benchmarkData, tradingDates, marketSignalChecks = None):
+        """
+        runs use the provided data instead of loading it (Eg: data loaded once for all runs of a parameter sweep)
+        priceData: PriceMatrix, macroData: {date: {field: value}}, benchmarkData: as returned by CompositeBenchmark.loadBenchmarkData
+        tradingDates: days to run on (restricted to the dates of each run)
+        marketSignalChecks: market signal checks of macroData (PolicyManager.MarketSignalChecks), reused for signals defined the same way
+        """
+        self.__sharedData = (priceData, macroData, benchmarkData, list(tradingDates))
+        self.__sharedMarketChecks = marketSignalChecks
+
+
+    def tradingDates(self, startDate, endDate):
+        """
+        days (datetime.date) the strategy is run on between startDate and endDate, as per the tradingCalendar config:
+            calendar --> every calendar day
+            intersection --> days with a price (of any asset) and a market info value
+            union --> days with either a price or a market info value
+        """
+        if self.tradingCalendar == "calendar":
+            return pd.date_range(start = startDate, end = endDate, freq = "D").date
+
+        priceDates  = self.PriceDataHandle.tradingDates(startDate = startDate, endDate = endDate)
+        macroDates  = self.MacroDataHandle.tradingDates(startDate = startDate, endDate = endDate)
+
+        if self.tradingCalendar == "intersection":
+            return np.intersect1d(priceDates, macroDates)
+
+        return np.union1d(priceDates, macroDates)
+
+
+    def refreshData(self):
+        """
+        picks up rows appended to the price/ macro market info/ benchmark files since they were loaded
+        (only the new rows are parsed). The next run (or PriceData/ MacroData) uses the extended data
+        returns the earliest date affected by the changes (None --> no changes)
+        """
+        _affected = [self.PriceDataHandle.refresh(), self.MacroDataHandle.refresh(), self.Benchmark.refresh()]
+        _affected = [date for date in _affected if date is not None]
+
+        if len(_affected) == 0:
+            return None
+
+        self.__priceData = None
+        self.__macroData = None
+        self.PolicyManager.precomputeMarketSignals(None)
+
+        return min(_affected)
+
+
+    @property
+    def PriceData(self):
+        # prices of the last run's window (all available data if not run yet)
+        if self.__priceData is None:
+            self.__loadDataWindow(startDate = None, endDate = None)
+        return self.__priceData
+
+    @PriceData.setter
+    def PriceData(self, value):
+        self.__priceData = value
+
+
+    @property
+    def MacroData(self):
+        # macro market info of the last run's window (all available data if not run yet)
+        if self.__macroData is None:
+            self.__loadDataWindow(startDate = None, endDate = None)
+        return self.__macroData
+
+    @MacroData.setter
+    def MacroData(self, value):
+        self.__macroData = value
 
 
 
@@ -187,75 +300,132 @@ class Strategy(ABC):
                 contains the macro market features to be used to govern the trading strategy
         """
 
-        # load data for the date period
+        tradingDates = self.__prepareRun(startDate = startDate, endDate = endDate)
+
+        for currentDate in tradingDates:
+            self.step(currentDate)
+
+        Logger.info(f"Strategy Run completed")
+
+    
+    def __prepareRun(self, startDate, endDate):
+        # loads the data for the date period and returns the days to run on
+        startDate   = datetime.strptime(startDate, "%Y%m%d").date()
+        endDate     = datetime.strptime(endDate, "%Y%m%d").date()
+
+        self.__priceData, self.__macroData, self.BenchmarkData, tradingDates = self.loadRunData(startDate = startDate, endDate = endDate)
+
+        # market signals checked once for all days of the run
+        self.PolicyManager.precomputeMarketSignals(self.__macroData, shared = self.__sharedMarketChecks)
+
+        # presize the daily ledger for the date range
+        self.PortfolioManager.reserve(len(tradingDates))
+
+        return tradingDates
+
 
-        done = False
-        self.currentDate = datetime.strptime(startDate, "%Y%m%d").date()
+    def loadRunData(self, startDate, endDate):
+        """
+        loads the data of a run between startDate and endDate (datetime.date)
+        returns (price data (PriceMatrix), macro market info {date: {field: value}}, benchmark data, days to run on)
+        """
+
+        if self.__sharedData is not None:
+            # data provided with useData
+            priceData, macroData, benchmarkData, tradingDates = self.__sharedData
+            return priceData, macroData, benchmarkData.loc[startDate:endDate], [date for date in tradingDates if startDate <= date <= endDate]
 
         # load the benchmark Data
-        self.BenchmarkData = self.Benchmark.loadBenchmarkData(startDate= self.currentDate, endDate = datetime.strptime(endDate, "%Y%m%d").date())
+        benchmarkData = self.Benchmark.loadBenchmarkData(startDate= startDate, endDate = endDate)
 
-        # # load the market info if provided
-        # if len(macroMarketInfo.keys()) > 0:
-        #     self.__loadMacroMarketData(macroMarketInfo=macroMarketInfo)
+        # load the price and macro market info data for the date range (plus warm-up)
+        self.__loadDataWindow(startDate = startDate, endDate = endDate)
 
-        while not done:
+        # days to run on. Days not part of the trading calendar are skipped entirely: holdings, cash and asset state
+        # carry forward unchanged, and no policy action/ daily history is recorded for them. On a trading day, assets 
+        # without a price of their own use their last available price (forward filled by the loaders). 
+        # DaysHolding counts the (trading) days run on, DaysSinceLastTrade counts calendar days
+        tradingDates = self.tradingDates(startDate = startDate, endDate = endDate)
 
+        return self.__priceData, self.__macroData, benchmarkData, tradingDates
 
 
-            if self.currentDate >= datetime.strptime(endDate, "%Y%m%d").date():
-                done = True
+    def step(self, date, prices = None, marketState = None):
+        """
+        runs the strategy for one day: policy action on the current state, orders and portfolio update
+        date: datetime.date
+        prices: {asset: price} of the day (None --> taken from PriceData)
+        marketState: {field: value} market info of the day (None --> taken from MacroData, or no market info if prices are passed)
+                     prices and marketState are passed when the strategy is fed bar by bar (see StreamManager)
+        returns the orders executed on the day
+        """
 
-            # get current values (using properties of this class)
-            currentAssetLevelState  = self.currentAssetLevelState
-            currentPortfolioState   = self.currentPortfolioLevelState
-            currentMarketState      = self.currentMarketConditions
-            currentPrice            = self.getTodayPrice
+        self.currentDate = date
 
-            # get action based on the current portfolio state and market conditions
-            action, conditionsMet = self.PolicyManager.getAction(assetLevelState = currentAssetLevelState, \
-                                                  portfolioLevelState = currentPortfolioState, \
-                                                  marketLevelState = currentMarketState)
+        # get current values (using properties of this class)
+        currentAssetLevelState  = self.currentAssetLevelState
+        currentPortfolioState   = self.currentPortfolioLevelState
+        currentPrice            = self.getTodayPrice if prices is None else prices
 
+        # a bar fed without market info has no market fields (MacroData only covers the loaded window)
+        if marketState is None and prices is not None:
+            marketState = {}
+        currentMarketState      = self.currentMarketConditions if marketState is None else marketState
 
-            # update the action as needed by the policy
-            # print(self.currentDate, action)
-            action = self.updateAction_as_per_policy(action)
+        # incremental mode: policy re-checks only the asset signals of changed state fields
+        if self.incrementalSignals:
+            _changed = self.PortfolioManager.changedAssets()
+            self.PolicyManager.markDirty({field: _changed[stateField] for field, stateField in self.ASSET_STATE_FIELDS.items()})
 
-            # Log how we are entering/ exiting 
-            
-            # create orderInfo from actions
-            orders = self.convertActiontoTrade(action=action, currentPrice=currentPrice, action_condition = conditionsMet)
-            # if len(orders) > 0:
-            #     Logger.info(f'Date: {self.currentDate}, Action: {action}  Order: {orders}')
+        # get action based on the current portfolio state and market conditions
+        action, conditionsMet = self.PolicyManager.getAction(assetLevelState = currentAssetLevelState, \
+                                              portfolioLevelState = currentPortfolioState, \
+                                              marketLevelState = currentMarketState, \
+                                              date = self.currentDate if marketState is None else None)
 
 
-            # perform Trade based on the suggested action
-            self.PortfolioManager.update(date = self.currentDate, newTrade=orders, currentPrice=currentPrice)
+        # update the action as needed by the policy
+        action = self.updateAction_as_per_policy(action)
 
-            # update the current date
-            self.currentDate = self.currentDate + relativedelta.relativedelta(days=1)
+        # create orderInfo from actions
+        orders = self.convertActiontoTrade(action=action, currentPrice=currentPrice, action_condition = conditionsMet)
+
+        # perform Trade based on the suggested action
+        self.PortfolioManager.update(date = self.currentDate, newTrade=orders, currentPrice=currentPrice)
+
+        return orders
 
 
+    def runVectorized(self, startDate, endDate):
+        """
+        runs the strategy with the vectorized engine (see VectorizedEngine): same results as run, 
+        days without any policy action are computed in bulk. Stateless signal policies only (see isVectorizable)
+        startDate, endDate: string of format: YYYYMMDD
+        """
+
+        engine = VectorizedEngine(strategy = self)
+        tradingDates = self.__prepareRun(startDate = startDate, endDate = endDate)
+
+        engine.run(tradingDates)
 
         Logger.info(f"Strategy Run completed")
 
-    
+
+    @property
+    def isVectorizable(self):
+        # whether the policy can be run with runVectorized (no signals on the holding period/ running performance)
+        return len(VectorizedEngine.statefulSignals(self.PolicyManager.Program)) == 0
+
+
     @property
     def currentAssetLevelState(self):
         currentAssetState = {}
 
-        for asset in self.listAssets:
-            _thisAssetObject    = getattr(self.PortfolioManager.AssetLevelInfo, asset)
-            currentPosition     = getattr(_thisAssetObject, "Value")
-            runningDays         = getattr(_thisAssetObject, "DaysHolding")
-            runningPerformance  = getattr(_thisAssetObject, "RunningPerformance")
-            daysSinceLastTrade  = getattr(_thisAssetObject, "DaysSinceLastTrade") 
+        _assetState = self.PortfolioManager.AssetState
+        _values     = {field: getattr(_assetState, stateField).tolist() for field, stateField in self.ASSET_STATE_FIELDS.items()}
 
-            currentAssetState[asset] = {"currentPosition": currentPosition, \
-                                            "runningDays": runningDays, \
-                                            "runningPerformance": runningPerformance, \
-                                            "DaysSinceLastTrade": daysSinceLastTrade}
+        for index, asset in enumerate(self.listAssets):
+            currentAssetState[asset] = {field: _values[field][index] for field in self.ASSET_STATE_FIELDS}
 
         return currentAssetState
 
@@ -264,11 +434,8 @@ class Strategy(ABC):
     def currentPortfolioLevelState(self):
         currentPortfolioState = {}
 
-        cash            = self.PortfolioManager.PortfolioLevelInfo.Cash
-        cash_pct        = self.PortfolioManager.PortfolioLevelInfo.Cash_Pct
-
-        currentPortfolioState = {"runningCash": cash, \
-                                 "runningCash_pct": cash_pct}
+        _portfolioInfo = self.PortfolioManager.PortfolioLevelInfo
+        currentPortfolioState = {field: getattr(_portfolioInfo, stateField) for field, stateField in self.PORTFOLIO_STATE_FIELDS.items()}
 
         return currentPortfolioState
 
@@ -292,11 +459,9 @@ class Strategy(ABC):
 
         # convert date from string format to datetime format
         # currentDate = datetime.strptime(self.currentDate, "%Y%m%d").date()
-        if self.currentDate not in self.PriceData.keys():
+        priceInfo = self.PriceData.row(self.currentDate)
+        if priceInfo is None:
             Logger.info(f"No Price available for Date: {self.currentDate}")
-            priceInfo = None
-        else:
-            priceInfo = self.PriceData[self.currentDate]
 
         return priceInfo
 
@@ -321,16 +486,16 @@ class Strategy(ABC):
 
         # create orderInfo from actions
         orders = {}
+        _assetState = self.PortfolioManager.AssetState
         for index, asset in enumerate(self.listAssets):
 
             _thisAction = action[asset]
             price = currentPrice[asset]
 
             # get current holdings
-            _thisAssetObject    = getattr(self.PortfolioManager.AssetLevelInfo, asset)
-            currentHolding      = getattr(_thisAssetObject, "Holding")
-            currentPosition     = getattr(_thisAssetObject, "Value")
-            availableCash       = getattr(self.PortfolioManager.PortfolioLevelInfo, "Cash")
+            currentHolding      = _assetState.Holding[index]
+            currentPosition     = _assetState.Value[index]
+            availableCash       = self.PortfolioManager.PortfolioLevelInfo.Cash
 
             if _thisAction == 0:
                 pass
@@ -458,86 +623,39 @@ class Strategy(ABC):
         
 
 
-    @abstractmethod
-    def computePerformance(self):
-        
+    def computeCumulativePerformance(self):
+        # cumulative performance of the strategy and the benchmark (metrics x [Stgy, Benchmark]), see PerformanceManager.batch_metrics
         portfolioHistory = self.portfolioHistory
         bmHistory = self.benchmarkHistory
+        bmPrices = pd.Series(bmHistory["Price"].values, index = bmHistory["Date"])
 
-        cumulativePerformance = {"Stgy": {}, "Benchmark": {}}
-
-
-
-        # 1. compute cumulativePerformance
-        periodReturn    = PerformanceManager.Returns(data = portfolioHistory, cumulativePeriod=True, \
-                                                         rollingWindow=None, priceCol="PortfolioValue")
-
-        annualizedVol   = PerformanceManager.Risk.Volatility(data = portfolioHistory, rollingWindow=None, returnCol="Returns")
-
-        # var             = PerformanceManager.Risk.VaR(data = portfolioHistory, distribution="HIST", confidenceLevel=0.95, returnCol="Return")
-        # cvar            = PerformanceManager.Risk.CVaR(data = portfolioHistory, distribution="HIST", confidenceLevel=0.95, returnCol="Return")
-        maxDD           = PerformanceManager.Risk.MaxDrawdown(data = portfolioHistory, priceCol="PortfolioValue")
-
-        sharpe          = PerformanceManager.Ratios.Sharpe(data = portfolioHistory, riskfreerate=0.0, rollingWindow= None, priceCol="PortfolioValue", returnCol="Returns")
-        sortino         = PerformanceManager.Ratios.Sortino(data = portfolioHistory, riskfreerate=0.0, rollingWindow= None, priceCol="PortfolioValue", returnCol="Returns")
-
-
-        beta            = PerformanceManager.Risk.Beta(data = portfolioHistory, benchmarkData=bmHistory, rollingWindow=None, returnCol = "Returns") 
-        trackingerror   = PerformanceManager.Risk.TrackingError(data = portfolioHistory, benchmarkData=bmHistory, returnCol = "Returns") 
-        informationRatio = PerformanceManager.Ratios.Information(data = portfolioHistory, benchmarkData=bmHistory, priceCol = "Price", returnCol = "Returns")
-
-        cumulativePerformance["Stgy"]["Returns"]    = np.round(periodReturn,4)
-        cumulativePerformance["Stgy"]["Volatility"] = np.round(annualizedVol,4)
-        cumulativePerformance["Stgy"]["Max Drawdown"] = np.round(maxDD,4)
-        # cumulativePerformance["95% CVaR"]   = np.round(cvar,4)
-        cumulativePerformance["Stgy"]["Sharpe Ratio"] = np.round(sharpe,4)
-        cumulativePerformance["Stgy"]["Sortino Ratio"] = np.round(sortino,4)
+        stgyMetrics     = PerformanceManager.batch_metrics(portfolioHistory[["PortfolioValue"]], portfolioHistory["Date"], benchmark = bmPrices, riskfreerate = 0.0)
+        bmMetrics       = PerformanceManager.batch_metrics(bmHistory[["Price"]], bmHistory["Date"], benchmark = bmPrices, riskfreerate = 0.0)
 
-        cumulativePerformance["Stgy"]["Beta"] = np.round(beta, 4)
-        cumulativePerformance["Stgy"]["Tracking Error"] = np.round(trackingerror, 4)
-        cumulativePerformance["Stgy"]["Information Ratio"] = np.round(informationRatio, 4)
+        cumulativePerformance = pd.DataFrame({"Stgy": stgyMetrics["PortfolioValue"], "Benchmark": bmMetrics["Price"]})
 
+        return np.round(cumulativePerformance.loc[PerformanceManager.CUMULATIVE_METRICS], 4)
 
-        # -- get cumulative Info for benchmark
-        periodReturn    = PerformanceManager.Returns(data = bmHistory, cumulativePeriod=True, \
-                                                         rollingWindow=None, priceCol="Price")
 
-        annualizedVol   = PerformanceManager.Risk.Volatility(data = bmHistory, rollingWindow=None, returnCol="Returns")
-
-        # var             = PerformanceManager.Risk.VaR(data = portfolioHistory, distribution="HIST", confidenceLevel=0.95, returnCol="Return")
-        # cvar            = PerformanceManager.Risk.CVaR(data = portfolioHistory, distribution="HIST", confidenceLevel=0.95, returnCol="Return")
-        maxDD           = PerformanceManager.Risk.MaxDrawdown(data = bmHistory, priceCol="Price")
-
-        sharpe          = PerformanceManager.Ratios.Sharpe(data = bmHistory, riskfreerate=0.0, rollingWindow= None, priceCol="Price", returnCol="Returns")
-        sortino         = PerformanceManager.Ratios.Sortino(data = bmHistory, riskfreerate=0.0, rollingWindow= None, priceCol="Price", returnCol="Returns")
-
-        beta            = PerformanceManager.Risk.Beta(data = bmHistory, benchmarkData=bmHistory, rollingWindow=None, returnCol = "Returns") 
-        trackingerror   = PerformanceManager.Risk.TrackingError(data = bmHistory, benchmarkData=bmHistory, returnCol = "Returns") 
-        informationRatio = PerformanceManager.Ratios.Information(data = bmHistory, benchmarkData=bmHistory, priceCol = "Price", returnCol = "Returns")
-
-
-        cumulativePerformance["Benchmark"]["Returns"]    = np.round(periodReturn,4)
-        cumulativePerformance["Benchmark"]["Volatility"] = np.round(annualizedVol,4)
-        cumulativePerformance["Benchmark"]["Max Drawdown"] = np.round(maxDD,4)
-        # cumulativePerformance["95% CVaR"]   = np.round(cvar,4)
-        cumulativePerformance["Benchmark"]["Sharpe Ratio"] = np.round(sharpe,4)
-        cumulativePerformance["Benchmark"]["Sortino Ratio"] = np.round(sortino,4)
+    @abstractmethod
+    def computePerformance(self):
+        
+        portfolioHistory = self.portfolioHistory
+        bmHistory = self.benchmarkHistory
 
-        cumulativePerformance["Benchmark"]["Beta"] = np.round(beta, 4)
-        cumulativePerformance["Benchmark"]["Tracking Error"] = np.round(trackingerror, 4)
-        cumulativePerformance["Benchmark"]["Information Ratio"] = np.round(informationRatio, 4)
 
-        cumulativePerformance = pd.DataFrame.from_dict(cumulativePerformance, orient="index").T
+        # 1. compute cumulativePerformance
+        cumulativePerformance = self.computeCumulativePerformance()
 
 
         # 2. compute Trailing Metrics
 
 
         # 3. compute Annual Performance
-        annualPerformance = PerformanceManager.computeAnnualPerformance(strategydata=portfolioHistory, riskfreerate=0.0, priceCol="Price", returnsCol="Returns", benchmark = bmHistory)
+        annualPerformance = PerformanceManager.computeAnnualPerformance(strategydata=portfolioHistory, riskfreerate=0.0, priceCol="Price", benchmark = bmHistory)
 
         # 4. Monthly Performance
-        monthlyPerformance = PerformanceManager.computeMonthlyPerformance(strategydata=portfolioHistory, riskfreerate=0.0, priceCol="Price", returnCol="Returns", benchmark = bmHistory)
+        monthlyPerformance = PerformanceManager.computeMonthlyPerformance(strategydata=portfolioHistory, riskfreerate=0.0, priceCol="Price", benchmark = bmHistory)
 
         return cumulativePerformance, annualPerformance, monthlyPerformance
 
@@ -0,0 +1,215 @@
+import os
+import io
+import time
+from datetime import datetime
+import queue
+import numpy as np
+import pandas as pd
+
+import DataCacheManager
+from Utilities import loggingManager
+
+
+Logger = loggingManager.logger.getLogger("StreamManager")
+
+
+POLL_SECONDS    = 1.0       # wait between checks of a tailed file for new rows
+
+
+
+class Bar():
+    """
+    Market data of one day as it arrives in a stream
+    date --> datetime.date, prices --> {asset: price}, marketState --> {field: value} (None --> no market info)
+    """
+
+    __slots__ = ("date", "prices", "marketState")
+
+    def __init__(self, date, prices, marketState = None):
+        self.date           = date
+        self.prices         = prices
+        self.marketState    = marketState
+
+    def __repr__(self):
+        return f"Bar({self.date}, {self.prices}, {self.marketState})"
+
+
+
+def _parseBars(filepath):
+    return pd.read_csv(filepath, parse_dates = ["Date"])
+
+
+def _rowsToBars(rows, listAssets):
+    # one bar per row. Asset columns are prices, all other columns are market info fields
+    _assets = [column for column in rows.columns if column in listAssets]
+    _fields = [column for column in rows.columns if column != "Date" and column not in listAssets]
+
+    bars = []
+    for row in rows.to_dict(orient = "records"):
+        prices      = {asset: row[asset] for asset in _assets if not pd.isna(row[asset])}
+        marketState = {field: row[field] for field in _fields if not pd.isna(row[field])}
+
+        bars.append(Bar(date = pd.Timestamp(row["Date"]).date(), prices = prices, marketState = marketState if len(marketState) > 0 else None))
+
+    return bars
+
+
+
+def queueBars(barQueue, timeout = None):
+    """
+    bars put on an in process queue.Queue (by another thread), in the order they are put
+    the stream ends when None is put on the queue (or no bar arrives for timeout seconds)
+    """
+    while True:
+        try:
+            bar = barQueue.get(timeout = timeout)
+        except queue.Empty:
+            Logger.info(f"No bar received for {timeout} seconds. Stream ended")
+            return
+
+        if bar is None:
+            return
+
+        yield bar
+
+
+async def asyncQueueBars(barQueue):
+    # bars put on an asyncio.Queue. The stream ends when None is put on the queue
+    while True:
+        bar = await barQueue.get()
+        if bar is None:
+            return
+
+        yield bar
+
+
+def fileBars(filepath, listAssets, fromStart = True, pollSeconds = POLL_SECONDS, idleTimeout = None):
+    """
+    bars of a csv file that keeps growing (Eg: written by a data feed): one row per day with a Date column,
+    one price column per asset and market info fields as further columns
+    Rows already in the file are emitted first (fromStart = False --> skipped), then the file is tailed:
+    only the rows appended since the last check are parsed (complete lines only, a partially written line
+    is emitted once complete)
+    the stream ends when no row was appended for idleTimeout seconds (None --> never)
+    """
+
+    state = DataCacheManager.ingestState(filepath)
+    if fromStart and state["offset"] > 0:
+        with open(filepath, "rb") as f:
+            _rows = _parseBars(io.BytesIO(f.read(state["offset"])))
+
+        for bar in _rowsToBars(_rows, listAssets):
+            yield bar
+
+    _lastRow = time.monotonic()
+    while True:
+        if os.path.getsize(filepath) > state["offset"]:
+            rows, _state = DataCacheManager.readAppendedRows(filepath, state = state, parser = _parseBars)
+            if rows is None:
+                Logger.error(f"{filepath} changed otherwise than appending rows. Stream ended")
+                raise Exception(f"{filepath} changed otherwise than appending rows")
+
+            state = _state
+            if len(rows) > 0:
+                _lastRow = time.monotonic()
+                for bar in _rowsToBars(rows, listAssets):
+                    yield bar
+                continue
+
+        if idleTimeout is not None and time.monotonic() - _lastRow > idleTimeout:
+            Logger.info(f"No row appended to {filepath} for {idleTimeout} seconds. Stream ended")
+            return
+
+        time.sleep(pollSeconds)
+
+
+
+class StreamRunner():
+    """
+    Drives a Strategy bar by bar (live or paper trading) through Strategy.step
+    Each bar updates the PortfolioManager state in place and emits the orders of the day. No data frames
+    are built while streaming: prices and market info of the bar are passed to the strategy as is
+    The strategy can be warmed up on history first (Strategy.run) and continues from that state
+    Assets without a price in a bar use their last price (as the loaders forward fill prices)
+    """
+
+    def __init__(self, strategy):
+
+        self.strategy   = strategy
+        self.listAssets = list(strategy.listAssets)
+
+        self.lastDate   = None
+        self.lastPrices = {}
+
+        self.bars       = 0
+        self.latency    = 0.0       # seconds spent in the strategy (last bar)
+        self.maxLatency = 0.0
+
+
+    def warmup(self, startDate, endDate, vectorized = False):
+        """
+        runs the strategy on history between startDate and endDate (string of format: YYYYMMDD)
+        streaming continues from the resulting portfolio state (bars up to endDate are ignored)
+        """
+        if vectorized:
+            self.strategy.runVectorized(startDate = startDate, endDate = endDate)
+        else:
+            self.strategy.run(startDate = startDate, endDate = endDate)
+
+        self.lastDate = datetime.strptime(endDate, "%Y%m%d").date()
+
+        priceData = self.strategy.PriceData
+        _dates = [date for date in priceData.dates if date <= self.lastDate]
+        if len(_dates) > 0:
+            _row = priceData.row(_dates[-1])
+            self.lastPrices = {asset: _row[asset] for asset in self.listAssets if _row[asset] > 0}
+
+
+    def process(self, bar):
+        """
+        runs the strategy on one bar
+        returns the orders of the day (None --> bar skipped: older than the last bar or no price for some asset)
+        """
+        if self.lastDate is not None and bar.date <= self.lastDate:
+            Logger.warning(f"Bar of {bar.date} skipped. Already processed up to {self.lastDate}")
+            return None
+
+        # runner state is only changed once the strategy processed the bar
+        prices = {**self.lastPrices, **bar.prices}
+        if any(asset not in prices for asset in self.listAssets):
+            Logger.warning(f"Bar of {bar.date} skipped. No price available for {[asset for asset in self.listAssets if asset not in prices]}")
+            return None
+
+        _start = time.perf_counter()
+        orders = self.strategy.step(bar.date, prices = dict(prices), marketState = {} if bar.marketState is None else bar.marketState)
+
+        self.latency    = time.perf_counter() - _start
+        self.maxLatency = max(self.maxLatency, self.latency)
+        self.bars       += 1
+        self.lastDate   = bar.date
+        self.lastPrices = prices
+
+        return orders
+
+
+    def stream(self, bars):
+        """
+        generator: runs the strategy on each bar of bars (any iterable, Eg: queueBars, fileBars)
+        yields (date, orders) per processed bar
+        """
+        for bar in bars:
+            orders = self.process(bar)
+            if orders is not None:
+                yield bar.date, orders
+
+
+    async def streamAsync(self, bars):
+        """
+        async generator: runs the strategy on each bar of bars (async iterable, Eg: asyncQueueBars)
+        yields (date, orders) per processed bar
+        """
+        async for bar in bars:
+            orders = self.process(bar)
+            if orders is not None:
+                yield bar.date, orders
+
@@ -0,0 +1,357 @@
+import os
+import itertools
+import random
+import tempfile
+import configparser
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+from Utilities import loggingManager
+from PortfolioUtilsManager import PriceMatrix
+
+
+Logger = loggingManager.logger.getLogger("ParameterSweep")
+
+
+# config options defining the data of a run (cannot be changed within a sweep, as the data is loaded once)
+DATA_OPTIONS = {"StrategyConfig":   ["assets", "marketinfofiles", "assetdatapath", "marketdatapath", "tradingcalendar", "warmupdays"],
+                "BenchmarkConfig":  None,       # None --> all options
+                "AssetListConfig":  None}
+
+
+
+def gridOverrides(space):
+    """
+    all combinations of the provided values
+    space: {"<Section>.<option>": [values]}. Eg: {"Signal_Asset.StopLoss.threshold": [-0.05, -0.1]}
+    returns list of overrides [{"<Section>.<option>": value}]
+    """
+    keys = list(space.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*[space[key] for key in keys])]
+
+
+def sampleOverrides(space, count, seed = None):
+    """
+    random parameter sets
+    space: {"<Section>.<option>": [values] (one picked at random) or (low, high) (uniform)}
+    count: number of parameter sets
+    returns list of overrides [{"<Section>.<option>": value}]
+    """
+    _random = random.Random(seed)
+
+    overrides = []
+    for _ in range(count):
+        _this = {}
+        for key, values in space.items():
+            _this[key] = _random.uniform(*values) if isinstance(values, tuple) else _random.choice(values)
+        overrides.append(_this)
+
+    return overrides
+
+
+def writeConfig(configFile, overrides, filepath):
+    """
+    writes configFile with overrides applied to filepath (interpolations are kept as is)
+    overrides: {"<Section>.<option>": value}      --> replaces the option's value
+               {"<Section>.<option>.threshold": value} --> replaces only the threshold of a signal option
+    """
+
+    config = configparser.ConfigParser(interpolation = None)
+    config.read(configFile)
+
+    for key, value in overrides.items():
+        _parts = key.split(".")
+        if len(_parts) not in (2, 3) or (len(_parts) == 3 and _parts[2].lower() != "threshold"):
+            raise Exception(f"Override {key} not supported. Use: <Section>.<option> or <Section>.<option>.threshold")
+
+        section, option = _parts[0], _parts[1]
+        if not config.has_option(section, option):
+            raise Exception(f"{section}.{option} not available in {configFile}")
+
+        if section in DATA_OPTIONS and (DATA_OPTIONS[section] is None or option.lower() in DATA_OPTIONS[section]):
+            raise Exception(f"{section}.{option} defines the data of the run and cannot be part of a sweep")
+
+        if len(_parts) == 3:
+            # signal config: field, operator, isComparisonRelative, threshold, comparisonField, ...
+            _fields = config.get(section, option).split(",")
+            _fields[3] = str(value)
+            value = ",".join(_fields)
+
+        config.set(section, option, str(value))
+
+    with open(filepath, "w") as f:
+        config.write(f)
+
+
+
+class ParameterSweep():
+    """
+    Runs a strategy for many parameter sets (overrides of a base config file) in parallel
+    Price, macro market info and benchmark data are loaded once, and the market signals checked once over the market data.
+    Prices are shared with the worker processes through shared memory, macro market info, benchmark data and
+    market signal checks are sent once per worker.
+    Every run is independent: the time of a sweep grows linearly with the number of runs, which are spread over the
+    worker processes (one per core by default)
+    """
+
+    def __init__(self, configFile, strategyClass = None, workers = None):
+        """
+        configFile: base strategy config file
+        strategyClass: Strategy class to run (default: YieldCurveRegimeDrivenStrategy)
+        workers: number of worker processes (default: number of cores. 1 --> runs in this process)
+        """
+
+        if strategyClass is None:
+            from StrategyManager.YieldCurveDrivenStrategy import YieldCurveRegimeDrivenStrategy
+            strategyClass = YieldCurveRegimeDrivenStrategy
+
+        self.configFile     = configFile
+        self.strategyClass  = strategyClass
+        self.workers        = os.cpu_count() if workers is None else workers
+
+
+    def run(self, overrides, startDate, endDate):
+        """
+        overrides: list of parameter sets [{"<Section>.<option>": value}] (see gridOverrides/ sampleOverrides/ writeConfig)
+        startDate, endDate: string of format: YYYYMMDD
+        returns DataFrame: one row per parameter set, with the overridden values and the strategy's cumulative performance
+        """
+
+        # load the data once
+        self.loadData(startDate = startDate, endDate = endDate)
+
+        with tempfile.TemporaryDirectory() as configPath:
+
+            configFiles = self.writeConfigs(overrides, configPath)
+            results     = self.runTasks([(self.strategyClass, _configFile, startDate, endDate, False) for _configFile in configFiles])
+
+        return pd.DataFrame([{**_overrides, **result} for _overrides, result in zip(overrides, results)])
+
+
+    def loadData(self, startDate, endDate):
+        # loads the data shared by all runs between startDate and endDate (string of format: YYYYMMDD)
+        strategy = self.strategyClass(configFile = self.configFile)
+        self.data = strategy.loadRunData(startDate = datetime.strptime(startDate, "%Y%m%d").date(), \
+                                         endDate = datetime.strptime(endDate, "%Y%m%d").date())
+
+        # market signals checked once over the shared market data (reused by all runs and windows with the same signals)
+        strategy.PolicyManager.precomputeMarketSignals(self.data[1])
+        self.marketSignalChecks = strategy.PolicyManager.MarketSignalChecks
+
+
+    def writeConfigs(self, overrides, configPath):
+        # writes one config file per parameter set to configPath. Returns the file paths
+        configFiles = []
+        for index, _overrides in enumerate(overrides):
+            _configFile = os.path.join(configPath, f"config_{index}.ini")
+            writeConfig(self.configFile, _overrides, _configFile)
+            configFiles.append(_configFile)
+
+        return configFiles
+
+
+    def runTasks(self, tasks):
+        """
+        runs all tasks on the loaded data (see loadData)
+        tasks: list of (strategyClass, configFile, startDate, endDate, withHistory)
+        returns list of results (see _runTask), in the order of tasks
+        """
+
+        Logger.info(f"Parameter sweep: {len(tasks)} runs on {self.workers} workers")
+
+        priceData, macroData, benchmarkData, tradingDates = self.data
+        if self.workers <= 1:
+            return self.__runSerial(tasks, priceData, macroData, benchmarkData, tradingDates, self.marketSignalChecks)
+
+        return self.__runParallel(tasks, priceData, macroData, benchmarkData, tradingDates, self.marketSignalChecks)
+
+
+
+    def __runSerial(self, tasks, priceData, macroData, benchmarkData, tradingDates, marketSignalChecks):
+        global _workerData
+
+        _workerData = (None, priceData, macroData, benchmarkData, list(tradingDates), marketSignalChecks)
+        try:
+            return [_runTask(task) for task in tasks]
+        finally:
+            _workerData = None
+
+
+    def __runParallel(self, tasks, priceData, macroData, benchmarkData, tradingDates, marketSignalChecks):
+
+        sharedPrices = shared_memory.SharedMemory(create = True, size = max(priceData.values.nbytes, 1))
+        try:
+            _prices = np.ndarray(priceData.values.shape, dtype = np.float64, buffer = sharedPrices.buf)
+            _prices[:] = priceData.values
+            del _prices
+
+            sharedData = (sharedPrices.name, priceData.values.shape, priceData.dates, priceData.assets, \
+                          macroData, benchmarkData, list(tradingDates), marketSignalChecks)
+
+            with ProcessPoolExecutor(max_workers = self.workers, initializer = _initWorker, initargs = sharedData) as pool:
+                return list(pool.map(_runTask, tasks))
+
+        finally:
+            sharedPrices.close()
+            sharedPrices.unlink()
+
+
+
+class WalkForward():
+    """
+    Walk forward optimization: the parameter set with the best in-sample objective of each rolling window
+    is evaluated on the following out-of-sample window. The out-of-sample runs are stitched into one equity curve
+    Data is loaded once for all windows. All in-sample runs (windows x parameter sets) are independent 
+    and run in parallel, then all out-of-sample runs
+    """
+
+    def __init__(self, configFile, strategyClass = None, workers = None, inSampleMonths = 24, outSampleMonths = 6, \
+                 objective = "Sharpe Ratio"):
+        """
+        configFile, strategyClass, workers: see ParameterSweep
+        inSampleMonths, outSampleMonths: length of the in-sample and out-of-sample windows (windows roll by outSampleMonths)
+        objective: cumulative performance metric maximized in-sample (see Strategy.computeCumulativePerformance)
+        """
+
+        self.sweep              = ParameterSweep(configFile = configFile, strategyClass = strategyClass, workers = workers)
+        self.inSampleMonths     = inSampleMonths
+        self.outSampleMonths    = outSampleMonths
+        self.objective          = objective
+
+
+    def windows(self, startDate, endDate):
+        """
+        rolling windows between startDate and endDate (datetime.date)
+        returns list of (in-sample start, in-sample end, out-of-sample start, out-of-sample end)
+        """
+        windows = []
+
+        _start = startDate
+        while True:
+            _oosStart = _start + relativedelta(months = self.inSampleMonths)
+            if _oosStart > endDate:
+                break
+
+            _oosEnd = min(_oosStart + relativedelta(months = self.outSampleMonths) - relativedelta(days = 1), endDate)
+            windows.append((_start, _oosStart - relativedelta(days = 1), _oosStart, _oosEnd))
+
+            _start = _start + relativedelta(months = self.outSampleMonths)
+
+        return windows
+
+
+    def run(self, overrides, startDate, endDate):
+        """
+        overrides: list of parameter sets to choose from (see ParameterSweep.run)
+        startDate, endDate: string of format: YYYYMMDD
+        returns (windows: DataFrame with the chosen parameter set, in-sample objective and out-of-sample performance per window,
+                 equity: DataFrame [Date, Returns, Value] of the stitched out-of-sample runs)
+        """
+
+        windows = self.windows(startDate = datetime.strptime(startDate, "%Y%m%d").date(), endDate = datetime.strptime(endDate, "%Y%m%d").date())
+        if len(windows) == 0:
+            raise Exception(f"No walk forward window between {startDate} and {endDate}")
+
+        _format = lambda date: date.strftime("%Y%m%d")
+        strategyClass = self.sweep.strategyClass
+
+        # load the data once (for all windows)
+        self.sweep.loadData(startDate = startDate, endDate = endDate)
+
+        with tempfile.TemporaryDirectory() as configPath:
+
+            configFiles = self.sweep.writeConfigs(overrides, configPath)
+
+            # 1. in-sample: all windows x parameter sets
+            inSampleTasks = [(strategyClass, _configFile, _format(window[0]), _format(window[1]), False) \
+                                for window in windows for _configFile in configFiles]
+            inSample = self.sweep.runTasks(inSampleTasks)
+
+            chosen = []
+            for index in range(len(windows)):
+                _results    = inSample[index * len(configFiles): (index + 1) * len(configFiles)]
+                _objective  = [result.get(self.objective, np.nan) for result in _results]
+                _objective  = np.where(np.isnan(np.array(_objective, dtype = np.float64)), -np.inf, _objective)
+                chosen.append((int(np.argmax(_objective)), _objective.max()))
+
+            # 2. out-of-sample: the chosen parameter set of each window
+            outSampleTasks = [(strategyClass, configFiles[_chosen], _format(window[2]), _format(window[3]), True) \
+                                for window, (_chosen, _) in zip(windows, chosen)]
+            outSample = self.sweep.runTasks(outSampleTasks)
+
+        summary = []
+        for window, (_chosen, _objective), result in zip(windows, chosen, outSample):
+            _row = {"InSampleStart": window[0], "InSampleEnd": window[1], "OutSampleStart": window[2], "OutSampleEnd": window[3], \
+                    **overrides[_chosen], f"InSample {self.objective}": _objective}
+            _row.update({key: value for key, value in result.items() if key != "History"})
+            summary.append(_row)
+
+        return pd.DataFrame(summary), self.__stitch([result.get("History") for result in outSample])
+
+
+    def __stitch(self, histories):
+        # chains the daily returns of the out-of-sample runs (each starting from its initial cash) into one equity curve
+        _segments = []
+        for history in histories:
+            if history is None or len(history) == 0:
+                continue
+
+            _returns = history["PortfolioValue"] / history["PortfolioValue"].shift(1) - 1
+            _returns.iloc[0] = history["PortfolioValue"].iloc[0] / history["InitialCash"].iloc[0] - 1
+            _segments.append(pd.DataFrame({"Date": history["Date"], "Returns": _returns}))
+
+        if len(_segments) == 0:
+            return pd.DataFrame(columns = ["Date", "Returns", "Value"])
+
+        equity = pd.concat(_segments, ignore_index = True)
+        equity["Value"] = np.cumprod(1 + equity["Returns"].values) * 100
+
+        return equity
+
+
+
+# data shared by all runs of a worker process (set by _initWorker)
+_workerData = None
+
+def _initWorker(sharedName, shape, dates, assets, macroData, benchmarkData, tradingDates, marketSignalChecks):
+    global _workerData
+
+    _sharedPrices = shared_memory.SharedMemory(name = sharedName)
+    _prices = np.ndarray(shape, dtype = np.float64, buffer = _sharedPrices.buf)
+
+    # shared memory handle kept with the data (the prices are a view of its buffer)
+    _workerData = (_sharedPrices, PriceMatrix(dates = dates, assets = assets, values = _prices), macroData, benchmarkData, tradingDates, marketSignalChecks)
+
+
+def _runTask(task):
+    # runs one parameter set. Returns the strategy's cumulative performance (or the error), and the daily portfolio value if withHistory
+    strategyClass, configFile, startDate, endDate, withHistory = task
+    _, priceData, macroData, benchmarkData, tradingDates, marketSignalChecks = _workerData
+
+    try:
+        strategy = strategyClass(configFile = configFile)
+        strategy.useData(priceData = priceData, macroData = macroData, benchmarkData = benchmarkData, tradingDates = tradingDates, \
+                         marketSignalChecks = marketSignalChecks)
+        if strategy.isVectorizable:
+            strategy.runVectorized(startDate = startDate, endDate = endDate)
+        else:
+            strategy.run(startDate = startDate, endDate = endDate)
+
+        cumulativePerformance = strategy.computeCumulativePerformance()
+        result = cumulativePerformance["Stgy"].to_dict()
+        result["Trades"] = len(strategy.PortfolioManager.Trades)
+        result["Error"] = None
+
+        if withHistory:
+            result["History"] = strategy.PortfolioManager.DailyPortfolioDetails[["Date", "PortfolioValue"]].copy()
+            result["History"]["InitialCash"] = strategy.PortfolioManager.initialCash
+
+    except Exception as e:
+        Logger.error(f"Run with {configFile} failed. {e}")
+        result = {"Error": str(e)}
+
+    return result
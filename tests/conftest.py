@@ -0,0 +1,94 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# modules of the repository are imported as top level modules (as in the notebooks)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+ASSETS      = ["NIFTY CONSR DURBL", "NIFTY BANK", "NIFTY MIDCAP 50", "NIFTY INFRA"]
+BENCHMARK   = "NIFTY 50"
+
+# entries on the market regime, exits on stop loss/ holding period (template of makeStrategy)
+CONFIG = """
+[StrategyConfig]
+Assets=${{AssetListConfig:RiskOnAssets}}
+MarketInfoFiles=Regimes
+minCashRequired=0.05
+transaction_cost=0.0005
+initialCapital=1000000
+assetDataPath={prices}/
+marketDataPath={macro}
+savePath={root}/
+
+[TradePolicyConfig]
+Policy=YieldCurvePolicy.YieldCurveRegimePolicy
+Entry=ENTRY_Fresh
+Exit=EXIT_Stoploss,EXIT_MaxTime
+
+[BenchmarkConfig]
+assets={benchmark}
+weights=1
+pricePath={prices}
+
+[AssetListConfig]
+RiskOnAssets={assets}
+
+[Signal_Asset]
+NoPosition=currentPosition,==,False,0,None
+LongPosition=currentPosition,>,False,0,None
+StopLoss=runningPerformance,<=,False,-0.1,None
+HoldingPeriod_LongTerm=runningDays,>=,False,90,None
+
+[Signal_Portfolio]
+PortfolioCash=runningCash_pct,>=,False,0.05,None
+
+[Signal_Market]
+prob_2MRiskOn_enter=prob_AdjRiskOn_2M,>=,False,0.5,None,${{AssetListConfig:RiskOnAssets}}
+
+[ENTRY_Fresh]
+Asset=(NoPosition)
+Portfolio=(PortfolioCash)
+Market=(prob_2MRiskOn_enter)
+
+[EXIT_Stoploss]
+Asset=(LongPosition)&(StopLoss)
+
+[EXIT_MaxTime]
+Asset=(LongPosition)&(HoldingPeriod_LongTerm)
+"""
+
+
+@pytest.fixture
+def makeStrategy(tmp_path):
+    """
+    writes two years of synthetic prices and market info (prob_AdjRiskOn_2M) and returns a function creating
+    a YieldCurveRegimeDrivenStrategy from a config template ({prices}, {macro}, {root}, {benchmark}, {assets})
+    """
+    from StrategyManager import YieldCurveDrivenStrategy
+
+    rng = np.random.default_rng(0)
+
+    prices = tmp_path / "prices"
+    macro = tmp_path / "macro"
+    prices.mkdir()
+    macro.mkdir()
+
+    dates = pd.bdate_range("2009-06-01", "2011-06-30")
+    for asset in ASSETS + [BENCHMARK]:
+        price = np.round(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(dates)))), 2)
+        data = pd.DataFrame({"Date": dates.strftime("%Y-%m-%d"), "Open": price, "Close": price})
+        data.iloc[::-1].to_csv(prices / f"{asset}.csv", index = False)
+
+    pd.DataFrame({"Date": dates.strftime("%Y-%m-%d"), "prob_AdjRiskOn_2M": rng.uniform(0, 1, len(dates))}) \
+        .to_csv(macro / "Regimes.csv", index = False)
+
+    def _strategy(config, name = "config.ini"):
+        configFile = tmp_path / name
+        configFile.write_text(config.format(prices = prices, macro = macro, root = tmp_path, benchmark = BENCHMARK, assets = ",".join(ASSETS)))
+        return YieldCurveDrivenStrategy.YieldCurveRegimeDrivenStrategy(configFile = str(configFile))
+
+    return _strategy
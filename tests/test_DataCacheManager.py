@@ -0,0 +1,50 @@
+import pandas as pd
+
+import DataCacheManager
+
+
+def _open(directory):
+    # cache as opened by a new process (stale entries evicted first)
+    cache = DataCacheManager.DataCache(cacheDir = str(directory / DataCacheManager.CACHE_FOLDER))
+    cache.evict()
+    return cache
+
+
+def test_appended_rows_ingested_across_processes(tmp_path):
+    source = tmp_path / "data.csv"
+    pd.DataFrame({"Date": pd.date_range("2020-01-01", periods = 100).strftime("%Y-%m-%d"), "Value": range(100)}).to_csv(source, index = False)
+
+    calls = {"parse": 0, "append": 0}
+
+    def parser(filepath):
+        calls["parse"] += 1
+        return pd.read_csv(filepath)
+
+    def append(data, filepath, state):
+        rows, newState = DataCacheManager.readAppendedRows(filepath, state = state, parser = pd.read_csv)
+        if rows is None:
+            return None, None
+        calls["append"] += 1
+        return pd.concat([data, rows], ignore_index = True), newState
+
+    _open(tmp_path).read(str(source), parser, append = append)
+
+    with open(source, "a") as f:
+        f.write("2099-01-01,100\n")
+
+    data = _open(tmp_path).read(str(source), parser, append = append)
+
+    assert calls == {"parse": 1, "append": 1}
+    assert len(data) == 101
+    assert data["Value"].iloc[-1] == 100
+
+
+def test_evict_removes_entries_of_deleted_sources(tmp_path):
+    source = tmp_path / "data.csv"
+    pd.DataFrame({"Value": range(10)}).to_csv(source, index = False)
+
+    _open(tmp_path).read(str(source), pd.read_csv)
+    source.unlink()
+
+    assert _open(tmp_path).evict() == 0
+    assert len(list((tmp_path / DataCacheManager.CACHE_FOLDER).iterdir())) == 0
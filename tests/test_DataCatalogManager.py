@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from DataCatalogManager import DataCatalog
+
+
+DAYS = 100      # 800 bytes per column
+
+
+def _loader(calls, name, offset = 0):
+    # load function of DataCatalog.acquire counting the loads of each file
+    def load():
+        calls[name] = calls.get(name, 0) + 1
+        data = pd.DataFrame({"Date": np.arange(DAYS, dtype = np.int64), "Close": np.arange(DAYS) + offset, "Open": np.arange(DAYS) - offset})
+        return data, {"offset": calls[name]}
+
+    return load
+
+
+def test_referenced_series_never_evicted(tmp_path):
+    catalog = DataCatalog(memoryBudget = 0)
+    calls = {}
+
+    series = catalog.acquire(str(tmp_path), "A", ["Close"], _loader(calls, "A"))
+    assert catalog.nbytes == 2 * 8 * DAYS
+    assert catalog.evict() == 0
+    assert catalog.acquire(str(tmp_path), "A", ["Close"], _loader(calls, "A"))["Close"] is series["Close"]
+    assert calls == {"A": 1}
+
+    # still referenced once
+    catalog.release(str(tmp_path), "A", series.keys())
+    assert catalog.nbytes == 2 * 8 * DAYS and catalog.state(str(tmp_path), "A") == {"offset": 1}
+
+    catalog.release(str(tmp_path), "A", series.keys())
+    assert catalog.nbytes == 0
+    assert catalog.state(str(tmp_path), "A") is None
+
+    catalog.acquire(str(tmp_path), "A", ["Close"], _loader(calls, "A"))
+    assert calls == {"A": 2}
+
+
+def test_least_recently_used_evicted_first(tmp_path):
+    # room for the Date and Close series of two files
+    catalog = DataCatalog(memoryBudget = 4 * 8 * DAYS)
+    calls = {}
+
+    for asset in ["A", "B", "A", "C"]:
+        series = catalog.acquire(str(tmp_path), asset, ["Close"], _loader(calls, asset))
+        catalog.release(str(tmp_path), asset, series.keys())
+
+    # B was used least recently
+    assert catalog.state(str(tmp_path), "B") is None
+    assert catalog.state(str(tmp_path), "A") is not None and catalog.state(str(tmp_path), "C") is not None
+
+    for asset in ["A", "C", "B"]:
+        catalog.release(str(tmp_path), asset, catalog.acquire(str(tmp_path), asset, ["Close"], _loader(calls, asset)).keys())
+
+    assert calls == {"A": 1, "B": 2, "C": 1}
+    assert catalog.nbytes == 4 * 8 * DAYS
+
+
+def test_replace_keeps_handed_out_series(tmp_path):
+    catalog = DataCatalog()
+    calls = {}
+
+    first = catalog.acquire(str(tmp_path), "A", ["Close"], _loader(calls, "A"))
+    other = catalog.acquire(str(tmp_path), "A", ["Open"], _loader(calls, "A"))
+    assert calls == {"A": 2}
+
+    data, _ = _loader({}, "A", offset = 10)()
+    catalog.replace(str(tmp_path), "A", data, state = {"offset": 99})
+
+    # held columns replaced, arrays handed out before unchanged
+    assert catalog.state(str(tmp_path), "A") == {"offset": 99}
+    assert catalog.nbytes == 3 * 8 * DAYS
+    assert first["Close"][0] == 0 and other["Open"][0] == 0
+
+    replaced = catalog.acquire(str(tmp_path), "A", ["Close", "Open"], _loader(calls, "A"))
+    assert calls == {"A": 2}
+    assert replaced["Close"][0] == 10 and replaced["Open"][0] == -10
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import PerformanceManager
+
+
+def test_monthly_returns_anchored_on_previous_month_end():
+    dates = pd.bdate_range("2021-01-04", "2021-03-31")
+    prices = pd.DataFrame({"Date": dates, "Price": 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, len(dates))))})
+
+    performance = PerformanceManager.computeMonthlyPerformance(prices, priceCol = "Price")
+    _price = prices.set_index("Date")["Price"]
+    _monthEnd = _price.groupby(_price.index.month).last()
+
+    assert list(performance.index) == ["2021-1", "2021-2", "2021-3"]
+    returns = performance[("Returns (%)", "strategy")]
+    # first month: from its own first day; later months: from the last price of the previous month
+    assert returns["2021-1"] == pytest.approx(_monthEnd[1]/ _price.iloc[0] - 1)
+    assert returns["2021-2"] == pytest.approx(_monthEnd[2]/ _monthEnd[1] - 1)
+    assert returns["2021-3"] == pytest.approx(_monthEnd[3]/ _monthEnd[2] - 1)
+
+    # the first day of a month counts its return against the anchor
+    _daily = _price.pct_change()
+    volatility = performance[("Volatility (%)", "strategy")]
+    assert volatility["2021-2"] == pytest.approx(_daily[_daily.index.month == 2].std() * np.sqrt(PerformanceManager.ANNUALPERIOD))
+    assert volatility["2021-1"] == pytest.approx(_daily[_daily.index.month == 1].std() * np.sqrt(PerformanceManager.ANNUALPERIOD))
+
+
+def test_returns_column_deprecated():
+    prices = pd.DataFrame({"Date": pd.bdate_range("2021-01-04", periods = 30), "Price": np.linspace(100, 110, 30)})
+    prices["Returns"] = prices["Price"].pct_change()
+
+    with pytest.warns(DeprecationWarning, match = "returnCol"):
+        monthly = PerformanceManager.computeMonthlyPerformance(prices, priceCol = "Price", returnCol = "Returns")
+    with pytest.warns(DeprecationWarning, match = "returnsCol"):
+        annual = PerformanceManager.computeAnnualPerformance(prices, priceCol = "Price", returnsCol = "Returns")
+
+    assert monthly.equals(PerformanceManager.computeMonthlyPerformance(prices, priceCol = "Price"))
+    assert annual.equals(PerformanceManager.computeAnnualPerformance(prices, priceCol = "Price"))
+
+
+def _bruteForceRollingMaxDrawdown(values, window):
+    drawdown = np.full(len(values), np.nan)
+    for end in range(window - 1, len(values)):
+        _window = values[end - window + 1:end + 1]
+        drawdown[end] = np.min(_window/ np.maximum.accumulate(_window)) - 1
+
+    return drawdown
+
+
+@pytest.mark.parametrize("window", [1, 2, 7, 10, 50])
+def test_rolling_max_drawdown_matches_brute_force(window):
+    # 50 dates: window 7 does not divide them, window 50 is the whole series
+    values = 100 * np.exp(np.cumsum(np.random.default_rng(window).normal(0, 0.02, (50, 3)), axis = 0))
+    prices = pd.DataFrame(values, index = pd.bdate_range("2021-01-04", periods = 50), columns = ["A", "B", "C"])
+
+    drawdown = PerformanceManager.Risk.RollingMaxDrawdown(prices, rollingWindow = window)
+
+    assert drawdown.index.equals(prices.index) and drawdown.columns.equals(prices.columns)
+    for column in prices.columns:
+        np.testing.assert_allclose(drawdown[column].values, _bruteForceRollingMaxDrawdown(prices[column].values, window), rtol = 0, atol = 1e-12)
+
+    series = PerformanceManager.Risk.RollingMaxDrawdown(prices.reset_index(), rollingWindow = window, priceCol = "A")
+    np.testing.assert_allclose(series.values, drawdown["A"].values, rtol = 0, atol = 0)
+
+
+def test_rolling_max_drawdown_window_longer_than_data():
+    drawdown = PerformanceManager.Risk.RollingMaxDrawdown(np.linspace(100, 90, 5), rollingWindow = 6)
+    assert np.isnan(drawdown).all()
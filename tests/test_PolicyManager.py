@@ -0,0 +1,86 @@
+import numpy as np
+
+from conftest import ASSETS
+
+
+CONFIG = """
+[StrategyConfig]
+Assets=${{AssetListConfig:RiskOnAssets}}
+MarketInfoFiles=Regimes
+minCashRequired=0.05
+transaction_cost=0.0005
+initialCapital=1000000
+assetDataPath={prices}/
+marketDataPath={macro}
+savePath={root}/
+
+[TradePolicyConfig]
+Policy=YieldCurvePolicy.YieldCurveRegimePolicy
+Entry=ENTRY_Fresh,ENTRY_More
+Exit=EXIT_Stoploss,EXIT_Regime
+
+[BenchmarkConfig]
+assets={benchmark}
+weights=1
+pricePath={prices}
+
+[AssetListConfig]
+RiskOnAssets={assets}
+Banks=NIFTY BANK,NIFTY INFRA
+
+[Signal_Asset]
+NoPosition=currentPosition,==,False,0,None
+LongPosition=currentPosition,>,False,0,None
+StopLoss=runningPerformance,<=,False,-0.05,None
+MaxGain=runningPerformance,>=,False,0.08,None
+DaysSinceLastTrade=DaysSinceLastTrade,>=,False,10,None
+
+[Signal_Portfolio]
+PortfolioCash=runningCash_pct,>=,False,0.05,None
+
+[Signal_Market]
+riskOn=prob_AdjRiskOn_2M,>=,False,0.5,None,${{AssetListConfig:RiskOnAssets}}
+riskOff=prob_AdjRiskOn_2M,<=,False,0.3,None,${{AssetListConfig:Banks}}
+
+[ENTRY_Fresh]
+Asset=(NoPosition)
+Portfolio=(PortfolioCash)
+Market=(riskOn)
+
+[ENTRY_More]
+Asset=(LongPosition)&(DaysSinceLastTrade)
+Portfolio=(PortfolioCash)
+Market=(riskOn|riskOff)
+
+[EXIT_Stoploss]
+Asset=(LongPosition)&(StopLoss|MaxGain)
+
+[EXIT_Regime]
+Asset=(LongPosition)
+Market=(riskOff)
+"""
+
+
+def test_compiled_policies_match_per_asset_checks(makeStrategy):
+    strategy = makeStrategy(CONFIG)
+    policy = strategy.PolicyManager
+    checkEntryExitPolicy = policy.checkEntryExitPolicy
+
+    checked = []
+    def _check(*args, **kwargs):
+        policyCheck = checkEntryExitPolicy(*args, **kwargs)
+
+        perAsset = {asset: {policyName: policy.checkPerAssetEntryExitPolicy(asset, policyName) for policyName in policy.Program.policyNames} \
+                        for asset in ASSETS}
+        assert policyCheck == perAsset
+        checked.append(np.array([[perAsset[asset][policyName] for asset in ASSETS] for policyName in policy.Program.policyNames]))
+
+        return policyCheck
+
+    policy.checkEntryExitPolicy = _check
+    strategy.run(startDate = "20090701", endDate = "20110630")
+
+    # every policy held and failed on some day
+    checked = np.array(checked)
+    assert len(checked) > 0
+    assert checked.any(axis = (0, 2)).all() and not checked.all(axis = (0, 2)).any()
@@ -0,0 +1,127 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import PerformanceManager
+from PortfolioUtilsManager import DailyLedger, OnlineMetrics, PortfolioManager
+
+
+ASSETS = ["A", "B", "C"]
+
+
+def test_ledger_grows_geometrically():
+    ledger = DailyLedger(capacity = 2)
+    ledger.addBlock("Values", ["x", "y"])
+
+    capacities = []
+    for day in range(9):
+        ledger.append(day, Values = [day, 2 * day])
+        capacities.append(ledger.capacity)
+
+    assert capacities == [2, 2, 4, 4, 8, 8, 8, 8, 16]
+    assert ledger.toFrame("Values")["y"].tolist() == [2 * day for day in range(9)]
+
+
+def test_ledger_extend_and_reserve_keep_rows():
+    ledger = DailyLedger(capacity = 1)
+    ledger.addBlock("Values", ["x"])
+    ledger.addBlock("Counts", ["n"], dtype = np.int64)
+
+    ledger.append(0, Values = [0.5], Counts = [1])
+    ledger.extend([1, 2, 3], Values = np.array([[1.5], [2.5], [3.5]]), Counts = np.array([[2], [3], [4]]))
+    ledger.reserve(100)
+
+    assert ledger.capacity == 100
+    assert ledger.toFrame("Values")["x"].tolist() == [0.5, 1.5, 2.5, 3.5]
+    assert ledger.toFrame("Counts")["n"].dtype == np.int64
+    assert ledger.toFrame("Counts")["Date"].tolist() == [0, 1, 2, 3]
+
+
+def _snapshot(portfolio, date):
+    # rows of the daily frames rebuilt from the current portfolio state
+    state = portfolio.AssetState
+    details = {"Date": date, "Cash": portfolio.PortfolioLevelInfo.Cash, **dict(zip(ASSETS, state.Value)), \
+               "Cost": portfolio.PortfolioLevelInfo.Cost, "PortfolioValue": portfolio.PortfolioLevelInfo.Value}
+
+    holdings = {"Date": date, "Cash_weight": portfolio.PortfolioLevelInfo.Cash_Pct}
+    for asset, holding, weight in zip(ASSETS, state.Holding, state.Pct_Holding):
+        holdings[asset] = holding
+        holdings[f"{asset}_weight"] = weight
+
+    return details, holdings
+
+
+def test_daily_frames_match_row_append_reference():
+    rng = np.random.default_rng(1)
+    portfolio = PortfolioManager(listAssets = ASSETS, initialCash = 100000, transaction_cost = 0.001, expectedDays = 1)
+
+    detailRows, holdingRows = [], []
+    dates = [datetime.date(2020, 1, 1) + datetime.timedelta(days = day) for day in range(40)]
+    for day, date in enumerate(dates):
+        prices = dict(zip(ASSETS, np.round(100 + rng.normal(0, 5, len(ASSETS)), 2)))
+        orders = {"A": {"Quantity": 10, "Price": prices["A"]}} if day % 7 == 0 else {}
+        if day % 11 == 5:
+            orders["B"] = {"Quantity": 20, "Price": prices["B"]}
+
+        portfolio.update(date = date, newTrade = orders, currentPrice = prices)
+
+        details, holdings = _snapshot(portfolio, date)
+        detailRows.append(details)
+        holdingRows.append(holdings)
+
+        if day == 20:
+            # frames read mid run are cached until the next append
+            cached = portfolio.DailyPortfolioDetails
+            assert portfolio.DailyPortfolioDetails is cached
+            pd.testing.assert_frame_equal(cached, pd.DataFrame(detailRows), check_dtype = False)
+
+    assert portfolio.DailyLedger.capacity >= len(dates)
+    assert portfolio.DailyPortfolioDetails is not cached
+    assert len(cached) == 21
+
+    pd.testing.assert_frame_equal(portfolio.DailyPortfolioDetails, pd.DataFrame(detailRows), check_dtype = False)
+    pd.testing.assert_frame_equal(portfolio.DailyAssetHoldings, pd.DataFrame(holdingRows), check_dtype = False)
+
+
+def test_reserve_presizes_the_ledger():
+    portfolio = PortfolioManager(listAssets = ASSETS, initialCash = 100000)
+    portfolio.reserve(1000)
+
+    assert portfolio.DailyLedger.capacity == 1000
+    for day in range(1000):
+        portfolio.update(date = datetime.date(2020, 1, 1) + datetime.timedelta(days = day), newTrade = {}, currentPrice = dict.fromkeys(ASSETS, 10.0))
+
+    assert portfolio.DailyLedger.capacity == 1000
+    assert portfolio.DailyPortfolioDetails["PortfolioValue"].tolist() == [100000.0] * 1000
+
+
+def test_online_metrics_mixing_update_and_extend():
+    # peak on day 9, drawdown over days 10-29 (across the extend starting on day 15), new peak on day 30
+    rng = np.random.default_rng(3)
+    values = np.concatenate((np.linspace(100, 110, 10), np.linspace(108, 96, 10), np.linspace(97, 109, 10), \
+                             115 * np.exp(np.cumsum(rng.normal(0, 0.01, 70)))))
+    dates = pd.bdate_range("2021-01-04", periods = len(values)).date
+
+    metrics = OnlineMetrics(riskfreerate = 0.05)
+    for start, end, bulk in [(0, 15, False), (15, 40, True), (40, 45, False), (45, 60, True), (60, 80, True), (80, 100, False)]:
+        if bulk:
+            metrics.extend(dates[start:end], values[start:end])
+        else:
+            for date, value in zip(dates[start:end], values[start:end]):
+                metrics.update(date, value)
+
+    summary = metrics.summary()
+    reference = PerformanceManager.batch_metrics(pd.DataFrame({"Value": values}), dates, riskfreerate = 0.05)["Value"]
+    for metric in ["Returns", "Volatility", "Max Drawdown", "Sharpe Ratio", "Sortino Ratio"]:
+        assert np.isclose(summary[metric], reference[metric], rtol = 1e-9, atol = 0), metric
+
+    # days below the running peak
+    _below = values < np.maximum.accumulate(values)
+    _runs = np.zeros(len(values), dtype = int)
+    for day in range(1, len(values)):
+        _runs[day] = _runs[day - 1] + 1 if _below[day] else 0
+
+    assert summary["Max Drawdown Days"] == _runs.max() and _runs[15:30].min() > 0
+    assert summary["Drawdown Days"] == _runs[-1]
+    assert metrics.days == len(values) and metrics.lastDate == dates[-1]
@@ -0,0 +1,17 @@
+import numpy as np
+
+import SignalManager
+
+
+def test_check_values_not_comparable_values_not_met():
+    signal = SignalManager.MarketSignal(name = "prob_enter", field = "prob", operator = ">=", isComparisonRelative = False, threshold = 0.5)
+
+    values = np.array(["NA", 0.7, 0.2, "NA", 0.5], dtype = object)
+
+    assert signal.checkValues(values).tolist() == [False, True, False, False, True]
+
+
+def test_check_values_numeric():
+    signal = SignalManager.MarketSignal(name = "prob_exit", field = "prob", operator = "<=", isComparisonRelative = False, threshold = 0.4)
+
+    assert signal.checkValues(np.array([0.1, 0.4, 0.9, np.nan])).tolist() == [True, True, False, False]
@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+import StreamManager
+from conftest import ASSETS, CONFIG
+
+
+@pytest.fixture
+def strategy(makeStrategy):
+    return makeStrategy(CONFIG)
+
+
+def _priceBars(startDate, endDate, price = 100.0):
+    return [StreamManager.Bar(date, {asset: price for asset in ASSETS}) for date in pd.bdate_range(startDate, endDate).date]
+
+
+def test_price_only_bars_after_warmup(strategy):
+    runner = StreamManager.StreamRunner(strategy)
+    runner.warmup("20100104", "20101231")
+    days = strategy.PortfolioManager.DailyLedger.size
+
+    # dates in the macro file but outside the warm-up window: no market info --> market signals not met
+    bars = _priceBars("2011-01-03", "2011-01-31")
+    processed = list(runner.stream(bars))
+
+    assert len(processed) == len(bars)
+    assert runner.bars == len(bars)
+    assert strategy.PortfolioManager.DailyLedger.size == days + len(bars)
+    # no entries without market info (exits only depend on asset signals)
+    assert all(order["Quantity"] <= 0 for _, orders in processed for order in orders.values())
+
+
+def test_warmup_prices_with_gaps_on_end_date(makeStrategy, tmp_path):
+    # NIFTY BANK has no row on the warm-up end date, NIFTY INFRA only starts trading after it
+    bank = pd.read_csv(tmp_path / "prices" / "NIFTY BANK.csv")
+    bank[bank["Date"] != "2010-12-31"].to_csv(tmp_path / "prices" / "NIFTY BANK.csv", index = False)
+    infra = pd.read_csv(tmp_path / "prices" / "NIFTY INFRA.csv")
+    infra[infra["Date"] >= "2011-01-03"].to_csv(tmp_path / "prices" / "NIFTY INFRA.csv", index = False)
+
+    strategy = makeStrategy(CONFIG)
+    runner = StreamManager.StreamRunner(strategy)
+    runner.warmup("20100104", "20101231")
+
+    assert "NIFTY INFRA" not in runner.lastPrices
+    assert runner.lastPrices["NIFTY BANK"] == bank.loc[bank["Date"] == "2010-12-30", "Close"].iloc[0]
+    assert all(price > 0 for price in runner.lastPrices.values())
+    assert set(runner.lastPrices) == set(ASSETS) - {"NIFTY INFRA"}
+
+
+def test_price_only_bars_without_warmup(strategy):
+    runner = StreamManager.StreamRunner(strategy)
+
+    bars = _priceBars("2011-01-03", "2011-01-14")
+    processed = list(runner.stream(bars))
+
+    assert len(processed) == len(bars)
+    assert strategy.PortfolioManager.DailyLedger.size == len(bars)
+
+
+def test_failed_bar_leaves_runner_unchanged(strategy, monkeypatch):
+    runner = StreamManager.StreamRunner(strategy)
+    first, second = _priceBars("2011-01-03", "2011-01-04")
+    runner.process(first)
+
+    def _fail(*args, **kwargs):
+        raise Exception("step failed")
+
+    monkeypatch.setattr(strategy, "step", _fail)
+    second.prices = {asset: 50.0 for asset in ASSETS}
+
+    with pytest.raises(Exception):
+        runner.process(second)
+
+    assert runner.lastDate == first.date
+    assert runner.lastPrices == first.prices
+    assert runner.bars == 1
+
+
+def test_file_bars_emit_complete_lines_only(tmp_path):
+    source = tmp_path / "bars.csv"
+    source.write_text("Date,NIFTY BANK,prob_AdjRiskOn_2M\n2011-01-03,100,0.5\n2011-01-04,101,0.6\n2011-01-05,10")
+
+    bars = StreamManager.fileBars(str(source), ASSETS, pollSeconds = 0.01, idleTimeout = 0.5)
+    first = [next(bars), next(bars)]
+
+    # the partially written line is completed, then one more row appended
+    with open(source, "a") as f:
+        f.write("2,0.7\n2011-01-06,103,0.8\n")
+    rest = list(bars)
+
+    assert [bar.date for bar in first + rest] == list(pd.bdate_range("2011-01-03", "2011-01-06").date)
+    assert [bar.prices["NIFTY BANK"] for bar in first + rest] == [100, 101, 102, 103]
+    assert rest[0].marketState == {"prob_AdjRiskOn_2M": 0.7}
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import SweepManager
+from StrategyManager import YieldCurveDrivenStrategy
+from conftest import CONFIG
+
+
+START, END = "20090701", "20110630"
+
+
+@pytest.fixture
+def configFile(makeStrategy, tmp_path):
+    makeStrategy(CONFIG, name = "base.ini")
+    return str(tmp_path / "base.ini")
+
+
+def test_sweep_rows_match_direct_runs(configFile, tmp_path):
+    overrides = SweepManager.gridOverrides({"Signal_Asset.StopLoss.threshold": [-0.05, -0.2], "Signal_Asset.HoldingPeriod_LongTerm.threshold": [30, 90]})
+    results = SweepManager.ParameterSweep(configFile, workers = 1).run(overrides, START, END)
+
+    assert len(results) == len(overrides)
+    assert results["Error"].isna().all()
+
+    for index, _overrides in enumerate(overrides):
+        _configFile = str(tmp_path / f"direct_{index}.ini")
+        SweepManager.writeConfig(configFile, _overrides, _configFile)
+        strategy = YieldCurveDrivenStrategy.YieldCurveRegimeDrivenStrategy(configFile = _configFile)
+        strategy.run(startDate = START, endDate = END)
+
+        expected = strategy.computeCumulativePerformance()["Stgy"]
+        row = results.iloc[index]
+        assert all(row[key] == value for key, value in _overrides.items())
+        assert row["Trades"] == len(strategy.PortfolioManager.Trades)
+        np.testing.assert_allclose(row[expected.index].values.astype(np.float64), expected.values.astype(np.float64), rtol = 1e-12)
+
+    # the thresholds change the runs
+    assert results["Trades"].nunique() > 1
+
+
+def test_parallel_sweep_matches_serial(configFile):
+    overrides = SweepManager.gridOverrides({"Signal_Asset.StopLoss.threshold": [-0.05, -0.2]})
+
+    serial = SweepManager.ParameterSweep(configFile, workers = 1).run(overrides, START, END)
+    parallel = SweepManager.ParameterSweep(configFile, workers = 2).run(overrides, START, END)
+
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+@pytest.mark.parametrize("key", ["StrategyConfig.assetDataPath", "StrategyConfig.Assets", "BenchmarkConfig.assets", "AssetListConfig.RiskOnAssets"])
+def test_data_options_cannot_be_swept(configFile, tmp_path, key):
+    with pytest.raises(Exception, match = "defines the data of the run"):
+        SweepManager.writeConfig(configFile, {key: "x"}, str(tmp_path / "sweep.ini"))
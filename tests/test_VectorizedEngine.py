@@ -0,0 +1,79 @@
+import pytest
+
+from conftest import ASSETS
+
+
+CONFIG = """
+[StrategyConfig]
+Assets=${{AssetListConfig:RiskOnAssets}}
+MarketInfoFiles=Regimes
+minCashRequired=0.05
+transaction_cost=0.0005
+initialCapital=1000000
+assetDataPath={prices}/
+marketDataPath={macro}
+savePath={root}/
+
+[TradePolicyConfig]
+Policy=YieldCurvePolicy.YieldCurveRegimePolicy
+Entry=ENTRY_Fresh
+Exit=EXIT_Regime
+
+[BenchmarkConfig]
+assets={benchmark}
+weights=1
+pricePath={prices}
+
+[AssetListConfig]
+RiskOnAssets={assets}
+
+[Signal_Asset]
+NoPosition=currentPosition,==,False,0,None
+LongPosition=currentPosition,>,False,0,None
+
+[Signal_Portfolio]
+PortfolioCash=runningCash_pct,>=,False,0.05,None
+
+[Signal_Market]
+riskOn=prob_AdjRiskOn_2M,>=,False,0.7,None,${{AssetListConfig:RiskOnAssets}}
+riskOff=prob_AdjRiskOn_2M,<=,False,0.1,None,${{AssetListConfig:RiskOnAssets}}
+
+[ENTRY_Fresh]
+Asset=(NoPosition)
+Portfolio=(PortfolioCash)
+Market=(riskOn)
+
+[EXIT_Regime]
+Asset=(LongPosition)
+Market=(riskOff)
+"""
+
+STOPLOSS = """
+[EXIT_Stoploss]
+Asset=(LongPosition)&(StopLoss)
+"""
+
+
+def test_vectorized_run_matches_run(makeStrategy):
+    strategy = makeStrategy(CONFIG)
+    vectorized = makeStrategy(CONFIG, name = "vectorized.ini")
+
+    strategy.run(startDate = "20090701", endDate = "20110630")
+    vectorized.runVectorized(startDate = "20090701", endDate = "20110630")
+
+    portfolio, vectorizedPortfolio = strategy.PortfolioManager, vectorized.PortfolioManager
+    assert len(portfolio.Trades) > 0
+    assert portfolio.Trades.equals(vectorizedPortfolio.Trades)
+    assert portfolio.DailyPortfolioDetails.equals(vectorizedPortfolio.DailyPortfolioDetails)
+    assert portfolio.DailyAssetHoldings.equals(vectorizedPortfolio.DailyAssetHoldings)
+    assert set(portfolio.Trades["Asset"]) <= set(ASSETS)
+
+
+def test_stateful_signals_rejected(makeStrategy):
+    config = CONFIG.replace("Exit=EXIT_Regime", "Exit=EXIT_Regime,EXIT_Stoploss") \
+                   .replace("[Signal_Portfolio]", "StopLoss=runningPerformance,<=,False,-0.1,None\n\n[Signal_Portfolio]") + STOPLOSS
+    strategy = makeStrategy(config)
+
+    assert not strategy.isVectorizable
+    with pytest.raises(Exception, match = "stoploss"):
+        strategy.runVectorized(startDate = "20090701", endDate = "20110630")